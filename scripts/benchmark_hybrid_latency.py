@@ -0,0 +1,43 @@
+import sys
+import os
+import ir_datasets
+import numpy as np
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.search_engine import SearchEngine
+
+# hybrid_search에서 BM25/SPLADE를 순서대로 실행할 때와 동시에 실행할 때의 단계별 시간 비교
+# 동시에 실행하면 전체 시간이 bm25 + splade가 아니라 max(bm25, splade)에 가까워져야 함
+def main():
+    DATASET_ID = "wikir/en1k/training"
+    NUM_QUERIES = 200
+    TOP_K = 10
+
+    dataset = ir_datasets.load(DATASET_ID)
+    queries = [query.text for query in islice(dataset.queries_iter(), NUM_QUERIES)]
+
+    print(f"{'mode':>10} {'bm25(ms)':>9} {'splade(ms)':>11} {'fusion(ms)':>11} {'total(ms)':>10} {'sum(ms)':>8} {'max(ms)':>8}")
+    for parallel in (False, True):
+        engine = SearchEngine(index_path="data/index", parallel_retrieval=parallel)
+        if not engine.load():
+            print("인덱스 로드 실패")
+            return
+        engine.load_splade_model()
+        engine.hybrid_search("warm up!!", top_k=TOP_K)
+
+        timings = {"bm25_time": [], "splade_time": [], "fusion_time": [], "total_time": []}
+        for q_text in queries:
+            stats = {}
+            engine.hybrid_search(q_text, top_k=TOP_K, stats=stats)
+            for name in timings:
+                timings[name].append(stats[name])
+
+        mean = {name: np.mean(values) * 1000 for name, values in timings.items()}
+        leg_sum = np.mean(np.add(timings["bm25_time"], timings["splade_time"])) * 1000
+        leg_max = np.mean(np.maximum(timings["bm25_time"], timings["splade_time"])) * 1000
+        mode = "parallel" if parallel else "sequential"
+        print(f"{mode:>10} {mean['bm25_time']:>9.1f} {mean['splade_time']:>11.1f} {mean['fusion_time']:>11.1f} {mean['total_time']:>10.1f} {leg_sum:>8.1f} {leg_max:>8.1f}")
+
+if __name__ == "__main__":
+    main()
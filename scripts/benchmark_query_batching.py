@@ -0,0 +1,84 @@
+import sys
+import os
+import time
+import threading
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.query_batcher import QueryBatcher
+
+# 동시 요청 수에 따른 쿼리 인코딩 처리량(queries/sec)과 p99 지연 시간 비교
+# - direct: 요청마다 model.encode (batch 크기 1)
+# - batch(n, wait): QueryBatcher로 최대 n개, wait초 동안 모아서 인코딩
+class StubEncoder:
+    # forward 한 번에 고정 비용 + 쿼리당 비용이 드는 가짜 인코더
+    # CPU 하나를 나눠 쓰는 것처럼 forward는 한 번에 하나만 실행됨
+    def __init__(self, fixed_cost: float, per_query_cost: float):
+        self.fixed_cost = fixed_cost
+        self.per_query_cost = per_query_cost
+        self._lock = threading.Lock()
+
+    def encode_batch(self, texts, batch_size=64):
+        with self._lock:
+            time.sleep(self.fixed_cost + self.per_query_cost * len(texts))
+        return {
+            "indices": [np.array([len(text)]) for text in texts],
+            "values": [np.array([1.0], dtype=np.float32) for _ in texts],
+        }
+
+    def encode(self, text):
+        result = self.encode_batch([text], batch_size=1)
+        return dict(zip(result["indices"][0], result["values"][0]))
+
+
+def run_clients(encoder, num_clients: int, requests_per_client: int):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(client_id):
+        local = []
+        for i in range(requests_per_client):
+            start = time.perf_counter()
+            encoder.encode(f"query {client_id} {i}")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(num_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    USE_MODEL = False # True면 실제 SpladeModel 사용 (모델 다운로드 필요)
+    FIXED_COST = 0.010 # 가짜 인코더의 forward 고정 비용 (초)
+    PER_QUERY_COST = 0.001 # 가짜 인코더의 쿼리당 비용 (초)
+    CONCURRENCY = [1, 4, 16, 64]
+    REQUESTS_PER_CLIENT = 20
+    BATCH_CONFIGS = [(8, 0.002), (32, 0.005)] # (max_batch_size, max_wait)
+
+    if USE_MODEL:
+        from src.core.splade_model import SpladeModel
+        model = SpladeModel()
+    else:
+        model = StubEncoder(FIXED_COST, PER_QUERY_COST)
+
+    print(f"{'mode':>16} {'clients':>8} {'queries/sec':>12} {'p50(ms)':>9} {'p99(ms)':>9} {'avg batch':>10}")
+    for num_clients in CONCURRENCY:
+        throughput, p50, p99 = run_clients(model, num_clients, REQUESTS_PER_CLIENT)
+        print(f"{'direct':>16} {num_clients:>8} {throughput:>12.1f} {p50 * 1000:>9.1f} {p99 * 1000:>9.1f} {1:>10.1f}")
+
+        for max_batch_size, max_wait in BATCH_CONFIGS:
+            batcher = QueryBatcher(model, max_batch_size=max_batch_size, max_wait=max_wait)
+            throughput, p50, p99 = run_clients(batcher, num_clients, REQUESTS_PER_CLIENT)
+            batcher.close()
+            mode = f"batch({max_batch_size}, {max_wait * 1000:g}ms)"
+            print(f"{mode:>16} {num_clients:>8} {throughput:>12.1f} {p50 * 1000:>9.1f} {p99 * 1000:>9.1f} {batcher.num_queries / batcher.num_batches:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+import sys
+import os
+import json
+import time
+import zlib
+import platform
+import resource
+import subprocess
+import tempfile
+import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from multiprocessing import get_context
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.search_engine import SearchEngine
+from src.core.document_source import iter_documents
+
+# 검색 스택의 성능 측정 (네트워크 없이 실행 가능)
+# - 인덱스 빌드 시간과 최대 RSS (별도 프로세스에서 빌드해서 측정)
+# - 인덱스 로드 시간
+# - search_bm25 / search_splade / hybrid_search의 쿼리별 지연 시간 p50/p95/p99
+# 결과는 JSON으로 저장하고, BASELINE_PATH가 있으면 이전 결과와 비교해서 출력
+#
+# 문서는 seed로 만드는 합성 corpus를 사용하고, CORPUS = "wikir"이면 로컬에 받아둔 wikir을 사용
+# SPLADE는 기본적으로 단어를 hash로 vocab id에 대응시키는 가짜 인코더를 사용 (USE_MODEL = True면 SpladeModel)
+
+VOCAB_SIZE = 30522
+SYLLABLES = [c + v for c in "bcdfghklmnprstvz" for v in "aeiou"]
+
+
+class StubEncoder:
+    # 단어 -> crc32 % VOCAB_SIZE, 가중치는 1 + log(tf)인 가짜 SPLADE 인코더 (모델 forward 비용 없음)
+    def encode(self, text: str) -> Dict[int, float]:
+        vec = {}
+        for word, tf in Counter(text.lower().split()).items():
+            term_id = zlib.crc32(word.encode()) % VOCAB_SIZE
+            vec[term_id] = vec.get(term_id, 0.0) + 1.0 + float(np.log(tf))
+        return vec
+
+    def encode_batch(self, texts: List[str], batch_size: int = 64):
+        vecs = [self.encode(text) for text in texts]
+        return {
+            "indices": [np.array(list(vec.keys()), dtype=np.int64) for vec in vecs],
+            "values": [np.array(list(vec.values()), dtype=np.float32) for vec in vecs],
+        }
+
+
+def synthetic_vocab(vocab_size: int, seed: int) -> List[str]:
+    # 음절 2~4개로 만든 서로 다른 단어 (순서가 Zipf 분포의 순위)
+    rng = np.random.default_rng(seed)
+    words = set()
+    vocab = []
+    while len(vocab) < vocab_size:
+        word = "".join(rng.choice(SYLLABLES, size=rng.integers(2, 5)))
+        if word not in words:
+            words.add(word)
+            vocab.append(word)
+    return vocab
+
+
+def zipf_ranks(rng: np.random.Generator, size: int, vocab_size: int, exponent: float) -> np.ndarray:
+    # vocab_size 안에서 Zipf 분포를 따르는 단어 순위
+    ranks = rng.zipf(exponent, size=size) - 1
+    return ranks % vocab_size
+
+
+def synthetic_documents(config: dict) -> Iterator[Tuple[str, str, str]]:
+    # seed가 같으면 같은 문서가 같은 순서로 나옴 (메모리에 corpus 전체를 올리지 않고 다시 만들 수 있음)
+    vocab = synthetic_vocab(config["vocab_size"], config["seed"])
+    rng = np.random.default_rng(config["seed"] + 1)
+    for i in range(config["num_docs"]):
+        length = max(5, int(rng.lognormal(np.log(config["mean_doc_length"]), 0.5)))
+        words = zipf_ranks(rng, length, len(vocab), config["zipf_exponent"])
+        yield f"doc{i}", " ".join(vocab[w] for w in words), ""
+
+
+def synthetic_queries(config: dict) -> List[str]:
+    # 1~5단어 쿼리 (너무 흔한 상위 단어는 빼고 뽑음)
+    vocab = synthetic_vocab(config["vocab_size"], config["seed"])
+    rng = np.random.default_rng(config["seed"] + 2)
+    queries = []
+    for _ in range(config["num_queries"]):
+        ranks = 20 + zipf_ranks(rng, rng.integers(1, 6), len(vocab) - 20, config["zipf_exponent"])
+        queries.append(" ".join(vocab[r] for r in ranks))
+    return queries
+
+
+def load_documents(config: dict) -> Iterator[Tuple[str, str, str]]:
+    if config["corpus"] == "wikir":
+        return islice(iter_documents(config["wikir_docs_path"], config["wikir_dataset_id"]), config["num_docs"])
+    return synthetic_documents(config)
+
+
+def load_queries(config: dict) -> List[str]:
+    if config["corpus"] == "wikir":
+        import ir_datasets
+        dataset = ir_datasets.load(config["wikir_dataset_id"])
+        return [query.text for query in islice(dataset.queries_iter(), config["num_queries"])]
+    return synthetic_queries(config)
+
+
+def peak_rss_mb() -> float:
+    # 이 프로세스와 worker 프로세스 중 가장 큰 최대 RSS (Linux에서 ru_maxrss 단위는 KB)
+    peak = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    return peak / 1024
+
+
+def build_indexes(config: dict, paths: dict) -> dict:
+    # 새 프로세스에서 실행 (최대 RSS가 benchmark 프로세스의 다른 단계에 영향을 받지 않도록)
+    start_rss = peak_rss_mb()
+    engine = SearchEngine(**paths, k1=config["k1"], b=config["b"], fast_tokenizer=True)
+
+    def indexed_texts():
+        # run_indexing.py와 같은 방식으로 title을 두 번 넣음
+        for doc_id, text, title in load_documents(config):
+            yield doc_id, f"{title} {title} {text}" if title else text
+
+    start = time.perf_counter()
+    engine.build_index_from_data(indexed_texts(), num_workers=config["num_workers"])
+    engine.inverted_index.build_impacts(engine.k1, engine.b)
+    bm25_time = time.perf_counter() - start
+    bm25_rss = peak_rss_mb()
+
+    encoder = StubEncoder() if not config["use_model"] else None
+    if encoder is None:
+        from src.core.splade_model import SpladeModel
+        encoder = SpladeModel()
+
+    start = time.perf_counter()
+    documents = load_documents(config)
+    while True:
+        batch = list(islice(documents, config["encode_batch_size"]))
+        if not batch:
+            break
+        encoded = encoder.encode_batch([f"{title} {text}" if title else text for _, text, title in batch], batch_size=config["encode_batch_size"])
+        engine.splade_index.add_batch([doc_id for doc_id, _, _ in batch], encoded["indices"], encoded["values"])
+    engine.splade_index.build()
+    splade_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine.save()
+    save_time = time.perf_counter() - start
+
+    return {
+        "num_docs": engine.inverted_index.doc_count,
+        "num_terms": len(engine.inverted_index.index.terms),
+        "bm25_build_sec": bm25_time,
+        "splade_build_sec": splade_time,
+        "save_sec": save_time,
+        "start_rss_mb": start_rss,
+        "bm25_peak_rss_mb": bm25_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(fn, queries: List[str], warmup: int) -> dict:
+    for query in queries[:warmup]:
+        fn(query)
+
+    latencies = []
+    start = time.perf_counter()
+    for query in queries:
+        query_start = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - query_start)
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "count": len(latencies),
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+        "qps": len(latencies) / elapsed,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_comparison(result: dict, baseline: dict):
+    # 지연 시간은 이전 결과 대비 비율 (1보다 크면 느려진 것)
+    print(f"\n=== 비교: {baseline['commit'][:10]} -> {result['commit'][:10]} ===")
+    for name in ("bm25_build_sec", "splade_build_sec", "peak_rss_mb"):
+        old, new = baseline["build"].get(name), result["build"][name]
+        if old:
+            print(f"{name:>24}: {old:10.2f} -> {new:10.2f} ({new / old:5.2f}x)")
+    old, new = baseline["load"].get("load_sec"), result["load"]["load_sec"]
+    if old:
+        print(f"{'load_sec':>24}: {old:10.3f} -> {new:10.3f} ({new / old:5.2f}x)")
+    for method, stats in result["queries"].items():
+        old_stats = baseline["queries"].get(method)
+        if not old_stats:
+            continue
+        for name in ("p50_ms", "p95_ms", "p99_ms"):
+            old, new = old_stats[name], stats[name]
+            print(f"{method + ' ' + name:>24}: {old:10.2f} -> {new:10.2f} ({new / old:5.2f}x)")
+
+
+def main():
+    config = {
+        "corpus": "synthetic", # "synthetic" | "wikir" (wikir은 ir_datasets에 받아둔 로컬 사본 사용)
+        "wikir_dataset_id": "wikir/en1k/training",
+        "wikir_docs_path": "data/expanded_docs.json", # 없으면 wikir 원본 문서 사용
+        "num_docs": 100_000, # wikir이면 앞에서부터 num_docs개 (None이면 전체)
+        "num_queries": 1000,
+        "warmup_queries": 50,
+        "seed": 0,
+        "vocab_size": 50_000,
+        "mean_doc_length": 150,
+        "zipf_exponent": 1.1,
+        "k1": 1.5,
+        "b": 0.9,
+        "bm25_kernel": "numpy",
+        "top_k": 10,
+        "candidates_k": 1000,
+        "num_workers": os.cpu_count() or 1,
+        "encode_batch_size": 64,
+        "use_model": False, # True면 SpladeModel로 인코딩 (모델 다운로드 필요)
+    }
+    OUTPUT_DIR = "data/benchmarks"
+    BASELINE_PATH = None # 비교할 이전 결과 JSON (예: "data/benchmarks/<commit>.json")
+
+    commit = git_commit()
+    print(f"=== 검색 benchmark ({config['corpus']}, 문서 {config['num_docs']}개, commit {commit[:10]}) ===")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {
+            "index_path": os.path.join(tmp_dir, "index"),
+            "splade_index_path": os.path.join(tmp_dir, "splade_index"),
+            "titles_path": os.path.join(tmp_dir, "titles"),
+        }
+
+        print("인덱스 빌드 중...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            build = pool.submit(build_indexes, config, paths).result()
+        print(f"BM25 {build['bm25_build_sec']:.2f}초, SPLADE {build['splade_build_sec']:.2f}초, 최대 RSS {build['peak_rss_mb']:.0f}MB")
+
+        start = time.perf_counter()
+        engine = SearchEngine(**paths, k1=config["k1"], b=config["b"], bm25_kernel=config["bm25_kernel"], fast_tokenizer=True)
+        if not engine.load():
+            print("인덱스 로드 실패")
+            return
+        load = {"load_sec": time.perf_counter() - start}
+        if config["use_model"]:
+            engine.load_splade_model()
+        else:
+            engine.splade_model = StubEncoder()
+        print(f"인덱스 로드 {load['load_sec']:.3f}초")
+
+        queries = load_queries(config)
+        top_k, candidates_k = config["top_k"], config["candidates_k"]
+        methods = {
+            "search_bm25": lambda query: engine.search_bm25(query, top_k=candidates_k),
+            "search_splade": lambda query: engine.search_splade(query, top_k=candidates_k),
+            "hybrid_search": lambda query: engine.hybrid_search(query, top_k=top_k, candidates_k=candidates_k),
+        }
+        query_stats = {}
+        print(f"{'method':>14} {'mean(ms)':>9} {'p50(ms)':>8} {'p95(ms)':>8} {'p99(ms)':>8} {'qps':>8}")
+        for name, fn in methods.items():
+            stats = measure(fn, queries, config["warmup_queries"])
+            query_stats[name] = stats
+            print(f"{name:>14} {stats['mean_ms']:>9.2f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['qps']:>8.1f}")
+        load["query_peak_rss_mb"] = peak_rss_mb()
+
+    result = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": config,
+        "build": build,
+        "load": load,
+        "queries": query_stats,
+    }
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(OUTPUT_DIR, f"{commit[:10]}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"결과 저장: {output_path}")
+
+    if BASELINE_PATH and os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r', encoding='utf-8') as f:
+            print_comparison(result, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import sys
+import os
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.splade_index import SpladeIndex
+from src.core.topk import top_k_order
+
+# SPLADE 인덱스의 로드 시간과 쿼리당 메모리 할당량을 측정
+# - before: 미리 만들어 둔 CSC 행렬에서 쿼리 열을 fancy indexing으로 잘라서 내적 (기존 방식)
+# - after: posting 구간을 thread별로 재사용하는 점수 버퍼에 바로 누적 (SpladeIndex.search)
+# 쿼리는 posting이 있는 단어 중에서 무작위로 뽑아서 사용 (모델 없이 실행 가능)
+def main():
+    INDEX_PATH = "data/splade_index"
+    NUM_QUERIES = 100
+    TERMS_PER_QUERY = 30
+    TOP_K = 1000
+    SEED = 42
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = SpladeIndex()
+    if not index.load(INDEX_PATH):
+        print("인덱스 로드 실패")
+        return
+    load_time = time.perf_counter() - start
+    _, load_peak = tracemalloc.get_traced_memory()
+    print(f"로드 시간: {load_time * 1000:.2f}ms, 로드 중 최대 할당량: {load_peak / 1024 ** 2:.2f}MB")
+    print(f"문서 수: {index.num_docs}, posting 수: {len(index.docs)}")
+
+    rng = np.random.default_rng(SEED)
+    vocab = np.flatnonzero(np.diff(index.offsets) > 0)
+    queries = []
+    for _ in range(NUM_QUERIES):
+        cols = rng.choice(vocab, size=min(TERMS_PER_QUERY, len(vocab)), replace=False)
+        values = rng.uniform(0.1, 2.5, size=len(cols)).astype(np.float32)
+        queries.append(dict(zip(cols.tolist(), values)))
+
+    # 기존 방식처럼 CSC 행렬은 로드할 때 한 번만 만들어 두고 사용
+    matrix = index.matrix
+
+    def before(query_vec):
+        sub_matrix = matrix[:, list(query_vec.keys())]
+        scores = sub_matrix.dot(np.array(list(query_vec.values())))
+        non_zero_indices = np.flatnonzero(scores)
+        original_scores = scores[non_zero_indices] / 100.0
+        order = top_k_order(original_scores, TOP_K)
+        return non_zero_indices[order], original_scores[order]
+
+    def after(query_vec):
+        return index.search(query_vec, top_k=TOP_K)
+
+    for name, fn in (("before", before), ("after", after)):
+        # 첫 쿼리는 warm up (after는 여기서 thread별 버퍼를 만듦)
+        fn(queries[0])
+
+        # 시간은 tracemalloc 없이 따로 측정 (tracemalloc은 할당마다 비용이 들어서 시간이 왜곡됨)
+        tracemalloc.stop()
+        start = time.perf_counter()
+        for query_vec in queries:
+            fn(query_vec)
+        elapsed = (time.perf_counter() - start) / len(queries)
+
+        tracemalloc.start()
+        peaks = []
+        for query_vec in queries:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            fn(query_vec)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+        print(
+            f"{name:>6}: 평균 시간 {elapsed * 1000:7.2f}ms, "
+            f"쿼리당 최대 할당량 평균 {np.mean(peaks) / 1024 ** 2:7.2f}MB / 최대 {np.max(peaks) / 1024 ** 2:7.2f}MB"
+        )
+
+    tracemalloc.stop()
+
+if __name__ == "__main__":
+    main()
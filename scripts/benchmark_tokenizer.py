@@ -0,0 +1,42 @@
+import sys
+import os
+import time
+import ir_datasets
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.tokenizers import BM25Tokenizer
+
+# BM25Tokenizer 기본 모드와 fast 모드의 처리량(tokens/sec) 비교
+# wikir 문서 전체(또는 NUM_DOCS개)에 대해 두 모드의 토큰이 같은지도 확인
+def main():
+    DATASET_ID = "wikir/en1k/training"
+    NUM_DOCS = None # None이면 전체 문서
+    NUM_QUERIES = 1000
+
+    dataset = ir_datasets.load(DATASET_ID)
+    documents = [doc.text for doc in islice(dataset.docs_iter(), NUM_DOCS)]
+    queries = [query.text for query in islice(dataset.queries_iter(), NUM_QUERIES)]
+
+    default_tokenizer = BM25Tokenizer()
+    fast_tokenizer = BM25Tokenizer(fast=True)
+
+    for name, texts in [("문서", documents), ("쿼리", queries)]:
+        print(f"=== {name} {len(texts)}개 ===")
+        outputs = {}
+        for mode, tokenizer in [("default", default_tokenizer), ("fast", fast_tokenizer)]:
+            start = time.perf_counter()
+            outputs[mode] = [tokenizer.tokenize(text) for text in texts]
+            elapsed = time.perf_counter() - start
+
+            num_tokens = sum(len(tokens) for tokens in outputs[mode])
+            print(f"{mode:>8}: {elapsed:8.2f}s, {num_tokens / elapsed:12,.0f} tokens/sec")
+
+        mismatches = sum(a != b for a, b in zip(outputs["default"], outputs["fast"]))
+        print(f"토큰이 다른 텍스트: {mismatches}개")
+
+    stem_cache = fast_tokenizer._stem.cache_info()
+    print(f"stem cache: hits={stem_cache.hits}, misses={stem_cache.misses}, size={stem_cache.currsize}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import sys
+import os
+import time
+import ir_datasets
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.search_engine import SearchEngine
+
+# 전체 점수 계산과 WAND / Block-Max WAND를 같은 쿼리로 비교
+# 쿼리마다 계산한 posting 수와 검색 시간을 출력
+def main():
+    DATASET_ID = "wikir/en1k/training"
+    NUM_QUERIES = 200
+    TOP_K = 10
+    KERNELS = ["numpy", "wand", "bmw"]
+
+    engine = SearchEngine(index_path="data/index")
+    if not engine.inverted_index.load(engine.index_path):
+        print("인덱스 로드 실패")
+        return
+
+    dataset = ir_datasets.load(DATASET_ID)
+    queries = [query.text for query in islice(dataset.queries_iter(), NUM_QUERIES)]
+
+    totals = {kernel: {"postings": 0, "time": 0.0} for kernel in KERNELS}
+    mismatches = 0
+
+    for q_text in queries:
+        results = {}
+        for kernel in KERNELS:
+            engine.bm25_kernel = kernel
+            stats = {}
+            start = time.perf_counter()
+            results[kernel] = engine.search_bm25(q_text, top_k=TOP_K, stats=stats)
+            totals[kernel]["time"] += time.perf_counter() - start
+            totals[kernel]["postings"] += stats.get("postings_evaluated", 0)
+
+        # 결과가 전체 점수 계산과 같아야 함
+        if any(results[kernel] != results["numpy"] for kernel in KERNELS):
+            mismatches += 1
+
+    print(f"쿼리 {len(queries)}개, top-{TOP_K}")
+    baseline = max(totals["numpy"]["postings"], 1)
+    for kernel in KERNELS:
+        postings = totals[kernel]["postings"]
+        print(
+            f"{kernel:>6}: 평균 posting {postings / len(queries):10.1f} "
+            f"({postings / baseline * 100:5.1f}%), 평균 시간 {totals[kernel]['time'] / len(queries) * 1000:8.2f}ms"
+        )
+    print(f"결과 불일치 쿼리: {mismatches}")
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ def main():
     index = InvertedIndex()
     
     # 인덱스 로드 시도
-    success = index.load("data/index.pkl")
+    success = index.load("data/index")
     if not success:
         print("에러: 인덱스 파일을 로드하는데 실패했습니다.")
         return
@@ -18,6 +18,8 @@ def main():
     print(f"총 문서 수: {index.doc_count}")
     print(f"저장된 Term 개수: {len(index.index)}")
     print(f"평균 문서 길이: {index.avg_doc_len:.2f}")
+    print(f"Posting 개수: {len(index.index.docs)}")
+    print(f"Postings 메모리: {index.index.nbytes / 1024 ** 2:.1f} MB")
 
     # 검색 테스트
     sample_term = "university"
@@ -33,13 +35,15 @@ def main():
     print(f"검색어 변환: '{sample_term}' -> '{target_term}'")
 
     if target_term in index.index:
-        postings = index.index[target_term]
-        print(f"'{target_term}' 단어가 {len(postings)}개의 문서에서 발견되었습니다.")
+        # 배열 기반 postings에서 바로 읽음
+        docs, tfs = index.index.postings(target_term)
+        print(f"'{target_term}' 단어가 {len(docs)}개의 문서에서 발견되었습니다.")
         
         # 첫 번째 문서의 위치 정보 출력 예시
-        first_doc = list(postings.keys())[0]
+        first_doc = int(docs[0])
+        positions = index.index.positions_of(target_term, first_doc)
 
-        print(f"문서 {first_doc} -> 위치 정보 {postings[first_doc]}")
+        print(f"문서 {index.doc_ids[first_doc]} -> TF {tfs[0]}, 위치 정보 {positions.tolist()}")
     else:
         print(f"경고: '{sample_term}' 단어를 찾을 수 없습니다.")
 
@@ -6,10 +6,11 @@ from tqdm import tqdm
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.core.search_engine import SearchEngine
+from src.core.trec_run import write_trec_run
 
 def main():
     # 엔진 및 데이터셋 로드
-    engine = SearchEngine(index_path="data/index.pkl", splade_index_path="data/splade_index")
+    engine = SearchEngine(index_path="data/index", splade_index_path="data/splade_index")
     print("인덱스 로딩 중...")
     if not engine.load():
         print("인덱스 로드 실패")
@@ -30,20 +31,33 @@ def main():
         queries[query.query_id] = query.text
     
     # 실제 평가 실행
+    # BATCH_SIZE개의 쿼리를 한 번에 검색 (SPLADE는 ENCODE_BATCH_SIZE개씩 인코딩, BM25는 NUM_WORKERS개 프로세스에서 계산)
+    BATCH_SIZE = 1024
+    ENCODE_BATCH_SIZE = 64
+    NUM_WORKERS = os.cpu_count() or 1
+    # 검색 결과를 TREC run 파일로 저장 (scripts/score_run.py로 다시 검색하지 않고 평가 가능)
+    RUN_PATH = "data/runs/hybrid.trec"
+
     run = {}
-    target_query_ids = set(qrels.keys())
+    target_queries = [(q_id, q_text) for q_id, q_text in queries.items() if q_id in qrels]
     
-    print(f"총 {len(target_query_ids)}개의 쿼리에 대해 평가를 진행합니다.")
+    print(f"총 {len(target_queries)}개의 쿼리에 대해 평가를 진행합니다.")
     
-    for q_id, q_text in tqdm(queries.items(), desc="검색 중"):
-        if q_id not in target_query_ids:
-            continue
+    ranked = {}
+    for i in tqdm(range(0, len(target_queries), BATCH_SIZE), desc="검색 중"):
+        batch = target_queries[i:i + BATCH_SIZE]
+        results = engine.hybrid_search_batch(
+            [q_text for _, q_text in batch], top_k=1000, candidates_k=1000,
+            num_workers=NUM_WORKERS, encode_batch_size=ENCODE_BATCH_SIZE,
+        )
+        for (q_id, _), q_results in zip(batch, results):
+            ranked[q_id] = q_results
+            run[q_id] = {doc_id: score for doc_id, score in q_results}
 
-        results = engine.hybrid_search(q_text, top_k=1000, candidates_k=1000)
-        
-        run[q_id] = {}
-        for doc_id, score in results:
-            run[q_id][doc_id] = score
+    # BM25 프로세스 풀은 batch마다 다시 만들지 않고 재사용하다가 여기서 정리
+    engine.close()
+    write_trec_run(RUN_PATH, ranked, tag="hybrid")
+    print(f"run 파일 저장: {RUN_PATH}")
 
     # 평가 지표
     evaluator = pytrec_eval.RelevanceEvaluator(
@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+import asyncio
+import httpx
+import ir_datasets
+import numpy as np
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 실행 중인 웹 서버(main.py)에 동시에 검색 요청을 보내는 부하 테스트
+# - 검색 처리량, 지연 시간(p50/p99), 503 응답 수
+# - 검색 중에 보낸 정적 파일 요청의 지연 시간 (검색이 event loop를 막으면 검색 시간만큼 늘어남)
+# - 서버의 /stats에서 검색 대기 시간
+async def main():
+    BASE_URL = "http://127.0.0.1:8005"
+    DATASET_ID = "wikir/en1k/training"
+    CONCURRENCY = [1, 8, 32]
+    NUM_REQUESTS = 200
+    STATIC_PATH = "/static/css/style.css"
+
+    dataset = ir_datasets.load(DATASET_ID)
+    queries = [query.text for query in islice(dataset.queries_iter(), NUM_REQUESTS)]
+
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60.0) as client:
+        print(f"{'clients':>8} {'req/sec':>8} {'p50(ms)':>9} {'p99(ms)':>9} {'503':>5} {'static p99(ms)':>15}")
+        for concurrency in CONCURRENCY:
+            pending = iter(queries)
+            latencies, static_latencies = [], []
+            rejected = 0
+            done = False
+
+            async def search_client():
+                nonlocal rejected
+                for q_text in pending:
+                    start = time.perf_counter()
+                    response = await client.get("/search", params={"q": q_text})
+                    latencies.append(time.perf_counter() - start)
+                    rejected += response.status_code == 503
+
+            async def static_client():
+                while not done:
+                    start = time.perf_counter()
+                    await client.get(STATIC_PATH)
+                    static_latencies.append(time.perf_counter() - start)
+                    await asyncio.sleep(0.05)
+
+            static_task = asyncio.create_task(static_client())
+            start = time.perf_counter()
+            await asyncio.gather(*[search_client() for _ in range(concurrency)])
+            elapsed = time.perf_counter() - start
+            done = True
+            await static_task
+
+            print(f"{concurrency:>8} {len(latencies) / elapsed:>8.1f} {np.percentile(latencies, 50) * 1000:>9.1f} "
+                  f"{np.percentile(latencies, 99) * 1000:>9.1f} {rejected:>5} {np.percentile(static_latencies, 99) * 1000:>15.1f}")
+
+        stats = (await client.get("/stats")).json()["search_pool"]
+        print(f"검색 대기 시간: p50 {stats['queue_wait_p50_ms']:.1f}ms, p99 {stats['queue_wait_p99_ms']:.1f}ms, 거절 {stats['rejected']}개")
+
+if __name__ == "__main__":
+    asyncio.run(main())
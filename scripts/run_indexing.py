@@ -1,61 +1,77 @@
 import sys
 import os
-import json
 import time
+import resource
+from itertools import chain, tee
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import ir_datasets
 from src.core.search_engine import SearchEngine
+from src.core.document_source import iter_documents
+from src.core.doc_store import DocStoreWriter
+
+def peak_rss_mb() -> float:
+    # 이 프로세스와 worker 프로세스 중 가장 큰 최대 RSS (Linux에서 ru_maxrss 단위는 KB)
+    peak = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    return peak / 1024
 
 def main():
     print("=== 인덱싱 프로세스 시작 ===")
     start_time = time.time()
     
     # 서치 엔진 초기화
-    engine = SearchEngine(index_path="data/index.pkl")
+    engine = SearchEngine(index_path="data/index", fast_tokenizer=True)
     
+    # 확장된 문서(JSON 또는 JSONL)가 있으면 사용하고, 없으면 원본 ir_datasets 사용
     EXPANDED_DOCS_PATH = "data/expanded_docs.json"
+    # 검색 결과에 보여줄 원문 저장소 (웹 서버가 mmap으로 열어서 사용)
+    DOC_STORE_PATH = "data/doc_store"
     dataset_id = "wikir/en1k/training"
-    documents = []
+    # 토큰화/인덱스 구축에 사용할 프로세스 수 (1이면 한 프로세스에서 순서대로 구축)
+    NUM_WORKERS = os.cpu_count() or 1
     titles_map = {}
 
-    # 확장된 문서(JSON)가 있는지 먼저 확인
-    if os.path.exists(EXPANDED_DOCS_PATH):
-        with open(EXPANDED_DOCS_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+    if not os.path.exists(EXPANDED_DOCS_PATH):
+        print("원본 데이터셋 사용")
 
-        for item in data:
-            doc_id = item['doc_id']
-            text = item.get('text', item.get('original_text', ''))
-            title = item.get('title', '')
+    doc_store = DocStoreWriter(DOC_STORE_PATH)
+    tokenizer = engine.inverted_index.tokenizer
 
+    def documents():
+        # 문서를 하나씩 읽으면서 인덱스에 넣을 텍스트를 만듦 (제목 목록만 따로 모아두고, 원문은 문서 저장소에 씀)
+        # 문서 저장소에는 확장(doc2query) 전 원문을 저장 (생성된 쿼리는 인덱싱에만 사용하고 사용자에게 보여주지 않음)
+        # snippet 구간을 고를 때 사용할 토큰 위치 -> 원문 위치 정보는 문서마다 (title, 원문) 순서로 worker 프로세스에서 계산
+        raw_documents, offset_documents = tee(iter_documents(EXPANDED_DOCS_PATH, dataset_id, include_original=True))
+        offsets = tokenizer.token_offsets_batch(
+            chain.from_iterable((title, original_text) for _, _, title, original_text in offset_documents), num_workers=NUM_WORKERS,
+        )
+        for count, (doc_id, text, title, original_text) in enumerate(raw_documents, start=1):
+            title_offsets, text_offsets = next(offsets), next(offsets)
             indexed_text = text
+            token_base = 0
             if title:
                 # title을 두 번 넣음
                 # 키워드가 title에서 매칭되면 원하는 문서일 가능성이 큼
                 indexed_text = f"{title} {title} {text}"
-            
-            documents.append((doc_id, indexed_text))
-            if title:
                 titles_map[doc_id] = title
+                token_base = 2 * len(title_offsets)
+
+            doc_store.add(doc_id, original_text, text_offsets, token_base)
+
+            if count % 10000 == 0:
+                print(f"{count}개의 문서를 읽었습니다. (최대 RSS: {peak_rss_mb():.0f}MB)")
+            yield doc_id, indexed_text
     
-    # Doc2Query에서 생성된 JSON문서가 없으면 원본 ir_datasets 사용
-    else:
-        print("원본 데이터셋 사용")
-        dataset = ir_datasets.load(dataset_id)
-        
-        for doc in dataset.docs_iter():
-            documents.append((doc.doc_id, doc.text))
-            if len(documents) % 10000 == 0:
-                print(f"{len(documents)}개의 문서를 읽었습니다.")
-    
-    print("인덱스 구축 중...")
-    engine.build_index_from_data(documents)
+    print(f"인덱스 구축 중... (프로세스 {NUM_WORKERS}개)")
+    engine.build_index_from_data(documents(), num_workers=NUM_WORKERS)
     engine.titles = titles_map
+    doc_store.close()
+
+    # 엔진의 k1, b로 BM25 impact를 미리 계산 (SearchEngine(bm25_kernel="impact")에서 사용)
+    engine.inverted_index.build_impacts(engine.k1, engine.b)
     
     engine.save()
     
     elapsed = time.time() - start_time
-    print(f"=== 인덱싱 완료. 소요 시간: {elapsed:.2f}초 ===")
+    print(f"=== 인덱싱 완료. 소요 시간: {elapsed:.2f}초, 최대 RSS: {peak_rss_mb():.0f}MB ===")
 
 if __name__ == "__main__":
     main()
@@ -1,15 +1,20 @@
 import sys
 import os
-import json
 import time
+import resource
 from tqdm import tqdm
-from typing import List, Tuple
-import ir_datasets
+from itertools import islice
+from typing import Iterator, List, Tuple
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.core.splade_model import SpladeModel
 from src.core.splade_index import SpladeIndex
+from src.core.document_source import iter_documents
+
+def peak_rss_mb() -> float:
+    # 프로세스의 최대 RSS (Linux에서 ru_maxrss 단위는 KB)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 
 def main():
     print("=== SPLADE 인덱싱 프로세스 시작 ===")
@@ -19,72 +24,63 @@ def main():
     INDEX_PATH = "data/splade_index"
     BATCH_SIZE = 32
     DATASET_ID = "wikir/en1k/training"
+    # 빌드 버퍼의 최대 크기 (이 크기를 넘으면 정렬된 segment를 디스크에 기록)
+    MEMORY_BUDGET = 1 << 30
     
     model = SpladeModel() 
-    index = SpladeIndex()
-    documents: List[Tuple[str, str]] = []
-
-    # 데이터 로딩 및 처리
+    index = SpladeIndex(memory_budget=MEMORY_BUDGET)
     if os.path.exists(DATA_PATH):
         print(f"확장된 데이터셋 로드 중: {DATA_PATH}")
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            if isinstance(data, list):
-                for item in data:
-                    doc_id = item.get('id', str(item.get('doc_id')))
-                    text = item.get('text', item.get('original_text', ''))
-                    title = item.get('title', '')
-                    
-                    if title:
-                        text = f"{title} {text}"
-                        
-                    documents.append((doc_id, text))
-            
-            elif isinstance(data, dict):
-                for doc_id, text in data.items():
-                    documents.append((doc_id, text))
-                    
     else:
         print(f"확장된 문서가 없습니다. 원본 데이터셋({DATASET_ID})을 사용합니다.")
-        try:
-            dataset = ir_datasets.load(DATASET_ID)
-            for doc in dataset.docs_iter():
-                documents.append((doc.doc_id, doc.text))
-                if len(documents) % 10000 == 0:
-                    print(f"{len(documents)}개의 문서를 읽었습니다.")
-        except Exception as e:
-            print(f"데이터셋 로드 실패: {e}")
-            return
+
+    def iter_texts() -> Iterator[Tuple[str, str]]:
+        for doc_id, text, title in iter_documents(DATA_PATH, DATASET_ID):
+            if title:
+                text = f"{title} {text}"
+            yield doc_id, text
+
+    documents = iter_texts()
 
     # 배치 처리 루프
-    total_docs = len(documents)
-    print(f"인덱싱 시작 (총 {total_docs}개 문서, 배치 크기: {BATCH_SIZE})")
-    
-    for i in tqdm(range(0, total_docs, BATCH_SIZE), desc="Indexing"):
-        batch_docs = documents[i:i + BATCH_SIZE]
-        
-        batch_ids = [doc[0] for doc in batch_docs]
-        batch_texts = [doc[1] for doc in batch_docs]
-        
-        try:
-            sparse_vectors = model.encode_batch(batch_texts, batch_size=BATCH_SIZE)
-            
-            index.add_batch(
-                batch_ids, 
-                sparse_vectors['indices'], 
-                sparse_vectors['values']
-            )
-        except Exception as e:
-            print(f"배치 처리 중 오류 발생 (Index {i}): {e}")
-            continue
+    print(f"인덱싱 시작 (배치 크기: {BATCH_SIZE}, 버퍼 크기: {MEMORY_BUDGET / 1024 ** 2:.0f}MB)")
+    total_docs = 0
+
+    with tqdm(desc="Indexing", unit="docs") as progress:
+        while True:
+            try:
+                batch_docs: List[Tuple[str, str]] = list(islice(documents, BATCH_SIZE))
+            except Exception as e:
+                print(f"데이터셋 로드 실패: {e}")
+                return
+            if not batch_docs:
+                break
+
+            batch_ids = [doc[0] for doc in batch_docs]
+            batch_texts = [doc[1] for doc in batch_docs]
+
+            try:
+                sparse_vectors = model.encode_batch(batch_texts, batch_size=BATCH_SIZE)
+
+                index.add_batch(
+                    batch_ids,
+                    sparse_vectors['indices'],
+                    sparse_vectors['values']
+                )
+            except Exception as e:
+                print(f"배치 처리 중 오류 발생 (Index {total_docs}): {e}")
+                continue
+            finally:
+                total_docs += len(batch_docs)
+                progress.update(len(batch_docs))
+                progress.set_postfix(rss=f"{peak_rss_mb():.0f}MB")
 
-    # 빌드 및 저장
-    index.build()
-    index.save(INDEX_PATH)
+    # 빌드 및 저장 (segment를 합치면서 INDEX_PATH에 바로 기록)
+    print(f"총 {total_docs}개 문서 빌드 중")
+    index.build(INDEX_PATH)
     
     elapsed = time.time() - start_time
-    print(f"=== SPLADE 인덱싱 완료. 소요 시간: {elapsed:.2f}초 ===")
+    print(f"=== SPLADE 인덱싱 완료. 소요 시간: {elapsed:.2f}초, 최대 RSS: {peak_rss_mb():.0f}MB ===")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,38 @@
+import sys
+import os
+import pytrec_eval
+import ir_datasets
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.trec_run import read_trec_run
+
+# evaluate.py / evaluate_bm25.py가 저장한 TREC run 파일을 다시 검색하지 않고 평가
+def main():
+    RUN_PATHS = ["data/runs/hybrid.trec", "data/runs/bm25.trec"]
+    MEASURES = ['map', 'ndcg', 'P_10', 'recall_100', 'recall_1000']
+    dataset_id = "wikir/en1k/training"
+
+    dataset = ir_datasets.load(dataset_id)
+    qrels = {}
+    for qrel in dataset.qrels_iter():
+        qrels.setdefault(qrel.query_id, {})[qrel.doc_id] = qrel.relevance
+
+    evaluator = pytrec_eval.RelevanceEvaluator(qrels, set(MEASURES))
+    for run_path in RUN_PATHS:
+        if not os.path.exists(run_path):
+            print(f"{run_path}: 파일이 없습니다.")
+            continue
+
+        metrics = evaluator.evaluate(read_trec_run(run_path))
+        count = len(metrics)
+
+        print("\n" + "="*30)
+        print(f"  {run_path}")
+        print("="*30)
+        for measure in MEASURES:
+            mean = sum(scores.get(measure, 0.0) for scores in metrics.values()) / count if count else 0.0
+            print(f"{measure + ':':<16}{mean:.4f}")
+        print("="*30)
+
+if __name__ == "__main__":
+    main()
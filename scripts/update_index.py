@@ -0,0 +1,59 @@
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.core.search_engine import SearchEngine
+from src.core.document_source import iter_documents
+from src.core.doc_store import DocStoreWriter, compact_doc_store, new_segment_path
+
+# 전체 인덱스를 다시 만들지 않고 문서를 추가/수정/삭제
+# - ADDED_DOCS_PATH의 문서는 새 segment로 추가 (이미 있는 doc_id는 새 내용으로 교체)
+# - DELETED_IDS_PATH의 doc_id(한 줄에 하나)는 tombstone으로 표시
+# - segment 수가 MAX_SEGMENTS를 넘으면 하나로 합침 (문서 저장소의 segment와 삭제된 문서도 함께 정리)
+def main():
+    ADDED_DOCS_PATH = "data/added_docs.jsonl"
+    DELETED_IDS_PATH = "data/deleted_ids.txt"
+    DOC_STORE_PATH = "data/doc_store"
+    MAX_SEGMENTS = 8
+
+    start_time = time.time()
+    engine = SearchEngine(index_path="data/index", splade_index_path="data/splade_index", fast_tokenizer=True)
+    if not engine.load():
+        print("인덱스 로드 실패")
+        return
+
+    if os.path.exists(DELETED_IDS_PATH):
+        with open(DELETED_IDS_PATH, 'r', encoding='utf-8') as f:
+            doc_ids = [line.strip() for line in f if line.strip()]
+        print(f"{engine.delete_documents(doc_ids)}개의 문서를 삭제했습니다.")
+
+    if os.path.exists(ADDED_DOCS_PATH):
+        documents = []
+        titles = dict(engine.titles)
+        # 원문은 문서 저장소의 새 segment에 저장 (같은 doc_id면 새 원문을 사용)
+        tokenizer = engine.inverted_index.tokenizer
+        with DocStoreWriter(new_segment_path(DOC_STORE_PATH)) as doc_store:
+            for doc_id, text, title, original_text in iter_documents(ADDED_DOCS_PATH, include_original=True):
+                # run_indexing.py와 같은 방식으로 title을 두 번 넣고, 문서 저장소에는 확장 전 원문을 저장
+                documents.append((doc_id, f"{title} {title} {text}" if title else text))
+                token_base = 2 * len(tokenizer.token_offsets(title)) if title else 0
+                doc_store.add(doc_id, original_text, tokenizer.token_offsets(original_text), token_base)
+                if title:
+                    titles[doc_id] = title
+        engine.add_documents(documents)
+        engine.titles = titles
+        print(f"{len(documents)}개의 문서를 새 segment로 추가했습니다.")
+
+    merged = len(engine.bm25_segments) > MAX_SEGMENTS
+    if merged:
+        print(f"segment {len(engine.bm25_segments)}개를 합치는 중...")
+        engine.merge_segments()
+
+    engine.save()
+    if merged:
+        # 문서 저장소는 실행마다 segment가 하나씩 생기므로 인덱스를 합칠 때 같이 합침
+        compact_doc_store(DOC_STORE_PATH, engine.inverted_index.doc_ids)
+    print(f"=== 업데이트 완료. segment {len(engine.bm25_segments)}개, 소요 시간: {time.time() - start_time:.2f}초 ===")
+
+if __name__ == "__main__":
+    main()
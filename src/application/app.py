@@ -1,90 +1,95 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic import BaseModel
+from typing import List, Optional
 from src.core.search_engine import SearchEngine
+from src.core.doc_store import DocStore
+from src.core.snippets import highlight_text, make_snippet
+from src.application.search_pool import OverloadedError, SearchPool
 import contextlib
-import ir_datasets
 import time
 import os
-import re
 
 # 전역 인스턴스
 engine: SearchEngine = None
-DOC_STORE = {} # {doc_id: text}
+# 문서 원문 저장소 (scripts/run_indexing.py가 만든 파일을 mmap으로 열어서 필요한 문서만 읽음)
+DOC_STORE_PATH = "data/doc_store"
+doc_store = DocStore()
+
+# 검색 결과 cache (같은 쿼리의 반복 요청/다음 페이지는 다시 검색하지 않음)
+RESULT_CACHE_SIZE = 4096
+RESULT_CACHE_TTL = 600.0 # 초
+
+# SPLADE 쿼리 벡터 cache (재시작해도 유지하고, 쿼리 로그(한 줄에 쿼리 하나)로 미리 채움)
+QUERY_CACHE_SIZE = 10000
+QUERY_CACHE_PATH = "data/query_cache"
+QUERY_LOG_PATH = "data/query_log.txt"
+
+# 동시에 들어온 쿼리 인코딩을 최대 QUERY_BATCH_SIZE개, QUERY_BATCH_WAIT초 동안 모아서 처리
+QUERY_BATCH_SIZE = 16
+QUERY_BATCH_WAIT = 0.002 # 초
+
+# 검색은 event loop 밖의 worker thread에서 실행 (정적 파일 등 다른 요청이 막히지 않도록)
+# 동시에 SEARCH_WORKERS개까지 실행하고 SEARCH_QUEUE_DEPTH개까지 대기, 그 이상은 503으로 응답
+SEARCH_WORKERS = 8
+SEARCH_QUEUE_DEPTH = 64
+search_pool = SearchPool(max_workers=SEARCH_WORKERS, max_queue=SEARCH_QUEUE_DEPTH)
+
+# JSON API에서 fields 파라미터로 고를 수 있는 필드 (snippet은 문서를 읽어야 하므로 기본값에서 제외)
+API_FIELDS = ("doc_id", "score", "title", "snippet")
+DEFAULT_API_FIELDS = "doc_id,score,title"
+MAX_BATCH_QUERIES = 256
 
 # 현재 파일의 디렉토리 절대 경로
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
-# 불용어(stopwords) 목록 - 하이라이트에서 제외
-STOPWORDS = {
-    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your',
-    'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she',
-    'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their',
-    'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that',
-    'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-    'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an',
-    'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 'while', 'of',
-    'at', 'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through',
-    'during', 'before', 'after', 'above', 'below', 'to', 'from', 'up', 'down',
-    'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then',
-    'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'each',
-    'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only',
-    'own', 'same', 'so', 'than', 'too', 'very', 's', 't', 'can', 'will', 'just',
-    'don', 'should', 'now', 'want', 'would', 'could'
-}
-
-
-def highlight_text(text: str, query: str) -> str:
-    if not query:
-        return text
-        
-    terms = query.lower().split()
-    meaningful_terms = [t for t in terms if t not in STOPWORDS and len(t) > 2]
-    
-    if not meaningful_terms:
-        return text
-    
-    for term in meaningful_terms:
-        escaped_term = re.escape(term)
-        pattern = re.compile(rf'\b({escaped_term})\b', re.IGNORECASE)
-        text = pattern.sub(r"<mark>\1</mark>", text)
-        
-    return text
-
 # 수명 주기 관리를 위한 함수
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
     # init(초기화)
-    global engine
+    # 로드에 실패한 engine / doc_store는 None으로 두고, 사용하는 API는 503으로 응답
+    global engine, doc_store
     
     print("엔진 초기화중...")
-    engine = SearchEngine(index_path="data/index.pkl")
+    engine = SearchEngine(index_path="data/index", result_cache_size=RESULT_CACHE_SIZE, result_cache_ttl=RESULT_CACHE_TTL, query_cache_size=QUERY_CACHE_SIZE, query_batch_size=QUERY_BATCH_SIZE, query_batch_wait=QUERY_BATCH_WAIT, parallel_retrieval=True)
     
-    if not engine.load():
-        print("인덱스 로드 실패. 'scripts/run_indexing.py'를 먼저 실행해주세요.")
+    if not doc_store.load(DOC_STORE_PATH):
+        print("문서 저장소 로드 실패. 'scripts/run_indexing.py'를 먼저 실행해주세요.")
+        doc_store = None
     else:
-        print("인덱스 로드 성공.")
-
-    print("문서를 메모리에 로드중...")
-    start_time = time.time()
-    dataset = ir_datasets.load("wikir/en1k/training")
+        print(f"문서 저장소 로드 성공: {len(doc_store)}개")
 
-    for doc in dataset.docs_iter():
-        DOC_STORE[doc.doc_id] = doc.text
-    print(f"문서 로드 완료: {len(DOC_STORE)}, {time.time() - start_time:.2f}초")
+    if not engine.load():
+        print("인덱스 로드 실패. 'scripts/run_indexing.py'를 먼저 실행해주세요.")
+        engine = None
+        yield
+        search_pool.shutdown()
+        return
+    print("인덱스 로드 성공.")
     
     print("SPLADE 모델 로딩 중...")
     engine.load_splade_model()
     engine.hybrid_search("warm up!!", top_k=100)
     print("모델 로딩 완료.")
 
+    if engine.query_cache.load(QUERY_CACHE_PATH):
+        print(f"쿼리 벡터 cache 로드: {len(engine.query_cache)}개")
+    if os.path.exists(QUERY_LOG_PATH):
+        start_time = time.time()
+        with open(QUERY_LOG_PATH, 'r', encoding='utf-8') as f:
+            count = engine.query_cache.warm_up((line.strip() for line in f if line.strip()), engine.splade_model)
+        print(f"쿼리 로그에서 {count}개의 쿼리를 미리 인코딩했습니다. {time.time() - start_time:.2f}초")
+
     yield
 
-    # 종료
+    # 종료 (실행 중인 검색이 끝날 때까지 기다린 뒤 engine을 닫음)
+    search_pool.shutdown()
+    engine.query_cache.save(QUERY_CACHE_PATH)
+    engine.close()
     engine = None
-    DOC_STORE.clear()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -99,10 +104,135 @@ templates = Jinja2Templates(directory=templates_dir)
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse(
+        request,
         "index.html",
         {"request": request}
     )
 
+def require_engine() -> SearchEngine:
+    # 인덱스 로드에 실패했으면 503
+    if engine is None:
+        raise HTTPException(status_code=503, detail="검색 인덱스가 로드되지 않았습니다.")
+    return engine
+
+def require_doc_store() -> DocStore:
+    # 문서 저장소 로드에 실패했으면 503
+    if doc_store is None:
+        raise HTTPException(status_code=503, detail="문서 저장소가 로드되지 않았습니다.")
+    return doc_store
+
+@app.get("/stats")
+async def stats():
+    # cache 적중률 확인용
+    require_engine()
+    return {
+        "result_cache": engine.result_cache.stats(),
+        "query_cache": engine.query_cache.stats(),
+        "search_pool": search_pool.stats(),
+    }
+
+def result_snippet(q: str, doc_id: str) -> Optional[str]:
+    # 결과 문서의 snippet (문서 저장소에 없으면 None)
+    # 원문은 쿼리 단어가 본문에 있는 문서만 읽고, 나머지는 저장된 preview를 사용
+    if doc_store is None:
+        return None
+    fields = doc_store.snippet_fields(doc_id)
+    if fields is None:
+        return None
+    preview, anchors, token_base, num_tokens = fields
+    positions = engine.term_positions(q, doc_id)
+    if any(len(term_positions) for term_positions in positions):
+        return make_snippet(doc_store[doc_id], positions, anchors, token_base, num_tokens=num_tokens)
+    return preview
+
+def search_page(q: str, limit: int, offset: int) -> list:
+    # 검색 + 결과 페이지에 보여줄 항목 생성 (worker thread에서 실행)
+    results = []
+    results_with_scores = engine.hybrid_search(q, top_k=limit, offset=offset)
+
+    for rank, (doc_id, score) in enumerate(results_with_scores, offset + 1):
+        title = engine.titles.get(doc_id, "제목 없음")
+        snippet = result_snippet(q, doc_id)
+
+        results.append({
+            "rank": rank,
+            "doc_id": doc_id,
+            "title": title,
+            "snippet": highlight_text(snippet if snippet is not None else "Content not found.", q),
+            "score": f"{score:.4f}"
+        })
+    return results
+
+def parse_fields(fields: str) -> List[str]:
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in API_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 필드입니다: {', '.join(unknown)} (사용 가능: {', '.join(API_FIELDS)})")
+    return selected
+
+def api_results(q: str, results_with_scores: list, fields: List[str]) -> List[dict]:
+    # 선택한 필드만 담은 JSON 결과 (worker thread에서 실행)
+    items = []
+    for doc_id, score in results_with_scores:
+        item = {}
+        if "doc_id" in fields:
+            item["doc_id"] = doc_id
+        if "score" in fields:
+            item["score"] = score
+        if "title" in fields:
+            item["title"] = engine.titles.get(doc_id, "")
+        if "snippet" in fields:
+            item["snippet"] = result_snippet(q, doc_id)
+        items.append(item)
+    return items
+
+async def run_search(fn, *args):
+    # 검색 worker pool에서 실행 (자리가 없으면 503)
+    try:
+        return await search_pool.run(fn, *args)
+    except OverloadedError:
+        raise HTTPException(status_code=503, detail="요청이 많아 잠시 후 다시 시도해주세요.", headers={"Retry-After": "1"})
+
+@app.get("/api/search")
+async def api_search(q: str, limit: int = Query(10, ge=1, le=1000), offset: int = Query(0, ge=0), fields: str = DEFAULT_API_FIELDS):
+    require_engine()
+    selected = parse_fields(fields)
+
+    def search_json():
+        return api_results(q, engine.hybrid_search(q, top_k=limit, offset=offset), selected)
+
+    return {"query": q, "results": await run_search(search_json)}
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    limit: int = 10
+    offset: int = 0
+    fields: str = DEFAULT_API_FIELDS
+
+@app.post("/api/search/batch")
+async def api_search_batch(body: BatchSearchRequest):
+    # 여러 쿼리를 한 번에 검색 (SPLADE 인코딩과 BM25 점수 계산을 쿼리들끼리 묶어서 처리)
+    require_engine()
+    if len(body.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"쿼리는 한 번에 {MAX_BATCH_QUERIES}개까지 보낼 수 있습니다.")
+    if not 1 <= body.limit <= 1000 or body.offset < 0:
+        raise HTTPException(status_code=400, detail="limit은 1~1000, offset은 0 이상이어야 합니다.")
+    selected = parse_fields(body.fields)
+
+    def search_json():
+        batch = engine.hybrid_search_batch(body.queries, top_k=body.limit, offset=body.offset)
+        return [{"query": q, "results": api_results(q, results, selected)} for q, results in zip(body.queries, batch)]
+
+    return {"results": await run_search(search_json)}
+
+@app.get("/doc/{doc_id}")
+async def get_document(doc_id: str):
+    # 결과를 클릭했을 때만 원문을 가져옴 (검색 결과 페이지에는 원문을 넣지 않음)
+    text = require_doc_store().get(doc_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
+    return {"doc_id": doc_id, "title": require_engine().titles.get(doc_id, "제목 없음"), "text": text}
+
 @app.get("/search", response_class=HTMLResponse)
 async def search(request: Request, q: str = "", page: int = 1):
     results = []
@@ -113,26 +243,12 @@ async def search(request: Request, q: str = "", page: int = 1):
         start_time = time.time()
         offset = (page - 1) * limit
 
-        results_with_scores = engine.hybrid_search(q, top_k=limit, offset=offset)
-        
-        for rank, (doc_id, score) in enumerate(results_with_scores, offset + 1):
-            text = DOC_STORE.get(doc_id, "Content not found.")
-            title = engine.titles.get(doc_id, "제목 없음")
-            snippet = text[:300] + "..." if len(text) > 300 else text
-            snippet = highlight_text(snippet, q)
-            
-            results.append({
-                "rank": rank,
-                "doc_id": doc_id,
-                "title": title,
-                "snippet": snippet,
-                "full_text": text,
-                "score": f"{score:.4f}"
-            })
+        results = await run_search(search_page, q, limit, offset)
             
         search_time = time.time() - start_time
     
     return templates.TemplateResponse(
+        request,
         "index.html",
         {
             "request": request, 
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+import numpy as np
+
+
+class OverloadedError(RuntimeError):
+    pass
+
+
+# 검색처럼 CPU를 많이 쓰는 동기 함수를 event loop 밖의 worker thread에서 실행
+# - 동시에 실행되는 요청은 최대 max_workers개, 나머지는 최대 max_queue개까지 대기
+# - 그보다 많이 들어오면 OverloadedError (app에서 503으로 응답)
+# - 대기 시간(요청이 들어온 뒤 worker에서 실행되기까지)을 최근 window개까지 기록
+class SearchPool:
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, window: int = 1000):
+        if max_workers <= 0 or max_queue < 0:
+            raise ValueError("max_workers는 1 이상, max_queue는 0 이상이어야 합니다.")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+
+        self._lock = threading.Lock()
+        self.admitted = 0 # 실행 중 + 대기 중
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self._queue_waits = deque(maxlen=window)
+
+    def _try_admit(self) -> bool:
+        with self._lock:
+            if self.admitted >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                return False
+            self.admitted += 1
+            return True
+
+    def _call(self, submitted_at: float, fn: Callable, args: tuple):
+        with self._lock:
+            self._queue_waits.append(time.perf_counter() - submitted_at)
+            self.running += 1
+        try:
+            return fn(*args)
+        finally:
+            # 클라이언트가 연결을 끊어도 실행은 끝까지 되므로, 끝난 시점에 자리를 반환
+            with self._lock:
+                self.running -= 1
+                self.admitted -= 1
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args):
+        if not self._try_admit():
+            raise OverloadedError("검색 요청이 너무 많습니다.")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, time.perf_counter(), fn, args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            waits = np.array(self._queue_waits)
+            return {
+                "running": self.running,
+                "queued": self.admitted - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_p50_ms": float(np.percentile(waits, 50) * 1000) if len(waits) else 0.0,
+                "queue_wait_p99_ms": float(np.percentile(waits, 99) * 1000) if len(waits) else 0.0,
+                "queue_wait_max_ms": float(waits.max() * 1000) if len(waits) else 0.0,
+            }
@@ -0,0 +1,225 @@
+import numpy as np
+from array import array
+from collections.abc import Mapping
+from typing import Dict, List, Tuple, Iterator
+from .storage import StringTable
+
+# finalize() 이후의 읽기 전용 postings 구조
+# dict of dict 대신 연속된 numpy 배열에 저장해서 메모리 사용량을 줄임
+#
+# term_offsets[t] ~ term_offsets[t+1]: term t의 posting 구간
+#   docs[i]: 문서 번호(ordinal), tfs[i]: 해당 문서에서의 빈도
+# position_offsets[i] ~ position_offsets[i+1]: posting i의 포지션 구간
+class CompactPostings:
+    def __init__(
+        self,
+        terms: StringTable,
+        doc_ids: StringTable,
+        term_offsets: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        position_offsets: np.ndarray,
+        positions: np.ndarray,
+    ):
+        # terms는 정렬된 상태여야 함 (term id == 정렬 순서, 이진 탐색으로 찾음)
+        self.terms = terms
+        self.doc_ids = doc_ids
+
+        self.term_offsets = term_offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.position_offsets = position_offsets
+        self.positions = positions
+
+    @classmethod
+    def from_dict(cls, index: Dict[str, Dict[str, List[int]]], doc_ids: List[str]) -> "CompactPostings":
+        # 빌드용 dict 인덱스를 배열 형태로 변환
+        ordinals = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+        terms = sorted(index.keys())
+
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        docs = array('i')
+        tfs = array('i')
+        positions = array('i')
+
+        for t, term in enumerate(terms):
+            # 문서는 추가된 순서대로 들어오므로 ordinal 오름차순이 유지됨
+            for doc_id, doc_positions in index[term].items():
+                docs.append(ordinals[doc_id])
+                tfs.append(len(doc_positions))
+                positions.extend(doc_positions)
+            term_offsets[t + 1] = len(docs)
+
+        tfs = np.frombuffer(tfs, dtype=np.int32).copy()
+        position_offsets = np.zeros(len(tfs) + 1, dtype=np.int64)
+        np.cumsum(tfs, out=position_offsets[1:])
+
+        return cls(
+            StringTable.from_strings(terms),
+            StringTable.from_strings(doc_ids),
+            term_offsets,
+            np.frombuffer(docs, dtype=np.int32).copy(),
+            tfs,
+            position_offsets,
+            np.frombuffer(positions, dtype=np.int32).copy(),
+        )
+
+    def filter_docs(self, keep: np.ndarray) -> "CompactPostings":
+        # keep[문서 번호]가 True인 문서만 남긴 postings (문서 번호는 남은 문서끼리 다시 매김)
+        # 남은 posting이 없는 term은 사전에서도 빠지므로, 남은 문서로 from_dict를 한 결과와 같음
+        keep = np.asarray(keep, dtype=bool)
+        docs = np.asarray(self.docs)
+        tfs = np.asarray(self.tfs)
+        term_offsets = np.asarray(self.term_offsets)
+
+        new_ordinals = np.cumsum(keep) - 1
+        posting_keep = keep[docs]
+        posting_terms = np.repeat(np.arange(len(self.terms)), np.diff(term_offsets))
+        counts = np.bincount(posting_terms[posting_keep], minlength=len(self.terms))
+        live_terms = np.flatnonzero(counts > 0)
+
+        new_term_offsets = np.zeros(len(live_terms) + 1, dtype=np.int64)
+        np.cumsum(counts[live_terms], out=new_term_offsets[1:])
+        new_tfs = tfs[posting_keep]
+        position_offsets = np.zeros(len(new_tfs) + 1, dtype=np.int64)
+        np.cumsum(new_tfs, out=position_offsets[1:])
+
+        return CompactPostings(
+            StringTable.from_strings(self.terms[t] for t in live_terms.tolist()),
+            StringTable.from_strings(self.doc_ids[i] for i in np.flatnonzero(keep).tolist()),
+            new_term_offsets,
+            new_ordinals[docs[posting_keep]].astype(np.int32),
+            new_tfs,
+            position_offsets,
+            np.asarray(self.positions)[np.repeat(posting_keep, tfs)],
+        )
+
+    @classmethod
+    def merge(cls, segments: List["CompactPostings"]) -> "CompactPostings":
+        # 문서를 순서대로 나눠서 만든 segment들을 하나로 합침
+        # segment i의 문서 번호는 앞 segment들의 문서 수만큼 밀려서 이어짐
+        # 전체 문서로 from_dict를 한 결과와 같은 배열이 만들어짐
+        doc_ids = StringTable.from_strings(doc_id for segment in segments for doc_id in segment.doc_ids)
+        terms = sorted(set(term for segment in segments for term in segment.terms))
+        term_ids = {term: t for t, term in enumerate(terms)}
+
+        # segment별 local term id -> 전체 term id
+        global_ids = [np.array([term_ids[term] for term in segment.terms], dtype=np.int64) for segment in segments]
+        seg_dfs = [np.diff(np.asarray(segment.term_offsets)) for segment in segments]
+
+        counts = np.zeros(len(terms), dtype=np.int64)
+        for ids, dfs in zip(global_ids, seg_dfs):
+            counts[ids] += dfs
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=term_offsets[1:])
+        num_postings = int(term_offsets[-1])
+
+        # 1. posting 단위 배열: term마다 segment 순서대로 이어 붙임
+        docs = np.empty(num_postings, dtype=np.int32)
+        tfs = np.empty(num_postings, dtype=np.int32)
+        slots = []
+        written = term_offsets[:-1].copy()
+        doc_base = 0
+        for segment, ids, dfs in zip(segments, global_ids, seg_dfs):
+            # posting마다 (전체 term 시작 위치 + 이미 채운 개수 + term 안에서의 순서)
+            local_terms = np.repeat(np.arange(len(ids)), dfs)
+            rank = np.arange(len(local_terms)) - np.asarray(segment.term_offsets)[local_terms]
+            slot = written[ids[local_terms]] + rank
+
+            docs[slot] = np.asarray(segment.docs) + doc_base
+            tfs[slot] = segment.tfs
+            slots.append(slot)
+
+            written[ids] += dfs
+            doc_base += len(segment.doc_ids)
+
+        position_offsets = np.zeros(num_postings + 1, dtype=np.int64)
+        np.cumsum(tfs, out=position_offsets[1:])
+
+        # 2. 포지션 배열: posting이 옮겨간 자리에 맞춰 포지션 구간을 옮김
+        positions = np.empty(int(position_offsets[-1]), dtype=np.int32)
+        for segment, slot in zip(segments, slots):
+            seg_tfs = np.asarray(segment.tfs)
+            seg_position_offsets = np.asarray(segment.position_offsets)
+            owner = np.repeat(np.arange(len(slot)), seg_tfs)
+            target = position_offsets[slot[owner]] + (np.arange(len(owner)) - seg_position_offsets[owner])
+            positions[target] = segment.positions
+
+        return cls(StringTable.from_strings(terms), doc_ids, term_offsets, docs, tfs, position_offsets, positions)
+
+    def term_id(self, term: str) -> int:
+        return self.terms.index_of(term)
+
+    def df(self, term: str) -> int:
+        t = self.term_id(term)
+        if t < 0:
+            return 0
+        return int(self.term_offsets[t + 1] - self.term_offsets[t])
+
+    def term_range(self, term: str) -> Tuple[int, int]:
+        # term의 posting 구간 [start, end) - postings와 같은 순서로 저장된 배열(impact 등)에 사용
+        t = self.term_id(term)
+        if t < 0:
+            return 0, 0
+        return int(self.term_offsets[t]), int(self.term_offsets[t + 1])
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        # (문서 번호 배열, tf 배열)을 복사 없이 반환
+        start, end = self.term_range(term)
+        return self.docs[start:end], self.tfs[start:end]
+
+    def positions_of(self, term: str, doc_ord: int) -> np.ndarray:
+        # 특정 문서에서 term이 등장한 포지션
+        t = self.term_id(term)
+        if t < 0:
+            return self.positions[:0]
+        start, end = self.term_offsets[t], self.term_offsets[t + 1]
+        i = start + np.searchsorted(self.docs[start:end], doc_ord)
+        if i >= end or self.docs[i] != doc_ord:
+            return self.positions[:0]
+        return self.positions[self.position_offsets[i]:self.position_offsets[i + 1]]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.term_offsets, self.docs, self.tfs, self.position_offsets, self.positions)
+        return sum(a.nbytes for a in arrays) + self.terms.nbytes
+
+    def __contains__(self, term: str) -> bool:
+        return self.term_id(term) >= 0
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __getitem__(self, term: str) -> Dict[str, List[int]]:
+        # 기존 dict 인덱스와 같은 모양({doc_id: [pos, ...]})으로 보여줌
+        # 디버깅/검증용이므로 검색 경로에서는 postings()를 사용할 것
+        t = self.term_id(term)
+        if t < 0:
+            raise KeyError(term)
+        result = {}
+        for i in range(self.term_offsets[t], self.term_offsets[t + 1]):
+            positions = self.positions[self.position_offsets[i]:self.position_offsets[i + 1]]
+            result[self.doc_ids[self.docs[i]]] = positions.tolist()
+        return result
+
+
+# 문서 길이를 doc_id로 조회할 수 있게 해주는 읽기 전용 view
+class DocLengths(Mapping):
+    def __init__(self, doc_ids: StringTable, lengths: np.ndarray):
+        self.doc_ids = doc_ids
+        self.lengths = lengths
+
+    def __getitem__(self, doc_id: str) -> int:
+        doc_ord = self.doc_ids.index_of(doc_id)
+        if doc_ord < 0:
+            raise KeyError(doc_id)
+        return int(self.lengths[doc_ord])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.doc_ids)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
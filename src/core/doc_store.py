@@ -0,0 +1,248 @@
+import os
+import shutil
+import lz4.block
+import numpy as np
+from collections.abc import Mapping
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from .snippets import ANCHOR_STRIDE, make_preview
+from .storage import StringTable, has_header, load_array, read_header, save_array, write_header
+
+# 검색 결과에 보여줄 문서 원문을 디스크에 저장하는 문서 저장소
+# 문서마다 따로 lz4로 압축해서 이어 붙이고, 필요한 문서(페이지당 ~10개)만 풀어서 읽음
+# 배열은 mmap으로 열기 때문에 여러 worker 프로세스가 page cache를 공유함
+#
+# 디렉토리 포맷 (storage.py의 인덱스 디렉토리 포맷)
+#   doc_ids: 문서 id (StringTable, 정렬 순서를 함께 저장해서 이진 탐색)
+#   texts: 압축된 문서를 이어 붙인 blob, 문서 i는 texts[offsets[i]:offsets[i + 1]]
+#   sizes: 압축을 풀었을 때의 크기 (utf-8 bytes)
+#   previews: 문서 앞부분 (StringTable, 쿼리 단어가 본문에 없을 때 압축을 풀지 않고 snippet으로 사용)
+#   anchors: 토큰 anchor_stride개마다 원문에서의 문자 위치, 문서 i는 anchors[anchor_offsets[i]:anchor_offsets[i + 1]]
+#   token_bases: 본문 앞에 붙여서 인덱싱한 토큰(제목 등) 수
+#   token_counts: 저장한 본문의 토큰 수 (인덱싱한 텍스트에서 본문 뒤에 붙은 토큰(생성된 쿼리 등)은 snippet에 사용하지 않음, -1이면 알 수 없음)
+#   segments/NNNN: 나중에 추가된 문서 (같은 doc_id면 나중에 추가된 문서를 사용, compact_doc_store로 하나로 합침)
+COPY_CHUNK_SIZE = 64 << 20
+
+
+class _ArrayFileWriter:
+    # 문서마다 가변 길이 배열을 받아서 임시 파일에 이어 쓰고, close()에서 .npy + offsets로 저장
+    def __init__(self, path: str, name: str, dtype):
+        self.path = path
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self._tmp_path = os.path.join(path, f"{name}.tmp")
+        self._file = open(self._tmp_path, 'wb')
+        self.offsets = [0]
+
+    def append(self, data: bytes):
+        self._file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data) // self.dtype.itemsize)
+
+    def close(self, offsets_name: str = None):
+        self._file.close()
+
+        # 임시 파일을 .npy 배열로 옮김 (전체를 메모리에 올리지 않도록 나눠서 복사)
+        total = self.offsets[-1]
+        if total == 0:
+            save_array(self.path, self.name, np.zeros(0, dtype=self.dtype))
+        else:
+            npy_tmp_path = os.path.join(self.path, f"{self.name}.tmp.npy")
+            array = np.lib.format.open_memmap(npy_tmp_path, mode='w+', dtype=self.dtype, shape=(total,))
+            with open(self._tmp_path, 'rb') as f:
+                position = 0
+                while position < total:
+                    chunk = np.frombuffer(f.read(COPY_CHUNK_SIZE), dtype=self.dtype)
+                    array[position:position + len(chunk)] = chunk
+                    position += len(chunk)
+            array.flush()
+            del array
+            os.replace(npy_tmp_path, os.path.join(self.path, f"{self.name}.npy"))
+        os.remove(self._tmp_path)
+
+        if offsets_name is not None:
+            save_array(self.path, offsets_name, np.array(self.offsets, dtype=np.int64))
+
+    def abort(self):
+        self._file.close()
+
+
+class DocStoreWriter:
+    # 문서를 하나씩 받아서 임시 파일에 바로 씀 (메모리에는 doc_id와 offset만 남음)
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._texts = _ArrayFileWriter(path, "texts", np.uint8)
+        self._previews = _ArrayFileWriter(path, "previews.blob", np.uint8)
+        self._anchors = _ArrayFileWriter(path, "anchors", np.uint32)
+        self._doc_ids = []
+        self._sizes = []
+        self._token_bases = []
+        self._token_counts = []
+
+    def add(self, doc_id: str, text: str, token_offsets: Optional[Sequence[int]] = None, token_base: int = 0):
+        # token_offsets: 인덱싱한 본문 토큰마다 원문에서의 문자 위치 (BM25Tokenizer.token_offsets)
+        # token_base: 본문 앞에 붙여서 인덱싱한 토큰 수 (토큰 위치 - token_base가 본문 토큰 번호)
+        # text는 사용자에게 보여줄 원문 (doc2query로 확장한 문서는 확장 전 본문)
+        raw = text.encode('utf-8')
+        self._texts.append(lz4.block.compress(raw, store_size=False))
+        self._previews.append(make_preview(text).encode('utf-8'))
+        anchors = token_offsets[::ANCHOR_STRIDE] if token_offsets is not None else []
+        self._anchors.append(np.asarray(anchors, dtype=np.uint32).tobytes())
+        self._doc_ids.append(doc_id)
+        self._sizes.append(len(raw))
+        self._token_bases.append(token_base)
+        self._token_counts.append(len(token_offsets) if token_offsets is not None else 0)
+
+    def _copy(self, doc_id: str, part: "_Part", i: int):
+        # 다른 저장소의 문서를 압축을 풀지 않고 그대로 복사
+        self._texts.append(part.texts[part.offsets[i]:part.offsets[i + 1]].tobytes())
+        self._previews.append(part.previews[i].encode('utf-8'))
+        self._anchors.append(np.asarray(part.anchors[part.anchor_offsets[i]:part.anchor_offsets[i + 1]], dtype=np.uint32).tobytes())
+        self._doc_ids.append(doc_id)
+        self._sizes.append(int(part.sizes[i]))
+        self._token_bases.append(int(part.token_bases[i]))
+        self._token_counts.append(int(part.token_counts[i]) if part.token_counts is not None else -1)
+
+    def close(self):
+        self._texts.close("offsets")
+        self._previews.close("previews.offsets")
+        self._anchors.close("anchor_offsets")
+
+        StringTable.from_strings(self._doc_ids).save(self.path, "doc_ids")
+        save_array(self.path, "sizes", np.array(self._sizes, dtype=np.int64))
+        save_array(self.path, "token_bases", np.array(self._token_bases, dtype=np.int32))
+        save_array(self.path, "token_counts", np.array(self._token_counts, dtype=np.int32))
+        write_header(self.path, "doc_store", size=len(self._doc_ids), anchor_stride=ANCHOR_STRIDE)
+
+    def __enter__(self) -> "DocStoreWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for writer in (self._texts, self._previews, self._anchors):
+                writer.abort()
+
+
+def build_doc_store(path: str, documents: Iterable[Tuple[str, str]]):
+    with DocStoreWriter(path) as writer:
+        for doc_id, text in documents:
+            writer.add(doc_id, text)
+
+
+def new_segment_path(path: str) -> str:
+    # 추가 문서를 저장할 다음 segment 디렉토리
+    segments_path = os.path.join(path, "segments")
+    existing = os.listdir(segments_path) if os.path.isdir(segments_path) else []
+    return os.path.join(segments_path, f"{sum(name.isdigit() for name in existing):04d}")
+
+
+def compact_doc_store(path: str, doc_ids: Iterable[str] = None):
+    # segment들을 하나의 저장소로 합침 (같은 doc_id는 가장 최근 문서만 남김)
+    # doc_ids를 주면 그 문서만 남김 (인덱스에서 삭제된 문서 제거)
+    # 새 저장소를 다 쓴 뒤에 디렉토리를 바꾸므로 중간에 실패해도 예전 저장소는 그대로 남음
+    store = DocStore()
+    if not store.load(path):
+        raise ValueError(f"{path}: 문서 저장소를 로드할 수 없습니다.")
+
+    path = path.rstrip(os.sep)
+    tmp_path, old_path = f"{path}.compact", f"{path}.old"
+    for leftover in (tmp_path, old_path):
+        if os.path.exists(leftover):
+            shutil.rmtree(leftover)
+
+    with DocStoreWriter(tmp_path) as writer:
+        for doc_id in (store if doc_ids is None else doc_ids):
+            found = store._find(doc_id)
+            if found is not None:
+                writer._copy(doc_id, *found)
+    del store
+
+    os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path)
+
+
+class _Part:
+    def __init__(self, path: str):
+        header = read_header(path, "doc_store")
+        if header.get("anchor_stride") != ANCHOR_STRIDE:
+            raise ValueError(f"{path}: anchor 간격이 다릅니다. 문서 저장소를 다시 만들어주세요.")
+        self.doc_ids = StringTable.load(path, "doc_ids")
+        self.texts = load_array(path, "texts")
+        self.offsets = load_array(path, "offsets")
+        self.sizes = load_array(path, "sizes")
+        self.previews = StringTable.load(path, "previews")
+        self.anchors = load_array(path, "anchors")
+        self.anchor_offsets = load_array(path, "anchor_offsets")
+        self.token_bases = load_array(path, "token_bases")
+        # token_counts가 없는 예전 저장소는 본문 뒤에 붙은 토큰이 없다고 봄
+        self.token_counts = load_array(path, "token_counts") if os.path.exists(os.path.join(path, "token_counts.npy")) else None
+
+    def text(self, i: int) -> str:
+        compressed = self.texts[self.offsets[i]:self.offsets[i + 1]].tobytes()
+        return lz4.block.decompress(compressed, uncompressed_size=int(self.sizes[i])).decode('utf-8')
+
+
+# doc_id -> 원문 (dict처럼 사용, get(doc_id, 기본값) 지원)
+class DocStore(Mapping):
+    def __init__(self):
+        self._parts: List[_Part] = [] # 나중에 추가된 것부터
+
+    def load(self, path: str) -> bool:
+        if not has_header(path):
+            return False
+
+        parts = [_Part(path)]
+        segments_path = os.path.join(path, "segments")
+        if os.path.isdir(segments_path):
+            for name in sorted(name for name in os.listdir(segments_path) if name.isdigit()):
+                if has_header(os.path.join(segments_path, name)):
+                    parts.append(_Part(os.path.join(segments_path, name)))
+        self._parts = parts[::-1]
+        return True
+
+    @property
+    def num_parts(self) -> int:
+        # 본 저장소 + segment 수
+        return len(self._parts)
+
+    def _find(self, doc_id: str) -> Optional[Tuple[_Part, int]]:
+        for part in self._parts:
+            i = part.doc_ids.index_of(doc_id)
+            if i >= 0:
+                return part, i
+        return None
+
+    def snippet_fields(self, doc_id: str) -> Optional[Tuple[str, np.ndarray, int, Optional[int]]]:
+        # (preview, anchors, token_base, num_tokens) - 문서가 없으면 None
+        found = self._find(doc_id)
+        if found is None:
+            return None
+        part, i = found
+        anchors = part.anchors[part.anchor_offsets[i]:part.anchor_offsets[i + 1]]
+        num_tokens = int(part.token_counts[i]) if part.token_counts is not None else -1
+        return part.previews[i], anchors, int(part.token_bases[i]), num_tokens if num_tokens >= 0 else None
+
+    def __getitem__(self, doc_id: str) -> str:
+        found = self._find(doc_id)
+        if found is None:
+            raise KeyError(doc_id)
+        part, i = found
+        return part.text(i)
+
+    def __contains__(self, doc_id) -> bool:
+        return isinstance(doc_id, str) and self._find(doc_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        seen = set()
+        for part in self._parts:
+            for doc_id in part.doc_ids:
+                if doc_id not in seen:
+                    seen.add(doc_id)
+                    yield doc_id
+
+    def __len__(self) -> int:
+        if len(self._parts) == 1:
+            return len(self._parts[0].doc_ids)
+        return sum(1 for _ in self)
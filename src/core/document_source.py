@@ -0,0 +1,73 @@
+import os
+import json
+import ijson
+from typing import Iterator, Optional, Tuple
+
+# 인덱싱할 문서를 (doc_id, text, title) 형태로 하나씩 읽어오는 iterator들
+# 전체 파일을 json.load로 읽지 않으므로 메모리에는 현재 문서만 올라감
+#
+# 지원하는 형식
+# - JSON 배열: [{"doc_id": ..., "text": ..., "title": ...}, ...] (expand_docs.py의 출력)
+# - JSON 객체: {doc_id: text, ...}
+# - JSONL: 한 줄에 문서 하나 (배열 원소와 같은 형식)
+# - ir_datasets: dataset id로 docs_iter() 사용
+#
+# include_original=True이면 (doc_id, text, title, original_text)를 반환
+# text는 인덱싱할 텍스트(expand_docs.py의 출력이면 생성된 쿼리가 뒤에 붙은 본문)이고,
+# original_text는 사용자에게 보여줄 원문 (확장되지 않은 문서는 text와 같음)
+Document = Tuple[str, str, str]
+
+
+def _from_item(item: dict, include_original: bool = False) -> Document:
+    doc_id = item.get('doc_id', item.get('id'))
+    text = item.get('text', item.get('original_text', ''))
+    title = item.get('title', '')
+    if include_original:
+        return str(doc_id), text or '', title or '', item.get('original_text') or text or ''
+    return str(doc_id), text or '', title or ''
+
+
+def iter_json_documents(path: str, include_original: bool = False) -> Iterator[Document]:
+    with open(path, 'rb') as f:
+        # 최상위가 배열인지 객체인지 첫 글자로 판단
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+
+        if first == b'[':
+            for item in ijson.items(f, 'item'):
+                yield _from_item(item, include_original)
+        elif first == b'{':
+            for doc_id, text in ijson.kvitems(f, ''):
+                yield (doc_id, text, '', text) if include_original else (doc_id, text, '')
+        else:
+            raise ValueError(f"{path}: JSON 배열 또는 객체가 아닙니다.")
+
+
+def iter_jsonl_documents(path: str, include_original: bool = False) -> Iterator[Document]:
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield _from_item(json.loads(line), include_original)
+
+
+def iter_ir_datasets_documents(dataset_id: str, include_original: bool = False) -> Iterator[Document]:
+    import ir_datasets
+
+    dataset = ir_datasets.load(dataset_id)
+    for doc in dataset.docs_iter():
+        title = getattr(doc, 'title', '') or ''
+        yield (doc.doc_id, doc.text, title, doc.text) if include_original else (doc.doc_id, doc.text, title)
+
+
+def iter_documents(path: Optional[str], dataset_id: Optional[str] = None, include_original: bool = False) -> Iterator[Document]:
+    # path가 있으면 확장자로 형식을 골라서 읽고, 없으면 ir_datasets에서 읽음
+    if path and os.path.exists(path):
+        if path.endswith('.jsonl'):
+            return iter_jsonl_documents(path, include_original)
+        return iter_json_documents(path, include_original)
+
+    if dataset_id is None:
+        raise ValueError(f"{path}: 문서 파일이 없고 dataset id도 지정되지 않았습니다.")
+    return iter_ir_datasets_documents(dataset_id, include_original)
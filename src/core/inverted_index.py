@@ -1,14 +1,19 @@
-import pickle
 import os
-from collections import defaultdict
-from typing import List, Dict, Set
+import numpy as np
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 from .tokenizers import BM25Tokenizer
+from .compact_index import CompactPostings, DocLengths
+from .wand import BlockMaxIndex
+from .storage import StringTable, has_header, write_header, read_header, save_array, load_array
 
 # InvertedIndex 객체의 책임
 # 1. 데이터를 저장
 # 2. 데이터를 제공
 class InvertedIndex:
-    def __init__(self):
+    def __init__(self, fast_tokenizer: bool = False):
         """
         Inverted Index 구조
         dictionary {
@@ -18,59 +23,268 @@ class InvertedIndex:
                 doc_id: [pos1, pos2, ...]
             }
         }
+
+        finalize() 이후에는 index가 CompactPostings로 바뀜
+        (문서 번호 = 추가된 순서, doc_ids[문서 번호] = doc_id)
         """
         self.index: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
         self.doc_lengths: Dict[str, int] = {}
+        self.doc_ids: List[str] = []
+        self.doc_len_array: np.ndarray = None
         self.doc_count: int = 0
         self.avg_doc_len: float = 0.0
-        self.tokenizer = BM25Tokenizer()
+        self.tokenizer = BM25Tokenizer(fast=fast_tokenizer)
+
+        # 선택 사항: 고정된 (k1, b)로 미리 계산한 posting별 양자화 BM25 가중치
+        self.impacts: np.ndarray = None
+        self.impact_params: Dict[str, float] = None
+
+        # WAND / Block-Max WAND용 block 상한 정보 (finalize()에서 생성)
+        self.block_max: BlockMaxIndex = None
+
+        # 삭제된 문서 표시 (tombstone, 문서 번호 순서의 bool 배열 - 삭제가 없으면 None)
+        # postings에서는 merge() 전까지 지우지 않고 검색할 때 제외함
+        self.deleted: np.ndarray = None
+
+    @property
+    def is_finalized(self) -> bool:
+        return isinstance(self.index, CompactPostings)
+
+    @property
+    def num_deleted(self) -> int:
+        return int(np.count_nonzero(self.deleted)) if self.deleted is not None else 0
+
+    @property
+    def num_live(self) -> int:
+        return self.doc_count - self.num_deleted
 
     def add_document(self, doc_id: str, text: str):
+        if self.is_finalized:
+            raise ValueError("finalize()된 인덱스에는 문서를 추가할 수 없습니다.")
+
         # 문서를 토큰화한 후, 인덱스에 추가
-        tokens = self.tokenizer.tokenize(text)
+        self._add_tokens(doc_id, self.tokenizer.tokenize(text))
+
+    def add_documents(self, documents: Iterable[Tuple[str, str]], batch_size: int = 1000, num_workers: int = 1):
+        # (doc_id, text)를 묶어서 토큰화한 뒤 순서대로 추가 (add_document를 반복한 것과 같은 결과)
+        # documents는 generator여도 되고, 토큰화 중인 batch만 메모리에 올라감
+        if self.is_finalized:
+            raise ValueError("finalize()된 인덱스에는 문서를 추가할 수 없습니다.")
+
+        # 토큰화 결과는 입력 순서대로 나오므로 doc_id는 queue에 넣어두고 순서대로 꺼냄
+        pending_ids = deque()
+
+        def texts():
+            for doc_id, text in documents:
+                pending_ids.append(doc_id)
+                yield text
+
+        for tokens in self.tokenizer.tokenize_batch(texts(), batch_size=batch_size, num_workers=num_workers):
+            self._add_tokens(pending_ids.popleft(), tokens)
+
+    def _add_tokens(self, doc_id: str, tokens: List[str]):
         length = len(tokens)
         
         self.doc_lengths[doc_id] = length
+        self.doc_ids.append(doc_id)
         self.doc_count += 1
         
         # 포지션과 term을 인덱스에 추가
         for pos, term in enumerate(tokens):
             self.index[term][doc_id].append(pos)
 
-    def finalize(self):
+    def delete_document(self, doc_id: str) -> bool:
+        # 문서를 tombstone으로 표시 (삭제된 문서가 있었으면 True)
+        self.finalize()
+        doc_ord = self.doc_ids.index_of(doc_id)
+        if doc_ord < 0 or (self.deleted is not None and self.deleted[doc_ord]):
+            return False
+
+        if self.deleted is None:
+            self.deleted = np.zeros(self.doc_count, dtype=bool)
+        self.deleted[doc_ord] = True
+        return True
+
+    @classmethod
+    def merge(cls, indexes: List["InvertedIndex"], block_size: int = 128) -> "InvertedIndex":
+        # 여러 segment의 남아있는 문서만 순서대로 모아서 새 인덱스를 만듦
+        # (남은 문서로 처음부터 빌드한 인덱스와 같은 배열, 첫 segment에 impact가 있으면 같은 파라미터로 다시 계산)
+        merged = cls(fast_tokenizer=indexes[0].tokenizer.fast)
+        segments, doc_lens = [], []
+        for index in indexes:
+            index.finalize()
+            if index.deleted is None:
+                segments.append(index.index)
+                doc_lens.append(np.asarray(index.doc_len_array))
+            else:
+                keep = ~index.deleted
+                segments.append(index.index.filter_docs(keep))
+                doc_lens.append(np.asarray(index.doc_len_array)[keep])
+
+        merged._set_postings(CompactPostings.merge(segments), np.concatenate(doc_lens).astype(np.int32), block_size)
+
+        params = indexes[0].impact_params
+        if params is not None:
+            merged.build_impacts(params["k1"], params["b"], params["bits"])
+        return merged
+
+    def finalize(self, block_size: int = 128):
+        if self.is_finalized:
+            return
+
+        # 문서 길이를 문서 번호 순서의 배열로 저장
+        doc_len_array = np.array([self.doc_lengths[doc_id] for doc_id in self.doc_ids], dtype=np.int32)
+
+        # dict 인덱스를 배열 기반 구조로 변환하고 원본은 버림
+        self._set_postings(CompactPostings.from_dict(self.index, self.doc_ids), doc_len_array, block_size)
+
+    def _set_postings(self, postings: CompactPostings, doc_len_array: np.ndarray, block_size: int):
+        self.doc_len_array = doc_len_array
+        self.doc_count = len(doc_len_array)
+
         # BM25 공식 계산을 위해 문서의 평균 길이를 계산
         if self.doc_count > 0:
-            total_len = sum(self.doc_lengths.values())
+            total_len = int(self.doc_len_array.sum())
             self.avg_doc_len = total_len / self.doc_count
 
+        self.index = postings
+        self.doc_ids = self.index.doc_ids
+        self.doc_lengths = DocLengths(self.doc_ids, self.doc_len_array)
+        self.block_max = BlockMaxIndex.build(self.index, self.doc_len_array, block_size)
+
+    def build_parallel(self, documents: Iterable[Tuple[str, str]], num_workers: Optional[int] = None, shard_size: int = 10000, block_size: int = 128):
+        # 문서를 shard_size개씩 나눠서 프로세스 풀에서 토큰화 + segment 생성 후 하나로 합침
+        # 문서 순서가 유지되므로 add_document + finalize로 만든 인덱스와 같은 배열이 만들어짐
+        # documents는 generator여도 되고, 동시에 처리 중인 shard만 원문이 메모리에 올라감
+        # (doc_id는 중복되지 않는다고 가정)
+        if self.is_finalized or self.doc_count > 0:
+            raise ValueError("build_parallel()은 비어 있는 인덱스에서만 사용할 수 있습니다.")
+
+        num_workers = num_workers or os.cpu_count() or 1
+        documents = iter(documents)
+        shards = iter(lambda: list(islice(documents, shard_size)), [])
+        segments = []
+
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            max_pending = num_workers * 2
+            pending = deque()
+            for shard in shards:
+                pending.append(pool.submit(_build_segment, shard, self.tokenizer.fast))
+                if len(pending) >= max_pending:
+                    segments.append(pending.popleft().result())
+            while pending:
+                segments.append(pending.popleft().result())
+
+        if not segments:
+            self.finalize(block_size)
+            return
+
+        postings = CompactPostings.merge([segment for segment, _ in segments])
+        doc_len_array = np.concatenate([doc_lens for _, doc_lens in segments]).astype(np.int32)
+        self._set_postings(postings, doc_len_array, block_size)
+
+    def build_impacts(self, k1: float, b: float, bits: int = 8, chunk_size: int = 1 << 22):
+        # BM25의 TF * (k1 + 1) / (TF + k1 * (1 - b + b * (doc_len / avgdl))) 부분은
+        # tf와 문서 길이에만 의존하므로 인덱싱 시점에 계산해서 양자화해 둠
+        # 검색 시에는 idf * impact * scale만 더하면 됨
+        if bits not in (8, 16):
+            raise ValueError("impact 양자화는 8비트 또는 16비트만 지원합니다.")
+        self.finalize()
+
+        postings = self.index
+        levels = (1 << bits) - 1
+        # 가중치의 최댓값은 k1 + 1 (tf -> 무한대)
+        scale = (k1 + 1) / levels
+        norm = k1 * (1 - b + b * (self.doc_len_array / self.avg_doc_len))
+
+        impacts = np.empty(len(postings.docs), dtype=np.uint8 if bits == 8 else np.uint16)
+        # posting 수만큼의 float 임시 배열이 생기지 않도록 나눠서 계산
+        for start in range(0, len(impacts), chunk_size):
+            end = min(start + chunk_size, len(impacts))
+            docs = postings.docs[start:end]
+            tfs = postings.tfs[start:end]
+            weights = (tfs * (k1 + 1)) / (tfs + norm[docs])
+            impacts[start:end] = np.clip(np.rint(weights / scale), 1, levels)
+
+        self.impacts = impacts
+        self.impact_params = {"k1": k1, "b": b, "bits": bits, "scale": scale}
 
     def save(self, path: str):
-        # 폴더가 없으면 폴더를 만든 뒤 저장
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-
-        with open(path, 'wb') as f:
-            data = {
-                "index": dict(self.index),
-                "doc_lengths": self.doc_lengths,
-                "doc_count": self.doc_count,
-                "avg_doc_len": self.avg_doc_len
-            }
-            pickle.dump(data, f)
+        # path는 디렉토리 (header.json + 배열 파일들)
+        self.finalize()
+        os.makedirs(path, exist_ok=True)
+
+        postings = self.index
+        postings.terms.save(path, "terms")
+        self.doc_ids.save(path, "doc_ids")
+        save_array(path, "term_offsets", postings.term_offsets)
+        save_array(path, "docs", postings.docs)
+        save_array(path, "tfs", postings.tfs)
+        save_array(path, "position_offsets", postings.position_offsets)
+        save_array(path, "positions", postings.positions)
+        save_array(path, "doc_lengths", self.doc_len_array)
+        if self.impacts is not None:
+            save_array(path, "impacts", self.impacts)
+        if self.block_max is not None:
+            self.block_max.save(path)
+        # tombstone은 bitmap으로 저장 (삭제가 없으면 예전 파일을 지움)
+        deleted_path = os.path.join(path, "deleted.npy")
+        if self.num_deleted > 0:
+            save_array(path, "deleted", np.packbits(self.deleted))
+        elif os.path.exists(deleted_path):
+            os.remove(deleted_path)
+
+        write_header(
+            path,
+            "bm25",
+            doc_count=self.doc_count,
+            avg_doc_len=self.avg_doc_len,
+            num_terms=len(postings),
+            num_postings=len(postings.docs),
+            impact_params=self.impact_params,
+            block_size=self.block_max.block_size if self.block_max is not None else None,
+            num_deleted=self.num_deleted,
+        )
 
     def load(self, path: str) -> bool:
-        if not os.path.exists(path):
+        if not has_header(path):
             return False
-            
-        with open(path, 'rb') as f:
-            data = pickle.load(f)
-            # Reconstruct defaultdict structure
-            raw_index = data["index"]
-            self.index = defaultdict(lambda: defaultdict(list))
-            for term, postings in raw_index.items():
-                self.index[term] = postings
-                
-            self.doc_lengths = data["doc_lengths"]
-            self.doc_count = data["doc_count"]
-            self.avg_doc_len = data["avg_doc_len"]
+
+        # 배열은 mmap으로 열기 때문에 인덱스 크기와 상관없이 바로 로드됨
+        header = read_header(path, "bm25")
+
+        self.doc_ids = StringTable.load(path, "doc_ids")
+        self.index = CompactPostings(
+            StringTable.load(path, "terms"),
+            self.doc_ids,
+            load_array(path, "term_offsets"),
+            load_array(path, "docs"),
+            load_array(path, "tfs"),
+            load_array(path, "position_offsets"),
+            load_array(path, "positions"),
+        )
+        self.doc_len_array = load_array(path, "doc_lengths")
+        self.doc_lengths = DocLengths(self.doc_ids, self.doc_len_array)
+        self.doc_count = header["doc_count"]
+        self.avg_doc_len = header["avg_doc_len"]
+
+        self.impact_params = header.get("impact_params")
+        self.impacts = load_array(path, "impacts") if self.impact_params else None
+
+        block_size = header.get("block_size")
+        self.block_max = BlockMaxIndex.load(path, block_size) if block_size else None
+
+        self.deleted = None
+        if header.get("num_deleted"):
+            self.deleted = np.unpackbits(load_array(path, "deleted"), count=self.doc_count).astype(bool)
 
         return True
+
+
+def _build_segment(documents: List[Tuple[str, str]], fast_tokenizer: bool = False) -> Tuple[CompactPostings, np.ndarray]:
+    # 프로세스 풀에서 실행: 문서 묶음 하나를 토큰화해서 (postings, 문서 길이 배열) segment를 만듦
+    index = InvertedIndex(fast_tokenizer)
+    index.add_documents(documents)
+
+    doc_len_array = np.array([index.doc_lengths[doc_id] for doc_id in index.doc_ids], dtype=np.int32)
+    return CompactPostings.from_dict(index.index, index.doc_ids), doc_len_array
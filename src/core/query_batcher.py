@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict
+
+# 동시에 들어온 쿼리 인코딩 요청을 모아서 한 번의 forward로 처리
+# 첫 요청이 들어온 뒤 max_wait초 동안(또는 max_batch_size개가 찰 때까지) 기다린 요청을 한 batch로 인코딩하고
+# 결과를 각 요청에 돌려줌 (model.encode와 같은 형태로 사용 가능)
+#
+# batch 안에서는 padding 때문에 값이 encode 한 번과 아주 조금 다를 수 있음
+class QueryBatcher:
+    def __init__(self, model, max_batch_size: int = 16, max_wait: float = 0.002):
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size는 1 이상이어야 합니다.")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self._requests = queue.Queue() # (쿼리, Future), None이면 종료
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+        # 평균 batch 크기 확인용
+        self.num_batches = 0
+        self.num_queries = 0
+
+    def encode(self, text: str) -> Dict[int, float]:
+        future = Future()
+        self._requests.put((text, future))
+        return future.result()
+
+    def close(self):
+        self._requests.put(None)
+        self._worker.join()
+
+    def _next_batch(self):
+        request = self._requests.get()
+        if request is None:
+            return None
+
+        batch = [request]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # 모은 요청까지 처리한 뒤 종료
+                self._requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            # 같은 쿼리는 한 번만 인코딩
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                encoded = self.model.encode_batch(texts, batch_size=len(texts))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            vectors = {
+                text: dict(zip(indices, values))
+                for text, indices, values in zip(texts, encoded["indices"], encoded["values"])
+            }
+            self.num_batches += 1
+            self.num_queries += len(batch)
+            for text, future in batch:
+                future.set_result(vectors[text])
@@ -0,0 +1,86 @@
+import os
+import numpy as np
+from typing import Dict, Iterable, Optional
+from .result_cache import ResultCache
+from .storage import StringTable, has_header, load_array, read_header, save_array, write_header
+
+# SPLADE 쿼리 벡터 cache
+# 쿼리 인코딩(BERT forward)이 hybrid 검색 시간의 대부분을 차지하므로
+# 자주 들어오는 쿼리는 같은 문자열이면 인코딩 결과를 재사용함
+# - 쿼리 문자열 그대로를 key로 사용 (모델 입력이 같아야 결과도 같음)
+# - save/load로 재시작해도 유지, warm_up으로 쿼리 로그에서 미리 채움
+#
+# 저장 포맷 (storage.py의 인덱스 디렉토리 포맷)
+#   queries: 쿼리 문자열 (오래 사용하지 않은 쿼리부터, 로드 후에도 LRU 순서 유지)
+#   offsets: 쿼리 i의 벡터는 indices/values[offsets[i]:offsets[i + 1]]
+class QueryVectorCache:
+    def __init__(self, max_entries: int = 10000):
+        self._cache = ResultCache(max_entries, ttl=None)
+
+    def get(self, query: str) -> Optional[Dict[int, float]]:
+        return self._cache.get(query)
+
+    def put(self, query: str, query_vec: Dict[int, float]):
+        self._cache.put(query, query_vec)
+
+    def encode(self, query: str, model) -> Dict[int, float]:
+        # cache에 없으면 model.encode로 인코딩해서 저장
+        query_vec = self._cache.get(query)
+        if query_vec is None:
+            query_vec = model.encode(query)
+            self._cache.put(query, query_vec)
+        return query_vec
+
+    def warm_up(self, queries: Iterable[str], model) -> int:
+        # 쿼리 로그의 쿼리를 미리 인코딩해둠 (새로 인코딩한 쿼리 수를 반환)
+        # 검색할 때와 같은 벡터가 되도록 batch가 아닌 encode를 사용 (padding에 따라 값이 조금 달라질 수 있음)
+        cached = {query for query, _ in self._cache.items()}
+        count = 0
+        for query in dict.fromkeys(queries):
+            if query in cached:
+                continue
+            self._cache.put(query, model.encode(query))
+            cached.add(query)
+            count += 1
+        return count
+
+    def clear(self):
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        entries = self._cache.items()
+        sizes = [len(query_vec) for _, query_vec in entries]
+        offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+
+        # 모델이 준 dtype을 그대로 저장해서 로드한 벡터로 계산한 점수도 같게 함
+        indices = [np.asarray(list(query_vec.keys()), dtype=np.int64) for _, query_vec in entries]
+        values = [np.asarray(list(query_vec.values())) for _, query_vec in entries]
+
+        StringTable.from_strings([query for query, _ in entries]).save(path, "queries")
+        save_array(path, "offsets", offsets)
+        save_array(path, "indices", np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64))
+        save_array(path, "values", np.concatenate(values) if values else np.zeros(0, dtype=np.float32))
+        write_header(path, "query_vector_cache", size=len(entries))
+
+    def load(self, path: str) -> bool:
+        # 저장된 cache가 없으면 False (max_entries보다 많으면 최근에 사용한 쿼리만 남음)
+        if not has_header(path):
+            return False
+        read_header(path, "query_vector_cache")
+
+        queries = StringTable.load(path, "queries")
+        offsets = load_array(path, "offsets", mmap=False)
+        indices = load_array(path, "indices", mmap=False)
+        values = load_array(path, "values", mmap=False)
+        for i, query in enumerate(queries):
+            start, end = offsets[i], offsets[i + 1]
+            self._cache.put(query, dict(zip(indices[start:end], values[start:end])))
+        return True
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# 검색 결과 cache (LRU + TTL)
+# - max_entries개를 넘으면 가장 오래 사용하지 않은 항목부터 제거
+# - ttl초가 지난 항목은 조회할 때 제거 (ttl이 None이면 만료 없음)
+# 여러 요청이 동시에 사용할 수 있도록 lock으로 보호함
+class ResultCache:
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 300.0):
+        if max_entries <= 0:
+            raise ValueError("max_entries는 1 이상이어야 합니다.")
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict() # key -> (저장 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        # 만료되지 않은 (key, 값) 목록 (오래 사용하지 않은 항목부터)
+        with self._lock:
+            now = time.monotonic()
+            return [(key, value) for key, (stored_at, value) in self._entries.items()
+                    if self.ttl is None or now - stored_at <= self.ttl]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
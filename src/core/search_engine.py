@@ -1,69 +1,427 @@
 from .inverted_index import InvertedIndex
 from .splade_index import SpladeIndex
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from collections import defaultdict
 import math
 import os
-import pickle
+import shutil
+import threading
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .query_batcher import QueryBatcher
+from .query_cache import QueryVectorCache
+from .result_cache import ResultCache
+from .segments import SegmentDocIds
+from .storage import StringMap, StringTable, has_header
+from .topk import top_k_order, top_k_items
+from .wand import BlockMaxIndex, wand_top_k
 
 # 서치 엔진은 실제로 application 계층에서 사용됨
 # 서치 엔진의 책임 == 시스템의 책임
 # 일종의 controller 역할을 함
 # inverted index를 사용하여 검색어를 찾음
 class SearchEngine:
-    def __init__(self, index_path: str = "data/index.pkl", splade_index_path: str = "data/splade_index", titles_path: str = "data/titles.pkl", k1: float = 1.5, b: float = 0.9):
+    def __init__(self, index_path: str = "data/index", splade_index_path: str = "data/splade_index", titles_path: str = "data/titles", k1: float = 1.5, b: float = 0.9, bm25_kernel: str = "numpy", splade_mode: str = "exact", splade_term_ratio: float = 0.0, fast_tokenizer: bool = False, result_cache_size: int = 0, result_cache_ttl: float = 300.0, query_cache_size: int = 0, query_batch_size: int = 1, query_batch_wait: float = 0.002, parallel_retrieval: bool = False, retrieval_workers: int = 8):
         self.index_path = index_path
         self.splade_index_path = splade_index_path
         self.titles_path = titles_path
         
         self.k1 = k1 # BM25 파라미터
         self.b = b # BM25 파라미터
+
+        # BM25 점수 계산 방식
+        # - "numpy": 배열 연산
+        # - "python": posting 단위 루프 (A/B 비교용)
+        # - "impact": 인덱싱 시점에 계산한 양자화 가중치 사용 (InvertedIndex.build_impacts 필요, segment / 삭제가 있으면 merge_segments 후 사용)
+        # - "wand", "bmw": 상한을 이용해 top-k에 들 수 없는 문서를 건너뜀 (WAND / Block-Max WAND)
+        if bm25_kernel not in ("numpy", "python", "impact", "wand", "bmw"):
+            raise ValueError(f"지원하지 않는 BM25 커널입니다: {bm25_kernel}")
+        self.bm25_kernel = bm25_kernel
+        self._doc_len_norm = None
+        self._doc_len_norm_key = None
+
+        # SPLADE 검색 모드: "exact" | "safe" | "approx" (SpladeIndex.search 참고)
+        # splade_term_ratio는 "approx"에서 제외할 저가중치 term의 기준
+        self.splade_mode = splade_mode
+        self.splade_term_ratio = splade_term_ratio
+        self._splade_alignment = None
+        self._splade_alignment_key = None
         
-        self.inverted_index = InvertedIndex()
+        # fast_tokenizer: BM25 토큰화에 stem cache + 공백 split 사용 (BM25Tokenizer 참고, 결과는 같음)
+        self.inverted_index = InvertedIndex(fast_tokenizer=fast_tokenizer)
         self.splade_index = SpladeIndex()
         self.splade_model = None # 무거우니까 lazy loading
         self.titles: Dict[str, str] = {}
 
+        # 증분 인덱싱: add_documents()로 추가한 문서는 새 segment에 들어가고,
+        # delete_documents()는 tombstone만 표시함. merge_segments()로 다시 하나의 인덱스로 합침
+        # 검색은 (기본 인덱스 + segment들)을 문서 번호 하나로 이어서 처리
+        self.bm25_segments: List[InvertedIndex] = []
+        self.splade_segments: List[SpladeIndex] = []
+        self._segments_lock = threading.Lock()
+        # merge는 한 번에 하나만 실행 (동시에 합치면 서로의 결과를 덮어써서 segment나 tombstone이 사라짐)
+        self._merge_lock = threading.Lock()
+        self._segment_norms = None
+        self._segment_norms_key = None
+
+        # hybrid_search 결과 cache (result_cache_size가 0이면 사용하지 않음)
+        # 쿼리마다 합친 후보 전체를 저장해서 다음 페이지는 slicing만 하면 됨
+        # index_version은 인덱스가 바뀔 때마다 증가해서 예전 결과를 사용하지 않게 함
+        self.result_cache = ResultCache(result_cache_size, result_cache_ttl) if result_cache_size > 0 else None
+        self.index_version = 0
+        # 디스크에 저장된 인덱스와 메모리의 인덱스가 같은 index_version (save/load 후에만 같음)
+        self._saved_version = None
+
+        # SPLADE 쿼리 벡터 cache (query_cache_size가 0이면 사용하지 않음)
+        # 벡터는 모델에만 의존하므로 인덱스가 바뀌어도 그대로 사용
+        self.query_cache = QueryVectorCache(query_cache_size) if query_cache_size > 0 else None
+
+        # 동시에 들어온 SPLADE 쿼리 인코딩을 모아서 처리 (query_batch_size가 1이면 요청마다 인코딩)
+        self.query_batch_size = query_batch_size
+        self.query_batch_wait = query_batch_wait
+        self._query_batcher = None
+        self._query_batcher_lock = threading.Lock()
+
+        # hybrid_search에서 SPLADE 검색을 thread pool에서 실행해서 BM25 검색과 겹치게 함
+        # (쿼리 인코딩은 대부분 GIL을 놓는 torch 연산이라 BM25와 동시에 실행됨)
+        self.parallel_retrieval = parallel_retrieval
+        self.retrieval_workers = retrieval_workers
+        self._retrieval_pool = None
+        self._retrieval_pool_lock = threading.Lock()
+
+        # 배치 BM25 검색용 프로세스 풀 (worker마다 저장된 인덱스를 한 번만 로드해서 재사용)
+        self._bm25_pool = None
+        self._bm25_pool_key = None
+        self._bm25_pool_lock = threading.Lock()
+
+    def _query_encoder(self):
+        # 쿼리를 인코딩할 객체 (model 또는 model 앞의 QueryBatcher)
+        self.load_splade_model()
+        if self.query_batch_size <= 1:
+            return self.splade_model
+
+        with self._query_batcher_lock:
+            if self._query_batcher is None or self._query_batcher.model is not self.splade_model:
+                if self._query_batcher is not None:
+                    self._query_batcher.close()
+                self._query_batcher = QueryBatcher(self.splade_model, self.query_batch_size, self.query_batch_wait)
+            return self._query_batcher
+
+    def _get_retrieval_pool(self) -> ThreadPoolExecutor:
+        with self._retrieval_pool_lock:
+            if self._retrieval_pool is None:
+                self._retrieval_pool = ThreadPoolExecutor(max_workers=self.retrieval_workers, thread_name_prefix="splade")
+            return self._retrieval_pool
+
+    def _get_bm25_pool(self, num_workers: int) -> Optional[ProcessPoolExecutor]:
+        # 메모리의 인덱스가 디스크와 같을 때만 사용 가능 (저장하지 않은 추가/삭제가 있으면 None)
+        # worker는 디스크의 인덱스를 열어서 계산하므로, 다르면 삭제된 문서가 나오거나 문서 번호가 어긋남
+        if self._saved_version != self.index_version:
+            return None
+
+        engine_args = dict(
+            index_path=self.index_path, k1=self.k1, b=self.b, bm25_kernel=self.bm25_kernel,
+            fast_tokenizer=self.inverted_index.tokenizer.fast,
+        )
+        key = (tuple(sorted(engine_args.items())), self._saved_version, num_workers)
+        with self._bm25_pool_lock:
+            if self._bm25_pool_key != key:
+                if self._bm25_pool is not None:
+                    self._bm25_pool.shutdown()
+                self._bm25_pool = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_bm25_worker, initargs=(engine_args,))
+                self._bm25_pool_key = key
+            return self._bm25_pool
+
+    def close(self):
+        # 검색에 사용한 thread / 프로세스 풀 정리
+        with self._bm25_pool_lock:
+            if self._bm25_pool is not None:
+                self._bm25_pool.shutdown()
+                self._bm25_pool = None
+                self._bm25_pool_key = None
+        with self._retrieval_pool_lock:
+            if self._retrieval_pool is not None:
+                self._retrieval_pool.shutdown()
+                self._retrieval_pool = None
+        with self._query_batcher_lock:
+            if self._query_batcher is not None:
+                self._query_batcher.close()
+                self._query_batcher = None
+
+    def _index_changed(self):
+        self.index_version += 1
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
     def load_splade_model(self):
         if self.splade_model is None:
             from .splade_model import SpladeModel
             self.splade_model = SpladeModel()
 
-    def build_index_from_data(self, documents: List[Tuple[str, str]]):
+    def build_index_from_data(self, documents: Iterable[Tuple[str, str]], num_workers: int = 1):
         # inverted index를 생성하는 함수
-        for doc_id, text in documents:
-            self.inverted_index.add_document(doc_id, text)
-        
-        # 평균 길이를 구해줌
-        self.inverted_index.finalize()
+        # num_workers > 1이면 여러 프로세스에서 나눠서 만든 뒤 합침 (결과는 같음)
+        if num_workers > 1:
+            self.inverted_index.build_parallel(documents, num_workers=num_workers)
+        else:
+            self.inverted_index.add_documents(documents)
+
+            # 평균 길이를 구해줌
+            self.inverted_index.finalize()
+        self._index_changed()
+
+    def _bm25_indexes(self) -> List[InvertedIndex]:
+        # 검색 중에 merge가 끝나도 같은 segment 목록을 보도록 한 번에 가져옴
+        with self._segments_lock:
+            return [self.inverted_index] + self.bm25_segments
+
+    def _splade_indexes(self) -> List[SpladeIndex]:
+        with self._segments_lock:
+            return [self.splade_index] + self.splade_segments
+
+    @staticmethod
+    def _segment_doc_ids(indexes):
+        if len(indexes) == 1:
+            return indexes[0].doc_ids
+        return SegmentDocIds([index.doc_ids for index in indexes])
+
+    def search_bm25(self, query: str, top_k: int = 100, stats: Dict[str, int] = None) -> List[Tuple[str, float]]:
+        # stats에 dict를 넘기면 점수를 계산한 posting 수 등을 기록해줌
+        indexes = self._bm25_indexes()
+        doc_ords, scores = self._bm25_candidates(query, top_k, stats, indexes)
+
+        # 상위 결과만 doc_id로 변환
+        doc_ids = self._segment_doc_ids(indexes)
+        return [(doc_ids[doc_ord], score) for doc_ord, score in zip(doc_ords.tolist(), scores.tolist())]
+
+    def _bm25_candidates(self, query: str, top_k: int, stats: Dict[str, int] = None, indexes: List[InvertedIndex] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # 점수 상위 top_k개의 (문서 번호 배열, 점수 배열)
+        if indexes is None:
+            indexes = self._bm25_indexes()
+        if self.bm25_kernel == "impact":
+            self._check_impacts(indexes)
 
-    def search_bm25(self, query: str, top_k: int = 100) -> List[Tuple[str, float]]:
         # 전처리
-        query_tokens = self.inverted_index.tokenizer.tokenize(query)
+        query_tokens = indexes[0].tokenizer.tokenize(query)
         
         if not query_tokens:
-            return []
-            
-        # BM25 점수 계산(공식을 그대로 사용)
-        scores = defaultdict(float)
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        if len(indexes) > 1 or indexes[0].deleted is not None:
+            # segment가 여러 개이거나 삭제된 문서가 있으면 segment별로 배열 연산
+            # (block 상한은 segment 전체 통계로 만든 값이 아니므로 사용하지 않음, impact는 _check_impacts에서 거부)
+            return self._rank_bm25_segments(indexes, query_tokens, top_k, stats)
+
+        if self.bm25_kernel in ("wand", "bmw"):
+            return self._rank_bm25_wand(query_tokens, top_k, stats)
+
+        if self.bm25_kernel == "python":
+            doc_ords, scores = self._rank_bm25_python(query_tokens, top_k)
+        elif self.bm25_kernel == "impact":
+            doc_ords, scores = self._rank_bm25_impact(query_tokens, top_k)
+        else:
+            doc_ords, scores = self._rank_bm25_numpy(query_tokens, top_k)
+
+        if stats is not None:
+            # 전체 점수 계산은 모든 query token의 posting을 한 번씩 계산함
+            stats["postings_evaluated"] = sum(self.inverted_index.index.df(term) for term in query_tokens)
+        return doc_ords, scores
+
+    def _bm25_idf(self, n_q: int, N: int = None) -> float:
+        # n_q: 해당 term을 포함하고 있는 문서의 개수
+        if N is None:
+            N = self.inverted_index.doc_count
+        return math.log((N - n_q + 0.5) / (n_q + 0.5) + 1)
+
+    def _get_doc_len_norm(self) -> np.ndarray:
+        # 분모의 k1 * (1 - b + b * (doc_len / avgdl)) 부분은 문서마다 고정이므로 미리 계산해둠
+        # 인덱스를 다시 로드하거나 k1, b가 바뀌면 새로 계산
+        doc_len_array = self.inverted_index.doc_len_array
+        key = (id(doc_len_array), self.inverted_index.avg_doc_len, self.k1, self.b)
+        if self._doc_len_norm_key != key:
+            avgdl = self.inverted_index.avg_doc_len
+            self._doc_len_norm = self.k1 * (1 - self.b + self.b * (doc_len_array / avgdl))
+            self._doc_len_norm_key = key
+        return self._doc_len_norm
+
+    def _get_segment_norms(self, indexes: List[InvertedIndex]) -> Tuple[int, List[np.ndarray]]:
+        # 남아있는 문서 기준의 (문서 수, segment별 k1 * (1 - b + b * (doc_len / avgdl)))
+        # segment가 바뀌거나 문서가 삭제되거나 k1, b가 바뀌면 새로 계산
+        key = (tuple(id(index) for index in indexes), tuple(index.num_deleted for index in indexes), self.k1, self.b)
+        if self._segment_norms_key != key:
+            N = sum(index.num_live for index in indexes)
+            total_len = 0
+            for index in indexes:
+                doc_len_array = np.asarray(index.doc_len_array)
+                if index.deleted is not None:
+                    doc_len_array = doc_len_array[~index.deleted]
+                total_len += int(doc_len_array.sum())
+
+            norms = []
+            if N > 0:
+                avgdl = total_len / N
+                norms = [self.k1 * (1 - self.b + self.b * (index.doc_len_array / avgdl)) for index in indexes]
+            self._segment_norms = (N, norms)
+            self._segment_norms_key = key
+        return self._segment_norms
+
+    def _rank_bm25_segments(self, indexes: List[InvertedIndex], query_tokens: List[str], top_k: int, stats: Dict[str, int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # segment마다 _rank_bm25_numpy와 같은 방식으로 점수를 계산하되
+        # N, avgdl, df는 모든 segment의 남아있는 문서 기준으로 사용 (남은 문서로 다시 빌드한 인덱스와 같은 점수)
+        N, norms = self._get_segment_norms(indexes)
+        ranges = [[index.index.term_range(term) for term in query_tokens] for index in indexes]
+
+        dfs = [0] * len(query_tokens)
+        for index, term_ranges in zip(indexes, ranges):
+            for t, (start, end) in enumerate(term_ranges):
+                dfs[t] += end - start
+                if index.deleted is not None and end > start:
+                    dfs[t] -= int(np.count_nonzero(index.deleted[index.index.docs[start:end]]))
+
+        if stats is not None:
+            stats["postings_evaluated"] = sum(end - start for term_ranges in ranges for start, end in term_ranges)
+
+        all_docs, all_scores, all_first_seen = [], [], []
+        base = 0
+        for index, term_ranges, norm in zip(indexes, ranges, norms):
+            postings = index.index
+            scores = np.zeros(index.doc_count, dtype=np.float64)
+            first_seen = np.full(index.doc_count, len(query_tokens), dtype=np.int32)
+
+            for t, (start, end) in enumerate(term_ranges):
+                if start == end or dfs[t] == 0:
+                    continue
+                idf = self._bm25_idf(dfs[t], N)
+                docs = postings.docs[start:end]
+                tfs = postings.tfs[start:end]
+                scores[docs] += idf * ((tfs * (self.k1 + 1)) / (tfs + norm[docs]))
+                first_seen[docs] = np.minimum(first_seen[docs], t)
+
+            if index.deleted is not None:
+                first_seen[index.deleted] = len(query_tokens)
+            candidates = np.flatnonzero(first_seen < len(query_tokens))
+            all_docs.append(candidates + base)
+            all_scores.append(scores[candidates])
+            all_first_seen.append(first_seen[candidates])
+            base += index.doc_count
+
+        if not all_docs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        docs = np.concatenate(all_docs)
+        scores = np.concatenate(all_scores)
+        order = top_k_order(scores, top_k, tiebreak=(np.concatenate(all_first_seen), docs))
+        return docs[order], scores[order]
+
+    def _rank_bm25_numpy(self, query_tokens: List[str], top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # BM25 점수 계산(공식을 그대로 사용) - term 단위로 배열 연산
+        postings = self.inverted_index.index
+        norm = self._get_doc_len_norm()
+
+        def term_weights(start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+            # TF * (k1 + 1) / (TF + k1 * (1 - b + b * (doc_len / avgdl)))
+            docs = postings.docs[start:end]
+            tfs = postings.tfs[start:end]
+            return docs, (tfs * (self.k1 + 1)) / (tfs + norm[docs])
+
+        return self._rank_term_at_a_time(query_tokens, top_k, term_weights)
+
+    def _check_impacts(self, indexes: List[InvertedIndex]):
+        # impact kernel을 사용할 수 있는지 확인 (모든 검색 경로에서 같은 검사)
+        # impact는 인덱스 전체의 avgdl로 양자화한 값이라 segment나 삭제된 문서가 있으면 점수가 맞지 않음
+        index = indexes[0]
+        params = index.impact_params
+        if index.impacts is None:
+            raise ValueError("impact 인덱스가 없습니다. InvertedIndex.build_impacts()로 먼저 생성해주세요.")
+        if params["k1"] != self.k1 or params["b"] != self.b:
+            raise ValueError(
+                f"impact 인덱스의 파라미터(k1={params['k1']}, b={params['b']})가 "
+                f"검색 파라미터(k1={self.k1}, b={self.b})와 다릅니다."
+            )
+        if len(indexes) > 1 or index.deleted is not None:
+            raise ValueError("segment나 삭제된 문서가 있는 인덱스에는 impact를 사용할 수 없습니다. merge_segments()로 먼저 합쳐주세요.")
+
+    def _rank_bm25_impact(self, query_tokens: List[str], top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # 미리 계산된 impact를 사용: 점수 = idf * impact * scale (_check_impacts로 확인한 인덱스)
+        index = self.inverted_index
+        params = index.impact_params
+
+        postings = index.index
+        impacts = index.impacts
+        scale = params["scale"]
+
+        def term_weights(start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+            return postings.docs[start:end], impacts[start:end] * scale
+
+        return self._rank_term_at_a_time(query_tokens, top_k, term_weights)
+
+    def _rank_bm25_wand(self, query_tokens: List[str], top_k: int, stats: Dict[str, int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        index = self.inverted_index
+        if index.block_max is None:
+            # block 정보 없이 저장된 인덱스는 처음 검색할 때 한 번 만들어 둠
+            index.block_max = BlockMaxIndex.build(index.index, index.doc_len_array)
+
+        return wand_top_k(
+            index.index,
+            index.block_max,
+            query_tokens,
+            top_k,
+            idf=self._bm25_idf,
+            norm=self._get_doc_len_norm(),
+            k1=self.k1,
+            b=self.b,
+            avg_doc_len=index.avg_doc_len,
+            use_block_max=self.bm25_kernel == "bmw",
+            stats=stats,
+        )
+
+    def _rank_term_at_a_time(self, query_tokens: List[str], top_k: int, term_weights) -> Tuple[np.ndarray, np.ndarray]:
+        # term_weights(start, end) -> (문서 번호 배열, idf를 곱하기 전의 가중치 배열)
+        postings = self.inverted_index.index
         N = self.inverted_index.doc_count
+
+        # 파이썬 루프와 비트 단위로 같은 점수를 내기 위해 float64 버퍼에 누적
+        scores = np.zeros(N, dtype=np.float64)
+        # 동점일 때 기존 루프와 같은 순서(처음 등장한 term 순서 -> 문서 번호)로 정렬하기 위해 기록
+        first_seen = np.full(N, len(query_tokens), dtype=np.int32)
+
+        for t, term in enumerate(query_tokens):
+            start, end = postings.term_range(term)
+            if start == end:
+                continue
+
+            idf = self._bm25_idf(end - start)
+            docs, weights = term_weights(start, end)
+
+            # 한 term의 posting 안에서는 문서가 중복되지 않으므로 fancy index로 바로 누적 가능
+            scores[docs] += idf * weights
+            first_seen[docs] = np.minimum(first_seen[docs], t)
+
+        candidates = np.flatnonzero(first_seen < len(query_tokens))
+        order = top_k_order(scores[candidates], top_k, tiebreak=(first_seen[candidates], candidates))
+        top_docs = candidates[order]
+        return top_docs, scores[top_docs]
+
+    def _rank_bm25_python(self, query_tokens: List[str], top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # BM25 점수 계산(공식을 그대로 사용) - posting 단위 루프
+        scores = defaultdict(float)
         avgdl = self.inverted_index.avg_doc_len
         
+        postings = self.inverted_index.index
+        doc_len_array = self.inverted_index.doc_len_array
+
         for term in query_tokens:
-            if term not in self.inverted_index.index:
+            # 문서 번호 배열과 tf 배열을 바로 읽어옴
+            docs, tfs = postings.postings(term)
+            if len(docs) == 0:
                 continue
-                
-            postings = self.inverted_index.index[term]
+
             # IDF 계산
-            # n_q: 해당 term을 포함하고 있는 문서의 개수
-            n_q = len(postings)
-            idf = math.log((N - n_q + 0.5) / (n_q + 0.5) + 1)
+            idf = self._bm25_idf(len(docs))
             
             # 각 문서별 점수 계산 -> BM25수식 이용 (TF & Length Normalization)
-            for doc_id, positions in postings.items():
-                tf = len(positions)
-                doc_len = self.inverted_index.doc_lengths[doc_id]
-                
+            for doc_ord, tf, doc_len in zip(docs.tolist(), tfs.tolist(), doc_len_array[docs].tolist()):
                 # 분자: TF * (k1 + 1)
                 numerator = tf * (self.k1 + 1)
                 
@@ -71,55 +429,498 @@ class SearchEngine:
                 denominator = tf + self.k1 * (1 - self.b + self.b * (doc_len / avgdl))
                 
                 # 최종 점수를 누적시켜줌
-                scores[doc_id] += idf * (numerator / denominator)
+                scores[doc_ord] += idf * (numerator / denominator)
         
         # 결과 정렬 및 반환
-        sorted_docs = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-        return sorted_docs[:top_k]
+        sorted_docs = top_k_items(scores, top_k)
+        doc_ords = np.array([doc_ord for doc_ord, _ in sorted_docs], dtype=np.int64)
+        return doc_ords, np.array([score for _, score in sorted_docs], dtype=np.float64)
 
     def search_splade(self, query: str, top_k: int = 100) -> List[Tuple[str, float]]:
-        self.load_splade_model()
-        
-        query_vec = self.splade_model.encode(query)
-        results = self.splade_index.search(query_vec)
+        indexes = self._splade_indexes()
+        doc_ords, scores = self._splade_candidates(query, top_k, indexes)
+
+        # 상위 결과만 doc_id로 변환
+        doc_ids = self._segment_doc_ids(indexes)
+        return [(doc_ids[doc_ord], score) for doc_ord, score in zip(doc_ords.tolist(), scores.tolist())]
+
+    def _splade_candidates(self, query: str, top_k: int, indexes: List[SpladeIndex] = None, query_vec: Dict[int, float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # query_vec을 넘기면 (batch로 미리 인코딩한 경우) 인코딩하지 않음
+        if indexes is None:
+            indexes = self._splade_indexes()
+        if query_vec is None:
+            encoder = self._query_encoder()
+            if self.query_cache is not None:
+                query_vec = self.query_cache.encode(query, encoder)
+            else:
+                query_vec = encoder.encode(query)
+        if len(indexes) == 1:
+            return indexes[0].search(query_vec, top_k=top_k, mode=self.splade_mode, term_ratio=self.splade_term_ratio)
+
+        # segment마다 top_k개를 구한 뒤 합침 (SPLADE 점수는 다른 문서와 상관없으므로 하나의 인덱스와 같은 결과)
+        all_ords, all_scores = [], []
+        base = 0
+        for index in indexes:
+            doc_ords, scores = index.search(query_vec, top_k=top_k, mode=self.splade_mode, term_ratio=self.splade_term_ratio)
+            all_ords.append(doc_ords + base)
+            all_scores.append(scores)
+            base += index.num_docs
 
-        sorted_docs = sorted(results.items(), key=lambda item: item[1], reverse=True)
-        return sorted_docs[:top_k]
+        doc_ords = np.concatenate(all_ords)
+        scores = np.concatenate(all_scores)
+        order = top_k_order(scores, top_k, tiebreak=(doc_ords,))
+        return doc_ords[order], scores[order]
+
+    def _get_splade_alignment(self, bm25_indexes: List[InvertedIndex], splade_indexes: List[SpladeIndex]) -> np.ndarray:
+        # SPLADE 문서 번호 -> BM25 문서 번호 (BM25 인덱스에 없는 문서는 -1)
+        # 두 인덱스는 보통 같은 순서로 만들어지므로 그 경우에는 배열 비교만으로 끝남
+        key = (
+            tuple(id(index.doc_ids) for index in bm25_indexes),
+            tuple(index.num_deleted for index in bm25_indexes),
+            tuple(id(index.doc_ids) for index in splade_indexes),
+        )
+        if self._splade_alignment_key != key:
+            bm25_ids = bm25_indexes[0].doc_ids
+            splade_ids = splade_indexes[0].doc_ids
+            if (
+                len(bm25_indexes) == 1 and len(splade_indexes) == 1
+                and isinstance(bm25_ids, StringTable) and isinstance(splade_ids, StringTable)
+                and np.array_equal(bm25_ids.offsets, splade_ids.offsets)
+                and np.array_equal(bm25_ids.blob, splade_ids.blob)
+            ):
+                alignment = np.arange(len(splade_ids), dtype=np.int64)
+            else:
+                # 같은 doc_id가 삭제된 뒤 다시 추가될 수 있으므로 남아있는 문서만 사용
+                ordinals = {}
+                base = 0
+                for index in bm25_indexes:
+                    deleted = index.deleted
+                    for doc_ord, doc_id in enumerate(index.doc_ids):
+                        if deleted is None or not deleted[doc_ord]:
+                            ordinals[doc_id] = base + doc_ord
+                    base += index.doc_count
+                splade_ids = self._segment_doc_ids(splade_indexes)
+                alignment = np.array([ordinals.get(doc_id, -1) for doc_id in splade_ids], dtype=np.int64)
+            self._splade_alignment = alignment
+            self._splade_alignment_key = key
+        return self._splade_alignment
+
+    def term_positions(self, query: str, doc_id: str) -> List[np.ndarray]:
+        # 쿼리 term별로 문서에서 등장한 토큰 위치 (인덱싱한 텍스트 기준, snippet 구간 선택용)
+        # 문서가 여러 segment에 있으면 (수정된 문서) 삭제되지 않은 가장 최근 segment를 사용
+        for index in reversed(self._bm25_indexes()):
+            if not index.is_finalized:
+                continue
+            doc_ord = index.doc_ids.index_of(doc_id)
+            if doc_ord < 0 or (index.deleted is not None and index.deleted[doc_ord]):
+                continue
+            terms = dict.fromkeys(index.tokenizer.tokenize(query))
+            return [index.index.positions_of(term, doc_ord) for term in terms]
+        return []
 
-    def hybrid_search(self, query: str, top_k: int = 10, offset: int = 0, rrf_k: int = 60, candidates_k: int = 1000) -> List[Tuple[str, float]]:
+    def hybrid_search(self, query: str, top_k: int = 10, offset: int = 0, rrf_k: int = 60, candidates_k: int = 1000, stats: Dict[str, float] = None) -> List[Tuple[str, float]]:
+        # stats에 dict를 넘기면 단계별 시간(초)을 기록해줌
+        # - bm25_time, splade_time, fusion_time: 각 단계 시간 (cache에서 찾으면 기록하지 않음)
+        # - total_time: 전체 시간, cache_hit: 결과 cache에서 찾았는지
+        start_time = time.perf_counter()
+        if self.result_cache is None:
+            ranking = self._hybrid_fuse(query, rrf_k, candidates_k, offset, offset + top_k, stats)
+            results = self._decode_ranking(*ranking)
+        else:
+            # 같은 쿼리의 다른 페이지는 cache에 저장된 전체 순위에서 잘라서 반환
+            key = self._result_cache_key(query, rrf_k, candidates_k)
+            ranking = self.result_cache.get(key)
+            if stats is not None:
+                stats["cache_hit"] = ranking is not None
+            if ranking is None:
+                ranking = self._hybrid_fuse(query, rrf_k, candidates_k, 0, None, stats)
+                self.result_cache.put(key, ranking)
+            results = self._decode_ranking(*ranking, offset, offset + top_k)
+
+        if stats is not None:
+            stats["total_time"] = time.perf_counter() - start_time
+        return results
+
+    def _bm25_candidates_parallel(self, pool: ProcessPoolExecutor, queries: List[str], top_k: int, chunk_size: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # chunk_size개씩 나눈 쿼리를 worker에서 계산 (결과는 쿼리 순서대로)
+        # 인덱스를 pickle해서 보내지 않고 worker마다 저장된 인덱스를 mmap으로 열어서 page cache를 공유함
+        chunks = [queries[i:i + chunk_size] for i in range(0, len(queries), chunk_size)]
+        results = []
+        for chunk_results in pool.map(_bm25_candidates_in_worker, chunks, [top_k] * len(chunks)):
+            results.extend(chunk_results)
+        return results
+
+    def _result_cache_key(self, query: str, rrf_k: int, candidates_k: int) -> tuple:
+        return (
+            " ".join(query.lower().split()), rrf_k, candidates_k,
+            self.k1, self.b, self.bm25_kernel, self.splade_mode, self.splade_term_ratio,
+            self.index_version, id(self.inverted_index), id(self.splade_index),
+        )
+
+    def _hybrid_fuse(self, query: str, rrf_k: int, candidates_k: int, start: int, stop: int = None, stats: Dict[str, float] = None) -> tuple:
+        # RRF로 합친 순위의 [start, stop) 구간 (stop이 None이면 모든 후보)
+        # (key 배열, 점수 배열, BM25 인덱스 목록, SPLADE 인덱스 목록)을 반환하고 doc_id 변환은 _decode_ranking에서 함
         # RRF Score = 1 / (k + rank)
-        bm25_results = self.search_bm25(query, top_k=candidates_k)
-        splade_results = self.search_splade(query, top_k=candidates_k)
-        
-        rrf_scores = defaultdict(float)
-        
-        # BM25 랭크 점수 반영
-        for rank, (doc_id, _) in enumerate(bm25_results):
-            rrf_scores[doc_id] += 1 / (rrf_k + rank + 1)           
-        # SPLADE 랭크 점수 반영
-        for rank, (doc_id, _) in enumerate(splade_results):
-            rrf_scores[doc_id] += 1 / (rrf_k + rank + 1)
+        bm25_indexes = self._bm25_indexes()
+        splade_indexes = self._splade_indexes()
+        if self.parallel_retrieval:
+            # SPLADE는 thread pool에서, BM25는 현재 thread에서 실행
+            splade_future = self._get_retrieval_pool().submit(_timed, self._splade_candidates, query, candidates_k, splade_indexes)
+            (bm25_ords, _), bm25_time = _timed(self._bm25_candidates, query, candidates_k, None, bm25_indexes)
+            (splade_ords, _), splade_time = splade_future.result()
+        else:
+            (bm25_ords, _), bm25_time = _timed(self._bm25_candidates, query, candidates_k, None, bm25_indexes)
+            (splade_ords, _), splade_time = _timed(self._splade_candidates, query, candidates_k, splade_indexes)
+        fusion_start = time.perf_counter()
+        keys, scores = self._rrf(bm25_ords, splade_ords, bm25_indexes, splade_indexes, rrf_k, start, stop)
+
+        if stats is not None:
+            stats["bm25_time"] = bm25_time
+            stats["splade_time"] = splade_time
+            stats["fusion_time"] = time.perf_counter() - fusion_start
+        return keys, scores, bm25_indexes, splade_indexes
+
+    def _rrf(self, bm25_ords: np.ndarray, splade_ords: np.ndarray, bm25_indexes: List[InvertedIndex], splade_indexes: List[SpladeIndex], rrf_k: int, start: int, stop: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        # 두 결과를 BM25 문서 번호 공간에서 합침
+        # BM25 인덱스에 없는 SPLADE 문서는 num_bm25 + SPLADE 문서 번호를 key로 사용
+        bm25_ids = self._segment_doc_ids(bm25_indexes)
+        splade_ids = self._segment_doc_ids(splade_indexes)
+        num_bm25 = len(bm25_ids)
+        splade_keys = self._get_splade_alignment(bm25_indexes, splade_indexes)[splade_ords]
+        missing = splade_keys < 0
+        splade_keys[missing] = num_bm25 + splade_ords[missing]
+
+        # BM25 랭크 점수 반영 후 SPLADE 랭크 점수 반영 (같은 문서면 순서대로 더해짐)
+        keys = np.concatenate([bm25_ords, splade_keys])
+        contributions = np.concatenate([
+            1 / (rrf_k + np.arange(len(bm25_ords)) + 1),
+            1 / (rrf_k + np.arange(len(splade_keys)) + 1),
+        ])
+        unique_keys, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        rrf_scores = np.bincount(inverse, weights=contributions, minlength=len(unique_keys))
             
-        # 리랭킹
-        sorted_docs = sorted(rrf_scores.items(), key=lambda item: item[1], reverse=True)
-        return sorted_docs[offset : offset + top_k]
+        # 리랭킹 (필요한 페이지까지만 선택, 동점이면 먼저 등장한 문서 순서)
+        if stop is None:
+            stop = len(rrf_scores)
+        order = top_k_order(rrf_scores, stop, tiebreak=(first_index,))[start:]
+
+        # result cache에 그대로 저장되므로 (doc_id, score) tuple 대신 작은 배열로 반환
+        # (후보 2000개 기준 약 24KB, tuple 목록은 약 270KB)
+        return unique_keys[order].astype(np.int32), rrf_scores[order]
+
+    def _decode_ranking(self, keys: np.ndarray, scores: np.ndarray, bm25_indexes: List[InvertedIndex], splade_indexes: List[SpladeIndex], start: int = 0, stop: int = None) -> List[Tuple[str, float]]:
+        # _rrf 순위의 [start, stop) 구간만 doc_id로 변환
+        # key는 순위를 계산할 때의 인덱스 목록 기준이므로 같은 목록으로 변환해야 함
+        bm25_ids = self._segment_doc_ids(bm25_indexes)
+        splade_ids = self._segment_doc_ids(splade_indexes)
+        num_bm25 = len(bm25_ids)
+        results = []
+        for doc_key, score in zip(keys[start:stop].tolist(), scores[start:stop].tolist()):
+            if doc_key < num_bm25:
+                doc_id = bm25_ids[doc_key]
+            else:
+                doc_id = splade_ids[doc_key - num_bm25]
+            results.append((doc_id, score))
+        return results
+
+    def search_bm25_batch(self, queries: List[str], top_k: int = 100, num_workers: int = 1) -> List[List[Tuple[str, float]]]:
+        # 여러 쿼리를 한 번에 검색 (쿼리마다 search_bm25와 같은 결과)
+        # num_workers > 1이면 쿼리를 나눠서 프로세스 풀에서 계산 (worker는 index_path에 저장된 인덱스를 mmap으로 열어서 사용)
+        indexes = self._bm25_indexes()
+        doc_ids = self._segment_doc_ids(indexes)
+        candidates = self._bm25_candidates_batch(queries, top_k, indexes, num_workers=num_workers)
+        return [
+            [(doc_ids[doc_ord], score) for doc_ord, score in zip(doc_ords.tolist(), scores.tolist())]
+            for doc_ords, scores in candidates
+        ]
+
+    def search_splade_batch(self, queries: List[str], top_k: int = 100, encode_batch_size: int = None) -> List[List[Tuple[str, float]]]:
+        # 여러 쿼리를 한 번에 검색 (쿼리는 encode_batch_size개씩 묶어서 인코딩, None이면 한 번에)
+        indexes = self._splade_indexes()
+        doc_ids = self._segment_doc_ids(indexes)
+        results = []
+        for query, query_vec in zip(queries, self._encode_queries(queries, encode_batch_size)):
+            doc_ords, scores = self._splade_candidates(query, top_k, indexes, query_vec)
+            results.append([(doc_ids[doc_ord], score) for doc_ord, score in zip(doc_ords.tolist(), scores.tolist())])
+        return results
+
+    def hybrid_search_batch(self, queries: List[str], top_k: int = 10, offset: int = 0, rrf_k: int = 60, candidates_k: int = 1000, num_workers: int = 1, encode_batch_size: int = None) -> List[List[Tuple[str, float]]]:
+        # 여러 쿼리를 한 번에 검색 (쿼리마다 hybrid_search와 같은 형태의 결과)
+        # - SPLADE: cache에 없는 쿼리를 encode_batch_size개씩 (None이면 한 번의 forward로) 인코딩
+        # - BM25: 여러 쿼리의 점수를 한 번의 배열 연산으로 계산 (num_workers > 1이면 프로세스 풀에서)
+        # batch 인코딩은 padding 때문에 쿼리 하나씩 인코딩한 값과 아주 조금 다를 수 있음
+        results = [None] * len(queries)
+        keys = [None] * len(queries)
+        if self.result_cache is not None:
+            for i, query in enumerate(queries):
+                keys[i] = self._result_cache_key(query, rrf_k, candidates_k)
+                ranking = self.result_cache.get(keys[i])
+                if ranking is not None:
+                    results[i] = self._decode_ranking(*ranking, offset, offset + top_k)
+
+        pending = [i for i in range(len(queries)) if results[i] is None]
+        if not pending:
+            return results
+
+        bm25_indexes = self._bm25_indexes()
+        splade_indexes = self._splade_indexes()
+        pending_queries = [queries[i] for i in pending]
+        bm25_candidates = self._bm25_candidates_batch(pending_queries, candidates_k, bm25_indexes, num_workers=num_workers)
+        query_vecs = self._encode_queries(pending_queries, encode_batch_size)
+
+        for i, query, (bm25_ords, _), query_vec in zip(pending, pending_queries, bm25_candidates, query_vecs):
+            splade_ords, _ = self._splade_candidates(query, candidates_k, splade_indexes, query_vec)
+            if self.result_cache is None:
+                ranking = self._rrf(bm25_ords, splade_ords, bm25_indexes, splade_indexes, rrf_k, offset, offset + top_k)
+                results[i] = self._decode_ranking(*ranking, bm25_indexes, splade_indexes)
+            else:
+                ranking = self._rrf(bm25_ords, splade_ords, bm25_indexes, splade_indexes, rrf_k, 0, None) + (bm25_indexes, splade_indexes)
+                self.result_cache.put(keys[i], ranking)
+                results[i] = self._decode_ranking(*ranking, offset, offset + top_k)
+        return results
+
+    def _encode_queries(self, queries: List[str], batch_size: int = None) -> List[Dict[int, float]]:
+        # cache에 없는 (중복 제거한) 쿼리만 모아서 encode_batch로 인코딩 (batch_size가 None이면 한 번에)
+        self.load_splade_model()
+        vectors = {}
+        if self.query_cache is not None:
+            for query in queries:
+                query_vec = self.query_cache.get(query)
+                if query_vec is not None:
+                    vectors[query] = query_vec
+
+        texts = [query for query in dict.fromkeys(queries) if query not in vectors]
+        if texts:
+            encoded = self.splade_model.encode_batch(texts, batch_size=batch_size or len(texts))
+            for text, indices, values in zip(texts, encoded["indices"], encoded["values"]):
+                vectors[text] = dict(zip(indices, values))
+                if self.query_cache is not None:
+                    self.query_cache.put(text, vectors[text])
+        return [vectors[query] for query in queries]
+
+    def _bm25_candidates_batch(self, queries: List[str], top_k: int, indexes: List[InvertedIndex], chunk_size: int = 64, num_workers: int = 1) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # 쿼리별 _bm25_candidates와 같은 결과 (점수까지 비트 단위로 같음)
+        # (저장하지 않은 변경이 있으면 프로세스 풀을 사용하지 않고 현재 프로세스에서 계산)
+        if self.bm25_kernel == "impact":
+            self._check_impacts(indexes)
+        if num_workers > 1 and len(queries) > chunk_size:
+            pool = self._get_bm25_pool(num_workers)
+            if pool is not None:
+                return self._bm25_candidates_parallel(pool, queries, top_k, chunk_size)
+
+        # numpy kernel로 하나의 인덱스를 검색할 때만 배열 연산으로 계산하고, 그 외에는 쿼리마다 계산
+        index = indexes[0]
+        if len(indexes) > 1 or index.deleted is not None or self.bm25_kernel != "numpy":
+            return [self._bm25_candidates(query, top_k, indexes=indexes) for query in queries]
+
+        postings = index.index
+        N = index.doc_count
+        norm = self._get_doc_len_norm()
+        term_cache = {}
+
+        def term_contributions(term: str) -> Tuple[np.ndarray, np.ndarray]:
+            # term별 (문서 번호, idf * 가중치) - 여러 쿼리에 같은 term이 있으면 한 번만 계산
+            if term not in term_cache:
+                start, end = postings.term_range(term)
+                docs = postings.docs[start:end]
+                tfs = postings.tfs[start:end]
+                weights = (tfs * (self.k1 + 1)) / (tfs + norm[docs])
+                term_cache[term] = (docs, self._bm25_idf(end - start) * weights)
+            return term_cache[term]
+
+        query_tokens = list(index.tokenizer.tokenize_batch(queries))
+        results = []
+        for chunk_start in range(0, len(queries), chunk_size):
+            # chunk의 모든 (쿼리, term) posting을 쿼리 순서 -> term 순서로 이어 붙인 뒤
+            # (쿼리, 문서)별로 bincount하면 쿼리 하나씩 term 순서대로 더한 것과 같은 순서로 더해짐
+            keys, contributions, term_order = [], [], []
+            for q in range(chunk_start, min(chunk_start + chunk_size, len(queries))):
+                for t, term in enumerate(query_tokens[q]):
+                    docs, weights = term_contributions(term)
+                    keys.append((q - chunk_start) * N + docs.astype(np.int64))
+                    contributions.append(weights)
+                    term_order.append(np.full(len(docs), t, dtype=np.int32))
+
+            num_chunk = min(chunk_size, len(queries) - chunk_start)
+            if not keys:
+                results.extend((np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)) for _ in range(num_chunk))
+                continue
+
+            unique_keys, first_index, inverse = np.unique(np.concatenate(keys), return_index=True, return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(contributions), minlength=len(unique_keys))
+            first_seen = np.concatenate(term_order)[first_index]
+
+            bounds = np.searchsorted(unique_keys, np.arange(num_chunk + 1, dtype=np.int64) * N)
+            for q in range(num_chunk):
+                lo, hi = bounds[q], bounds[q + 1]
+                candidates = unique_keys[lo:hi] - q * N
+                order = top_k_order(scores[lo:hi], top_k, tiebreak=(first_seen[lo:hi], candidates))
+                results.append((candidates[order], scores[lo:hi][order]))
+        return results
+
+    def add_documents(self, documents: Iterable[Tuple[str, str]]):
+        # 문서를 새 segment로 추가 (전체 인덱스를 다시 만들지 않음)
+        # 이미 있는 doc_id는 기존 문서를 삭제하고 새 내용으로 추가
+        # 같은 batch 안에서 doc_id가 여러 번 나오면 마지막 것만 남김 (batch를 나눠서 추가한 것과 같은 결과)
+        latest = {}
+        for doc_id, text in documents:
+            latest.pop(doc_id, None)
+            latest[doc_id] = text
+        documents = list(latest.items())
+        if not documents:
+            return
+        doc_ids = [doc_id for doc_id, _ in documents]
+        self.delete_documents(doc_ids)
+
+        segment = InvertedIndex(fast_tokenizer=self.inverted_index.tokenizer.fast)
+        segment.add_documents(documents)
+        segment.finalize()
+
+        splade_segment = None
+        if self.splade_index.is_built:
+            self.load_splade_model()
+            encoded = self.splade_model.encode_batch([text for _, text in documents])
+            splade_segment = SpladeIndex(vocab_size=self.splade_index.vocab_size)
+            splade_segment.add_batch(doc_ids, encoded["indices"], encoded["values"])
+            splade_segment.build()
+
+        with self._segments_lock:
+            self.bm25_segments = self.bm25_segments + [segment]
+            if splade_segment is not None:
+                self.splade_segments = self.splade_segments + [splade_segment]
+        self._index_changed()
+
+    def delete_documents(self, doc_ids: Iterable[str]) -> int:
+        # 모든 segment에서 문서를 tombstone으로 표시하고 삭제된 (BM25 기준) 문서 수를 반환
+        num_deleted = 0
+        with self._segments_lock:
+            bm25_indexes = [self.inverted_index] + self.bm25_segments
+            splade_indexes = [self.splade_index] + self.splade_segments if self.splade_index.is_built else []
+            for doc_id in doc_ids:
+                for index in bm25_indexes:
+                    num_deleted += index.delete_document(doc_id)
+                for index in splade_indexes:
+                    index.delete_document(doc_id)
+        if num_deleted > 0:
+            self._index_changed()
+        return num_deleted
+
+    def merge_segments(self, background: bool = False):
+        # segment들과 tombstone을 정리해서 BM25 / SPLADE 인덱스를 하나씩으로 합침
+        # background=True이면 별도 스레드에서 합치고 스레드를 반환 (합치는 동안에도 검색/추가/삭제 가능)
+        if background:
+            thread = threading.Thread(target=self.merge_segments, daemon=True)
+            thread.start()
+            return thread
+
+        with self._merge_lock:
+            self._merge_segments()
+
+    def _merge_segments(self):
+        with self._segments_lock:
+            bm25_snapshot = [self.inverted_index] + self.bm25_segments
+            splade_snapshot = [self.splade_index] + self.splade_segments if self.splade_index.is_built else []
+            deleted_snapshot = [None if index.deleted is None else index.deleted.copy() for index in bm25_snapshot + splade_snapshot]
+
+        # 오래 걸리는 합치기는 lock 밖에서 실행
+        block_max = self.inverted_index.block_max
+        merged_bm25 = InvertedIndex.merge(bm25_snapshot, block_size=block_max.block_size if block_max is not None else 128)
+        merged_splade = SpladeIndex.merge(splade_snapshot) if splade_snapshot else None
+
+        with self._segments_lock:
+            # 합치는 동안 삭제된 문서는 새 인덱스에서도 삭제
+            for index, before in zip(bm25_snapshot + splade_snapshot, deleted_snapshot):
+                if index.deleted is None:
+                    continue
+                newly_deleted = index.deleted if before is None else index.deleted & ~before
+                target = merged_bm25 if isinstance(index, InvertedIndex) else merged_splade
+                for doc_ord in np.flatnonzero(newly_deleted).tolist():
+                    target.delete_document(index.doc_ids[doc_ord])
+
+            # 합치는 동안 추가된 segment는 그대로 남김
+            self.inverted_index = merged_bm25
+            self.bm25_segments = self.bm25_segments[len(bm25_snapshot) - 1:]
+            if merged_splade is not None:
+                self.splade_index = merged_splade
+                self.splade_segments = self.splade_segments[len(splade_snapshot) - 1:]
+        self._index_changed()
 
     def save(self):
+        version = self.index_version
         self.inverted_index.save(self.index_path)
+        self._save_segments(self.bm25_segments, os.path.join(self.index_path, "segments"))
 
-        if self.splade_index.matrix is not None:
+        if self.splade_index.is_built:
             self.splade_index.save(self.splade_index_path)
+            self._save_segments(self.splade_segments, os.path.join(self.splade_index_path, "segments"))
 
-        with open(self.titles_path, 'wb') as f:
-            pickle.dump(self.titles, f)
+        titles = self.titles
+        if not isinstance(titles, StringMap):
+            titles = StringMap.from_dict(titles)
+        titles.save(self.titles_path)
+        self._saved_version = version
 
-    def load(self) -> bool:
+    def _save_segments(self, segments: list, path: str):
+        # segment는 <인덱스 경로>/segments/0000, 0001, ... 에 순서대로 저장
+        for i, segment in enumerate(segments):
+            segment.save(os.path.join(path, f"{i:04d}"))
+
+        # merge 등으로 없어진 segment 디렉토리 정리
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                if not name.isdigit() or int(name) >= len(segments):
+                    shutil.rmtree(os.path.join(path, name))
+
+    def _load_segments(self, factory, path: str) -> list:
+        if not os.path.isdir(path):
+            return []
+        segments = []
+        for name in sorted(name for name in os.listdir(path) if name.isdigit()):
+            segment = factory()
+            if segment.load(os.path.join(path, name)):
+                segments.append(segment)
+        return segments
+
+    def _load_bm25(self) -> bool:
         bm25_loaded = self.inverted_index.load(self.index_path)
+        fast_tokenizer = self.inverted_index.tokenizer.fast
+        self.bm25_segments = self._load_segments(lambda: InvertedIndex(fast_tokenizer=fast_tokenizer), os.path.join(self.index_path, "segments"))
+        return bm25_loaded
+
+    def load(self) -> bool:
+        bm25_loaded = self._load_bm25()
 
         splade_loaded = self.splade_index.load(self.splade_index_path)
+        self.splade_segments = self._load_segments(SpladeIndex, os.path.join(self.splade_index_path, "segments"))
         
-        if os.path.exists(self.titles_path):
-            with open(self.titles_path, 'rb') as f:
-                self.titles = pickle.load(f)
+        if has_header(self.titles_path):
+            self.titles = StringMap.load(self.titles_path)
+
+        # 다시 로드하면 cache에 있는 결과는 더 이상 사용하지 않음
+        self._index_changed()
+        self._saved_version = self.index_version
         
         return bm25_loaded or splade_loaded
+
+
+def _timed(fn, *args):
+    # (fn(*args) 결과, 걸린 시간(초))
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+# 프로세스 풀 worker마다 한 번만 로드해서 재사용하는 엔진
+_worker_engine: SearchEngine = None
+
+
+def _init_bm25_worker(engine_args: dict):
+    # BM25 인덱스(+ segment, tombstone)만 로드
+    global _worker_engine
+    _worker_engine = SearchEngine(**engine_args)
+    if not _worker_engine._load_bm25():
+        raise ValueError(f"{engine_args['index_path']}: 인덱스를 로드할 수 없습니다.")
+
+
+def _bm25_candidates_in_worker(queries: List[str], top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    return _worker_engine._bm25_candidates_batch(queries, top_k, _worker_engine._bm25_indexes(), chunk_size=len(queries))
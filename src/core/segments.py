@@ -0,0 +1,35 @@
+import numpy as np
+from collections.abc import Sequence
+from typing import Iterator, List
+
+# 여러 segment의 문서 번호를 하나로 이어서 사용하기 위한 도우미
+# segment i의 문서 번호 d는 전체 번호 doc_offsets[i] + d가 됨
+# (segment는 추가된 순서대로 이어지므로, 남은 문서로 처음부터 빌드했을 때와 같은 순서)
+
+
+def doc_offsets(segment_sizes: List[int]) -> np.ndarray:
+    offsets = np.zeros(len(segment_sizes) + 1, dtype=np.int64)
+    np.cumsum(segment_sizes, out=offsets[1:])
+    return offsets
+
+
+# segment별 doc_id 테이블을 전체 문서 번호로 조회하는 읽기 전용 view
+class SegmentDocIds(Sequence):
+    def __init__(self, tables: List[Sequence]):
+        self.tables = tables
+        self.offsets = doc_offsets([len(table) for table in tables])
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        segment = int(np.searchsorted(self.offsets, i, side='right')) - 1
+        return self.tables[segment][i - int(self.offsets[segment])]
+
+    def __iter__(self) -> Iterator[str]:
+        for table in self.tables:
+            yield from table
@@ -0,0 +1,121 @@
+import html
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+
+# 검색 결과의 snippet 생성과 하이라이트
+# - preview: 문서 앞부분 (인덱싱할 때 문서 저장소에 미리 저장, 쿼리 단어가 본문에 없을 때 사용)
+# - 쿼리 단어가 있으면 BM25 인덱스의 토큰 위치로 쿼리 단어가 가장 많이 모인 구간을 골라서 보여줌
+#   토큰 위치 -> 원문 문자 위치는 인덱싱할 때 ANCHOR_STRIDE 토큰마다 저장한 anchor로 변환
+PREVIEW_LENGTH = 300
+PASSAGE_TOKENS = 40
+ANCHOR_STRIDE = 8
+
+# 불용어(stopwords) 목록 - 하이라이트에서 제외
+STOPWORDS = {
+    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your',
+    'yours', 'yourself', 'yourselves', 'he', 'him', 'his', 'himself', 'she',
+    'her', 'hers', 'herself', 'it', 'its', 'itself', 'they', 'them', 'their',
+    'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this', 'that',
+    'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an',
+    'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 'while', 'of',
+    'at', 'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through',
+    'during', 'before', 'after', 'above', 'below', 'to', 'from', 'up', 'down',
+    'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then',
+    'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'each',
+    'few', 'more', 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only',
+    'own', 'same', 'so', 'than', 'too', 'very', 's', 't', 'can', 'will', 'just',
+    'don', 'should', 'now', 'want', 'would', 'could'
+}
+
+
+def make_preview(text: str, length: int = PREVIEW_LENGTH) -> str:
+    # 문서 앞부분 length자 (단어 중간에서 자르지 않음)
+    if len(text) <= length:
+        return text
+    cut = text.rfind(' ', 0, length + 1)
+    return text[:cut if cut > 0 else length] + "..."
+
+
+def best_window(positions: Sequence[np.ndarray], window: int = PASSAGE_TOKENS) -> Optional[int]:
+    # positions[t]: 쿼리 term t가 등장한 토큰 위치
+    # window 토큰 안에 서로 다른 term이 가장 많이 (같으면 등장 횟수가 많이) 들어가는 구간의 첫 등장 위치
+    # (같으면 앞쪽 구간), 등장한 term이 없으면 None
+    events = sorted((int(pos), t) for t, term_positions in enumerate(positions) for pos in term_positions)
+    if not events:
+        return None
+
+    counts = defaultdict(int)
+    best_score, best_start = None, None
+    left = 0
+    for right, (pos, t) in enumerate(events):
+        counts[t] += 1
+        while events[left][0] <= pos - window:
+            left_term = events[left][1]
+            counts[left_term] -= 1
+            if counts[left_term] == 0:
+                del counts[left_term]
+            left += 1
+
+        score = (len(counts), right - left + 1)
+        if best_score is None or score > best_score:
+            best_score, best_start = score, events[left][0]
+    return best_start
+
+
+def make_snippet(text: str, positions: Sequence[np.ndarray], anchors: np.ndarray, token_base: int = 0, length: int = PREVIEW_LENGTH, num_tokens: Optional[int] = None) -> str:
+    # 쿼리 단어가 가장 많이 모인 구간부터 length자
+    # positions: 쿼리 term별 토큰 위치 (인덱싱한 텍스트 기준), token_base: 본문 앞에 붙여서 인덱싱한 토큰(제목 등) 수
+    # num_tokens: 본문 토큰 수 (본문 뒤에 붙여서 인덱싱한 토큰(생성된 쿼리 등)의 위치는 무시, 본문에 없으면 preview)
+    end_token = token_base + num_tokens if num_tokens is not None else np.iinfo(np.int64).max
+    body_positions = [
+        term_positions[(term_positions >= token_base) & (term_positions < end_token)] - token_base
+        for term_positions in positions
+    ]
+    start_token = best_window(body_positions)
+    if start_token is None or len(anchors) == 0:
+        return make_preview(text, length)
+
+    start = int(anchors[min(start_token // ANCHOR_STRIDE, len(anchors) - 1)])
+    if len(text) - start < length:
+        # 문서 끝부분이면 앞으로 당겨서 length자를 채움
+        start = max(0, len(text) - length)
+        if start > 0:
+            start = text.find(' ', start) + 1
+    end = start + length
+    if end < len(text):
+        cut = text.rfind(' ', start, end + 1)
+        end = cut if cut > start else end
+
+    return ("..." if start > 0 else "") + text[start:end] + ("..." if end < len(text) else "")
+
+
+@lru_cache(maxsize=1024)
+def highlight_pattern(query: str) -> Optional[re.Pattern]:
+    # 쿼리의 하이라이트할 단어를 하나로 합친 정규식 (쿼리마다 한 번만 compile)
+    terms = [t for t in dict.fromkeys(query.lower().split()) if t not in STOPWORDS and len(t) > 2]
+    if not terms:
+        return None
+    # 앞부분이 같은 단어가 있으면 긴 단어가 먼저 매칭되도록 정렬
+    terms.sort(key=len, reverse=True)
+    return re.compile(r'\b(' + '|'.join(map(re.escape, terms)) + r')\b', re.IGNORECASE)
+
+
+def highlight_text(text: str, query: str) -> str:
+    # HTML escape 후 쿼리 단어를 <mark>로 감싼 문자열 (한 번의 탐색으로 모든 단어를 처리)
+    pattern = highlight_pattern(query) if query else None
+    if pattern is None:
+        return html.escape(text)
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    return "".join(parts)
@@ -1,93 +1,458 @@
 import numpy as np
 import scipy.sparse as sp
-import pickle
 import os
-from typing import List, Dict, Tuple
+import shutil
+import tempfile
+import threading
+from typing import List, Dict, Optional, Tuple
+from .storage import StringTable, has_header, write_header, read_header, save_array, load_array
+from .topk import top_k_order
 
-# CSC 형태로 저장
-# 또한 데이터는 npz로, 문서 ID는 pkl로 저장
-# 이를 통해 저장 공간을 절약할 수 있음
+# 검색 모드
+# - "exact": 쿼리의 모든 term으로 전체 내적을 계산
+# - "safe": MaxScore 방식으로 top-k에 영향을 줄 수 없는 계산을 생략 (exact와 같은 top-k)
+# - "approx": top-k 후보가 더 이상 바뀔 수 없다고 판단되면 남은 term을 모두 생략하고,
+#             상한이 작은 term은 처음부터 제외 (recall을 조금 잃는 대신 더 빠름)
+SEARCH_MODES = ("exact", "safe", "approx")
+
+# 상한 비교에서 부동소수점 오차로 문서를 잘못 제외하지 않도록 주는 여유
+UPPER_BOUND_SLACK = 1 + 1e-9
+
+# 빌드 버퍼에서 posting 하나가 차지하는 크기 (문서 번호 int32 + 단어 번호 int32 + 점수 int16)
+POSTING_BYTES = 4 + 4 + 2
+
+# 단어(vocab id)별 posting 구조로 저장 (CSC와 같은 배열 구성)
+#   offsets[v] ~ offsets[v+1]: 단어 v의 posting 구간
+#   docs[i]: 문서 번호 (구간 안에서 오름차순), impacts[i]: 양자화된 점수
+# 로드할 때는 mmap으로 열어서 복사 없이 사용하고, 여러 프로세스가 같은 page cache를 공유
+# 검색 시에는 쿼리 단어의 구간을 view로 읽기만 하므로 점수 버퍼 외에 행렬을 새로 만들지 않음
+# (점수 버퍼도 thread마다 하나를 만들어서 재사용)
 class SpladeIndex:
-    def __init__(self, vocab_size: int = 30522):
+    def __init__(self, vocab_size: int = 30522, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None):
         self.vocab_size = vocab_size
         self.doc_ids: List[str] = []
-        
-        # 행렬 구성을 위한 임시 버퍼
-        self.rows = [] # 문서 ID 인덱스
-        self.cols = [] # 단어 ID 인덱스
-        self.data = []
-        self.matrix = None
+
+        # 빌드용 버퍼: 배치마다 (문서 번호, 단어 번호, 점수) 배열을 쌓아둠
+        # memory_budget(byte)를 넘으면 (단어, 문서) 순으로 정렬한 segment를 spill_dir에 기록하고 버퍼를 비움
+        # memory_budget이 None이면 디스크에 쓰지 않고 메모리에서만 빌드
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._buffer: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._buffer_postings = 0
+        self._segments: List[str] = []
+        self._owns_spill_dir = False
+
+        self.offsets: np.ndarray = None
+        self.docs: np.ndarray = None
+        self.impacts: np.ndarray = None
+        self.col_max: np.ndarray = None # 단어(열)별 최대 양자화 점수 - pruning의 상한
+
+        # 삭제된 문서 표시 (tombstone, 문서 번호 순서의 bool 배열 - 삭제가 없으면 None)
+        self.deleted: np.ndarray = None
+
+        # thread별 검색 버퍼 (_scratch_buffers 참고)
+        self._scratch = threading.local()
+
+    @property
+    def is_built(self) -> bool:
+        return self.offsets is not None
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def num_deleted(self) -> int:
+        return int(np.count_nonzero(self.deleted)) if self.deleted is not None else 0
+
+    def delete_document(self, doc_id: str) -> bool:
+        # 문서를 tombstone으로 표시 (삭제된 문서가 있었으면 True)
+        if not self.is_built:
+            raise ValueError("인덱스가 빌드되지 않았습니다.")
+        doc_ord = self.doc_ids.index_of(doc_id)
+        if doc_ord < 0 or (self.deleted is not None and self.deleted[doc_ord]):
+            return False
+
+        if self.deleted is None:
+            self.deleted = np.zeros(self.num_docs, dtype=bool)
+        self.deleted[doc_ord] = True
+        return True
+
+    @property
+    def matrix(self) -> sp.csc_matrix:
+        # 디버깅/호환용 CSC 행렬 view (배열을 복사하지 않음)
+        if not self.is_built:
+            return None
+        return sp.csc_matrix((self.impacts, self.docs, self.offsets), shape=(self.num_docs, self.vocab_size), copy=False)
 
     def add_batch(self, doc_ids: List[str], indices_list: List[np.ndarray], values_list: List[np.ndarray]):
         start_doc_idx = len(self.doc_ids)
         self.doc_ids.extend(doc_ids)
-        
-        for i, (indices, values) in enumerate(zip(indices_list, values_list)):
-            current_doc_idx = start_doc_idx + i
 
-            # quantization 적용: float16 -> int16
-            # 속도를 향상시킬 수 있음
-            quantized_values = (values * 100).astype(np.int16)
+        if len(indices_list) == 0:
+            return
 
-            self.rows.extend([current_doc_idx] * len(indices)) # [문서1, 문서2 ...]
-            self.cols.extend(indices) # [단어1, 단어2 ...]
-            self.data.extend(quantized_values) # [점수, 점수 ...]
+        # quantization 적용: float16 -> int16
+        # 속도를 향상시킬 수 있음
+        quantized_values = [(values * 100).astype(np.int16) for values in values_list]
+        lengths = [len(indices) for indices in indices_list]
 
-    def build(self):
-        # Compressed Sparse Column(CSC): 데이터 마이닝때 배운 방법 
-        # 이렇게 하면 크기를 줄일 수 있음
-        num_docs = len(self.doc_ids)
-        
-        self.matrix = sp.csc_matrix(
-            (self.data, (self.rows, self.cols)), 
-            shape=(num_docs, self.vocab_size),
-            dtype=np.int16
-        )
-        
-        self.rows = []
-        self.cols = []
-        self.data = []
+        rows = np.repeat(np.arange(start_doc_idx, start_doc_idx + len(lengths), dtype=np.int32), lengths) # [문서1, 문서2 ...]
+        cols = np.concatenate(indices_list).astype(np.int32) # [단어1, 단어2 ...]
+        data = np.concatenate(quantized_values) # [점수, 점수 ...]
+
+        self._buffer.append((rows, cols, data))
+        self._buffer_postings += len(rows)
+
+        if self.memory_budget is not None and self._buffer_postings * POSTING_BYTES >= self.memory_budget:
+            self._spill()
+
+    def _take_buffer(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # 버퍼를 (단어, 문서) 순으로 정렬해서 꺼냄
+        if self._buffer:
+            rows, cols, data = (np.concatenate(parts) for parts in zip(*self._buffer))
+        else:
+            rows = np.zeros(0, dtype=np.int32)
+            cols = np.zeros(0, dtype=np.int32)
+            data = np.zeros(0, dtype=np.int16)
+        self._buffer = []
+        self._buffer_postings = 0
+
+        if len(cols) > 0 and (cols.min() < 0 or cols.max() >= self.vocab_size):
+            raise ValueError(f"단어 번호가 vocab_size({self.vocab_size}) 범위를 벗어났습니다.")
+
+        order = np.lexsort((rows, cols))
+        return rows[order], cols[order], data[order]
+
+    def _spill(self):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="splade_segments_")
+            self._owns_spill_dir = True
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+        rows, cols, data = self._take_buffer()
+        name = f"segment_{len(self._segments)}"
+        # segment 안의 단어별 posting 수만 저장하면 단어 번호 배열은 필요 없음
+        save_array(self.spill_dir, f"{name}.docs", rows)
+        save_array(self.spill_dir, f"{name}.counts", np.bincount(cols, minlength=self.vocab_size).astype(np.int64))
+        save_array(self.spill_dir, f"{name}.impacts", data)
+        self._segments.append(name)
+
+    def build(self, path: Optional[str] = None):
+        # 버퍼와 segment들을 단어별 posting 배열로 합침
+        # Compressed Sparse Column(CSC)과 같은 구성: 데이터 마이닝때 배운 방법
+        # path를 주면 최종 배열을 path에 직접 mmap으로 기록하고 저장까지 마침 (save를 따로 부를 필요 없음)
+        # segment는 문서 순서대로 만들어지므로, 단어별로 segment 순서대로 이어 붙이면 문서 번호가 정렬된 상태가 됨
+        if self._buffer and self._segments:
+            self._spill()
+
+        if self._segments:
+            counts = np.zeros(self.vocab_size, dtype=np.int64)
+            for name in self._segments:
+                counts += load_array(self.spill_dir, f"{name}.counts")
+        else:
+            rows, cols, data = self._take_buffer()
+            counts = np.bincount(cols, minlength=self.vocab_size).astype(np.int64)
+
+        offsets = np.zeros(self.vocab_size + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        nnz = int(offsets[-1])
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+            docs = np.lib.format.open_memmap(os.path.join(path, "indices.tmp.npy"), mode='w+', dtype=np.int32, shape=(nnz,))
+            impacts = np.lib.format.open_memmap(os.path.join(path, "data.tmp.npy"), mode='w+', dtype=np.int16, shape=(nnz,))
+        else:
+            docs = np.empty(nnz, dtype=np.int32)
+            impacts = np.empty(nnz, dtype=np.int16)
+
+        if self._segments:
+            # segment마다 단어별 구간을 최종 배열의 (단어 시작 위치 + 이미 채운 개수) 위치에 흩뿌림
+            written = offsets[:-1].copy()
+            for name in self._segments:
+                seg_counts = load_array(self.spill_dir, f"{name}.counts")
+                seg_starts = np.zeros(self.vocab_size + 1, dtype=np.int64)
+                np.cumsum(seg_counts, out=seg_starts[1:])
+                seg_cols = np.repeat(np.arange(self.vocab_size), seg_counts)
+                positions = written[seg_cols] + (np.arange(len(seg_cols)) - seg_starts[seg_cols])
+
+                docs[positions] = load_array(self.spill_dir, f"{name}.docs")
+                impacts[positions] = load_array(self.spill_dir, f"{name}.impacts")
+                written += seg_counts
+            self._remove_segments()
+        else:
+            docs[:] = rows
+            impacts[:] = data
+
+        self.offsets = offsets
+        self.docs = docs
+        self.impacts = impacts
+        self.col_max = self._compute_col_max()
+        self.doc_ids = StringTable.from_strings(self.doc_ids)
+
+        if path is not None:
+            docs.flush()
+            impacts.flush()
+            os.replace(os.path.join(path, "indices.tmp.npy"), os.path.join(path, "indices.npy"))
+            os.replace(os.path.join(path, "data.tmp.npy"), os.path.join(path, "data.npy"))
+            save_array(path, "indptr", self.offsets)
+            self._save_metadata(path)
 
+    def _remove_segments(self):
+        for name in self._segments:
+            for part in ("docs", "counts", "impacts"):
+                os.remove(os.path.join(self.spill_dir, f"{name}.{part}.npy"))
+        self._segments = []
+        if self._owns_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self._owns_spill_dir = False
 
-    def search(self, query_vec: Dict[int, float]) -> Dict[str, float]:
+    @classmethod
+    def merge(cls, indexes: List["SpladeIndex"]) -> "SpladeIndex":
+        # 여러 segment의 남아있는 문서만 순서대로 모아서 새 인덱스를 만듦
+        # (남은 문서로 처음부터 빌드한 인덱스와 같은 배열)
+        vocab_size = indexes[0].vocab_size
+        parts = []
+        for index in indexes:
+            docs = np.asarray(index.docs)
+            impacts = np.asarray(index.impacts)
+            cols = np.repeat(np.arange(vocab_size), np.diff(np.asarray(index.offsets)))
+            doc_ids = list(index.doc_ids)
+            if index.deleted is not None:
+                keep = ~index.deleted
+                posting_keep = keep[docs]
+                docs = (np.cumsum(keep) - 1)[docs[posting_keep]]
+                impacts = impacts[posting_keep]
+                cols = cols[posting_keep]
+                doc_ids = [doc_id for doc_id, k in zip(doc_ids, keep.tolist()) if k]
+            parts.append((docs, cols, impacts, doc_ids))
+
+        counts = sum(np.bincount(cols, minlength=vocab_size) for _, cols, _, _ in parts)
+        offsets = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # 단어마다 segment 순서대로 이어 붙임 (segment 안에서는 이미 (단어, 문서) 순서)
+        merged_docs = np.empty(int(offsets[-1]), dtype=np.int32)
+        merged_impacts = np.empty(int(offsets[-1]), dtype=np.int16)
+        written = offsets[:-1].copy()
+        doc_base = 0
+        merged_ids = []
+        for docs, cols, impacts, doc_ids in parts:
+            seg_counts = np.bincount(cols, minlength=vocab_size)
+            seg_starts = np.zeros(vocab_size + 1, dtype=np.int64)
+            np.cumsum(seg_counts, out=seg_starts[1:])
+            positions = written[cols] + (np.arange(len(cols)) - seg_starts[cols])
+            merged_docs[positions] = docs + doc_base
+            merged_impacts[positions] = impacts
+            written += seg_counts
+            doc_base += len(doc_ids)
+            merged_ids.extend(doc_ids)
+
+        merged = cls(vocab_size=vocab_size)
+        merged.doc_ids = StringTable.from_strings(merged_ids)
+        merged.offsets = offsets
+        merged.docs = merged_docs
+        merged.impacts = merged_impacts
+        merged.col_max = merged._compute_col_max()
+        return merged
+
+    def _compute_col_max(self) -> np.ndarray:
+        col_max = np.zeros(len(self.offsets) - 1, dtype=np.int16)
+        non_empty = np.flatnonzero(np.diff(self.offsets) > 0)
+        if len(non_empty) > 0:
+            col_max[non_empty] = np.maximum.reduceat(self.impacts, self.offsets[non_empty])
+        return col_max
+
+
+    def search(self, query_vec: Dict[int, float], top_k: int = 100, mode: str = "exact", term_ratio: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
         # 쿼리 벡터와의 내적을 통해 문서 점수를 계산
-        if self.matrix is None:
+        # 점수 상위 top_k개의 (문서 번호 배열, 점수 배열)을 반환 - doc_id 변환은 호출하는 쪽에서 필요한 만큼만
+        # term_ratio: "approx"에서 상한이 (가장 큰 상한 * term_ratio)보다 작은 term은 제외
+        if not self.is_built:
             raise ValueError("인덱스가 빌드되지 않았습니다.")
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"지원하지 않는 검색 모드입니다: {mode}")
+
+        if mode != "exact":
+            return self._search_pruned(query_vec, top_k, mode == "safe", term_ratio)
             
         # 쿼리의 인덱스와 값 추출
         q_indices = list(query_vec.keys())
         q_values = np.array(list(query_vec.values()))
         
-        sub_matrix = self.matrix[:, q_indices]
-
         # 각 문서에 대해서 점수를 계산 (내적으로)
-        scores = sub_matrix.dot(q_values)
-        
-        relevant_docs = {}
-        non_zero_indices = scores.nonzero()[0]
-        
-        # 양자화된 점수 복원
-        for idx in non_zero_indices:
-            doc_id = self.doc_ids[idx]
-            original_score = scores[idx] / 100.0
-            relevant_docs[doc_id] = float(original_score)
-            
-        return relevant_docs
+        # 쿼리 단어 순서대로 posting 구간을 점수 버퍼에 더함 (sparse 행렬 곱과 같은 순서, 같은 dtype)
+        # 곱셈/더하기 결과는 미리 만든 버퍼에 바로 써서 term마다 임시 배열을 만들지 않음
+        scores, products, touched = self._scratch_buffers(np.result_type(self.impacts.dtype, q_values.dtype))
+        try:
+            for col, weight in zip(q_indices, q_values):
+                start, end = int(self.offsets[col]), int(self.offsets[col + 1])
+                np.multiply(self.impacts[start:end], weight, out=products[:end - start])
+                np.add.at(scores, self.docs[start:end], products[:end - start])
+
+            if self.deleted is not None:
+                scores[self.deleted] = 0
+
+            # 양자화된 점수 복원 후 상위 top_k개 선택 (동점이면 문서 번호 순서)
+            # (float 배열에 바로 flatnonzero를 쓰는 것보다 bool 버퍼를 거치는 쪽이 빠름)
+            non_zero_indices = np.flatnonzero(np.not_equal(scores, 0, out=touched))
+            original_scores = scores[non_zero_indices] / 100.0
+            # 다음 검색을 위해 점수가 생긴 위치만 0으로 되돌림
+            scores[non_zero_indices] = 0
+        except BaseException:
+            scores.fill(0)
+            raise
+
+        order = top_k_order(original_scores, top_k)
+        return non_zero_indices[order], original_scores[order]
+
+    def _scratch_buffers(self, dtype: np.dtype) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # 현재 thread가 재사용하는 (문서 수 크기의 점수 버퍼, 가장 긴 posting 구간 크기의 곱셈 버퍼, 문서 수 크기의 bool 버퍼)
+        # 점수 버퍼는 항상 0인 상태로 돌려받음 (인덱스 배열이 바뀌면 새로 만듦)
+        scratch = self._scratch
+        if getattr(scratch, "offsets", None) is not self.offsets or scratch.scores.dtype != dtype:
+            max_postings = int(np.diff(self.offsets).max()) if len(self.offsets) > 1 else 0
+            scratch.offsets = self.offsets
+            scratch.scores = np.zeros(self.num_docs, dtype=dtype)
+            scratch.products = np.empty(max_postings, dtype=dtype)
+            scratch.touched = np.empty(self.num_docs, dtype=bool)
+        return scratch.scores, scratch.products, scratch.touched
+
+    def _search_pruned(self, query_vec: Dict[int, float], top_k: int, safe: bool, term_ratio: float):
+        # MaxScore 방식의 term-at-a-time 검색
+        # 1. 쿼리 term을 상한(쿼리 가중치 * 열의 최대 점수)이 큰 순서로 처리
+        # 2. 남은 term들의 상한 합(remaining)이 현재 k번째 점수(threshold)보다 작아지면
+        #    아직 점수가 없는 문서는 top-k에 들어갈 수 없으므로
+        #    - safe: 이미 후보인 문서들에 대해서만 남은 term 점수를 더함
+        #    - approx: 남은 term을 모두 생략
+        # 3. safe: top-k에 들 수 있는 문서만 exact와 같은 dtype, 같은 term 순서로 다시 계산 (점수까지 exact와 같음)
+        if self.col_max is None:
+            self.col_max = self._compute_col_max()
+
+        num_docs = self.num_docs
+        cols = np.array(list(query_vec.keys()), dtype=np.int64)
+        weights = np.array(list(query_vec.values()), dtype=np.float64)
+        bounds = weights * self.col_max[cols]
+
+        order = np.argsort(-bounds, kind="stable")
+        if not safe and len(order) > 0 and term_ratio > 0:
+            order = order[bounds[order] >= bounds[order[0]] * term_ratio]
+        # remaining[i]: i번째 이후(포함하지 않음) term들의 상한 합
+        remaining = (np.cumsum(bounds[order][::-1])[::-1] - bounds[order]) * UPPER_BOUND_SLACK
 
-    def save(self, path_prefix: str):
-        # 인덱스는 npz로 저장하고, 문서 ID는 pkl로 저장
-        os.makedirs(os.path.dirname(path_prefix), exist_ok=True)
-        sp.save_npz(f"{path_prefix}.npz", self.matrix)
-        with open(f"{path_prefix}_ids.pkl", 'wb') as f:
-            pickle.dump(self.doc_ids, f)
+        scores = np.zeros(num_docs, dtype=np.float64)
+        best = 0.0
+        candidates = None
+        # 삭제된 문서는 점수를 0으로 되돌려서 threshold 계산과 후보에서 제외
+        deleted = np.flatnonzero(self.deleted) if self.deleted is not None else None
 
-    def load(self, path_prefix: str) -> bool:
-        if not os.path.exists(f"{path_prefix}.npz"):
+        for i, j in enumerate(order):
+            col, weight = cols[j], weights[j]
+            start, end = self.offsets[col], self.offsets[col + 1]
+            rows = self.docs[start:end]
+            values = self.impacts[start:end]
+
+            if candidates is None:
+                scores[rows] += values * weight
+                if deleted is not None:
+                    scores[deleted] = 0
+                if len(rows) > 0:
+                    best = max(best, float(scores[rows].max()))
+            else:
+                # 후보 문서만 이진 탐색으로 찾아서 더함
+                pos = np.searchsorted(rows, candidates)
+                found = pos < len(rows)
+                found[found] = rows[pos[found]] == candidates[found]
+                scores[candidates[found]] += values[pos[found]] * weight
+                continue
+
+            # 가장 높은 점수도 남은 상한보다 작으면 threshold를 계산할 필요 없음
+            if remaining[i] >= best or top_k >= num_docs:
+                continue
+            threshold = np.partition(scores, num_docs - top_k)[num_docs - top_k]
+            if threshold <= 0 or remaining[i] >= threshold:
+                continue
+
+            if not safe:
+                break
+            candidates = np.flatnonzero(scores + remaining[i] >= threshold)
+
+        pool = np.flatnonzero(scores) if candidates is None else candidates[scores[candidates] > 0]
+        if deleted is not None:
+            pool = pool[~self.deleted[pool]]
+        if not safe:
+            top = pool[top_k_order(scores[pool], top_k)]
+            return top, scores[top] / 100.0
+
+        # 후보(점수 계산이 끝난 문서) 중 k번째 점수 근처까지만 다시 계산
+        # 합산 순서에 따른 오차(term 수 * epsilon * 상한 합)만큼 여유를 둠
+        q_values = np.array(list(query_vec.values()))
+        dtype = np.result_type(self.impacts.dtype, q_values.dtype)
+        if len(pool) > top_k:
+            kth = np.partition(scores[pool], len(pool) - top_k)[len(pool) - top_k]
+            margin = 2 * (len(cols) + 1) * np.finfo(dtype).eps * float(bounds.sum())
+            pool = pool[scores[pool] >= kth - margin]
+
+        final = np.zeros(len(pool), dtype=dtype)
+        for col, weight in zip(cols.tolist(), q_values):
+            start, end = self.offsets[col], self.offsets[col + 1]
+            rows = self.docs[start:end]
+            pos = np.searchsorted(rows, pool)
+            found = pos < len(rows)
+            found[found] = rows[pos[found]] == pool[found]
+            final[found] += self.impacts[start:end][pos[found]] * weight
+
+        # 양자화된 점수 복원 후 상위 top_k개 선택 (동점이면 문서 번호 순서)
+        non_zero = np.flatnonzero(final)
+        pool, final = pool[non_zero], final[non_zero] / 100.0
+        top = top_k_order(final, top_k)
+        return pool[top], final[top]
+
+    def save(self, path: str):
+        # path는 디렉토리 (header.json + posting 배열 + 문서 ID 테이블)
+        # 배열 파일 이름은 CSC 구성 요소 이름(data, indices, indptr)을 그대로 사용
+        os.makedirs(path, exist_ok=True)
+
+        save_array(path, "data", self.impacts)
+        save_array(path, "indices", self.docs)
+        save_array(path, "indptr", self.offsets)
+        self._save_metadata(path)
+
+    def _save_metadata(self, path: str):
+        if self.col_max is None:
+            self.col_max = self._compute_col_max()
+        save_array(path, "col_max", self.col_max)
+
+        # tombstone은 bitmap으로 저장 (삭제가 없으면 예전 파일을 지움)
+        deleted_path = os.path.join(path, "deleted.npy")
+        if self.num_deleted > 0:
+            save_array(path, "deleted", np.packbits(self.deleted))
+        elif os.path.exists(deleted_path):
+            os.remove(deleted_path)
+
+        doc_ids = self.doc_ids
+        if not isinstance(doc_ids, StringTable):
+            doc_ids = StringTable.from_strings(doc_ids)
+        doc_ids.save(path, "doc_ids")
+
+        write_header(path, "splade", num_docs=self.num_docs, vocab_size=self.vocab_size, nnz=len(self.docs), num_deleted=self.num_deleted)
+
+    def load(self, path: str) -> bool:
+        if not has_header(path):
             return False
 
-        self.matrix = sp.load_npz(f"{path_prefix}.npz")
-        
-        with open(f"{path_prefix}_ids.pkl", 'rb') as f:
-            self.doc_ids = pickle.load(f)
+        header = read_header(path, "splade")
+        self.vocab_size = header["vocab_size"]
+
+        # mmap된 배열을 복사 없이 그대로 사용
+        self.impacts = load_array(path, "data")
+        self.docs = load_array(path, "indices")
+        self.offsets = load_array(path, "indptr")
+        self.doc_ids = StringTable.load(path, "doc_ids")
+        self.col_max = load_array(path, "col_max") if os.path.exists(os.path.join(path, "col_max.npy")) else None
+        self.deleted = None
+        if header.get("num_deleted"):
+            self.deleted = np.unpackbits(load_array(path, "deleted"), count=self.num_docs).astype(bool)
             
         return True
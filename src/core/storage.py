@@ -0,0 +1,177 @@
+import json
+import os
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Optional
+
+# 인덱스 디렉토리 포맷
+#   header.json: 포맷 버전, 인덱스 종류, 통계값
+#   <name>.npy: 배열 (np.load(mmap_mode='r')로 열어서 여러 프로세스가 page cache를 공유)
+# 포맷이 바뀌면 FORMAT_VERSION을 올려서 예전 파일을 잘못 읽지 않도록 함
+FORMAT_VERSION = 1
+HEADER_FILE = "header.json"
+
+
+def has_header(path: str) -> bool:
+    return os.path.exists(os.path.join(path, HEADER_FILE))
+
+
+def write_header(path: str, kind: str, **fields):
+    header = {"format_version": FORMAT_VERSION, "kind": kind}
+    header.update(fields)
+
+    # 헤더는 마지막에 교체해서, 헤더가 있으면 배열도 모두 있다는 것을 보장
+    tmp_path = os.path.join(path, HEADER_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, HEADER_FILE))
+
+
+def read_header(path: str, kind: str) -> dict:
+    with open(os.path.join(path, HEADER_FILE), 'r', encoding='utf-8') as f:
+        header = json.load(f)
+
+    if header.get("kind") != kind:
+        raise ValueError(f"{path}: '{kind}' 인덱스가 아닙니다. (kind={header.get('kind')})")
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: 지원하지 않는 포맷 버전입니다. (version={header.get('format_version')})")
+    return header
+
+
+def save_array(path: str, name: str, array: np.ndarray):
+    # 다른 프로세스가 mmap 중인 파일을 덮어쓰지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = os.path.join(path, f"{name}.tmp.npy")
+    np.save(tmp_path, np.ascontiguousarray(array))
+    os.replace(tmp_path, os.path.join(path, f"{name}.npy"))
+
+
+def load_array(path: str, name: str, mmap: bool = True) -> np.ndarray:
+    array = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+    # np.memmap을 slicing할 때마다 생기는 subclass 오버헤드를 피하기 위해 일반 ndarray view로 사용
+    # (view의 base가 memmap이므로 여전히 파일에 매핑된 메모리를 그대로 사용함)
+    return np.asarray(array)
+
+
+# 문자열 목록을 utf-8 blob + offsets 배열로 저장하는 테이블
+# - table[i]: i번째 문자열
+# - index_of(s): 문자열의 위치 (이진 탐색, 없으면 -1)
+# 정렬되지 않은 목록은 정렬 순서(order)를 함께 저장해서 dict 없이 찾을 수 있게 함
+class StringTable:
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, order: Optional[np.ndarray] = None):
+        self.blob = blob
+        self.offsets = offsets
+        self.order = order
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringTable":
+        encoded = [s.encode('utf-8') for s in strings]
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        # 이미 정렬된 목록(term 사전 등)은 order가 필요 없음
+        order = None
+        if any(encoded[i] > encoded[i + 1] for i in range(len(encoded) - 1)):
+            order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int64)
+
+        return cls(blob, offsets, order)
+
+    def _bytes(self, i: int) -> bytes:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def index_of(self, s: str) -> int:
+        key = s.encode('utf-8')
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = mid if self.order is None else int(self.order[mid])
+            if self._bytes(i) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo == len(self):
+            return -1
+        i = lo if self.order is None else int(self.order[lo])
+        return i if self._bytes(i) == key else -1
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._bytes(i).decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __contains__(self, s: str) -> bool:
+        return self.index_of(s) >= 0
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (StringTable, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    @property
+    def nbytes(self) -> int:
+        order_bytes = self.order.nbytes if self.order is not None else 0
+        return self.blob.nbytes + self.offsets.nbytes + order_bytes
+
+    def save(self, path: str, name: str):
+        save_array(path, f"{name}.blob", self.blob)
+        save_array(path, f"{name}.offsets", self.offsets)
+        # 정렬된 목록이면 예전에 저장한 order 파일을 지움 (남아 있으면 load에서 잘못된 순서를 사용)
+        order_path = os.path.join(path, f"{name}.order.npy")
+        if self.order is not None:
+            save_array(path, f"{name}.order", self.order)
+        elif os.path.exists(order_path):
+            os.remove(order_path)
+
+    @classmethod
+    def load(cls, path: str, name: str) -> "StringTable":
+        order = None
+        if os.path.exists(os.path.join(path, f"{name}.order.npy")):
+            order = load_array(path, f"{name}.order")
+        return cls(load_array(path, f"{name}.blob"), load_array(path, f"{name}.offsets"), order)
+
+
+# doc_id -> 문자열(제목 등) 매핑을 StringTable 두 개로 저장
+class StringMap(Mapping):
+    def __init__(self, keys: StringTable, values: StringTable):
+        self.keys_table = keys
+        self.values_table = values
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "StringMap":
+        return cls(StringTable.from_strings(data.keys()), StringTable.from_strings(data.values()))
+
+    def __getitem__(self, key: str) -> str:
+        i = self.keys_table.index_of(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.values_table[i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys_table)
+
+    def __len__(self) -> int:
+        return len(self.keys_table)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.keys_table.save(path, "keys")
+        self.values_table.save(path, "values")
+        write_header(path, "string_map", size=len(self))
+
+    @classmethod
+    def load(cls, path: str) -> "StringMap":
+        read_header(path, "string_map")
+        return cls(StringTable.load(path, "keys"), StringTable.load(path, "values"))
@@ -1,13 +1,34 @@
 import re
 import nltk
-from typing import List, Dict, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Union
 from nltk.stem import PorterStemmer
 from nltk.corpus import stopwords
 from transformers import AutoTokenizer, PreTrainedTokenizer, PreTrainedTokenizerFast
 
+# 영문자/숫자/공백이 아닌 문자 제거
+NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+WORD = re.compile(r'\S+')
+
+# [a-z0-9\s]만 남은 텍스트에서 nltk.word_tokenize가 공백 split과 다르게 동작하는 경우
+# (NLTKWordTokenizer의 CONTRACTIONS2 규칙 중 따옴표가 없는 것들)
+CONTRACTIONS = {
+    "cannot": ["can", "not"],
+    "gimme": ["gim", "me"],
+    "gonna": ["gon", "na"],
+    "gotta": ["got", "ta"],
+    "lemme": ["lem", "me"],
+    "wanna": ["wan", "na"],
+}
+
 # NLTK based Tokenizer
+# fast=True: nltk.word_tokenize 대신 공백 split + 축약어 규칙을 사용하고 stem 결과를 LRU cache에 저장
+#            (정규화된 텍스트에서는 기본 모드와 같은 토큰을 반환)
 class BM25Tokenizer:
-    def __init__(self):
+    def __init__(self, fast: bool = False, stem_cache_size: int = 1 << 18):
         try:
             nltk.data.find('tokenizers/punkt')
             nltk.data.find('tokenizers/punkt_tab')
@@ -22,12 +43,19 @@ class BM25Tokenizer:
         self.stemmer = PorterStemmer()
         self.stop_words = set(stopwords.words('english'))
 
+        self.fast = fast
+        self._stem_cache_size = stem_cache_size
+        self._stem = lru_cache(maxsize=stem_cache_size)(self.stemmer.stem)
+
     def tokenize(self, text: str) -> List[str]:
         if not text:
             return []
 
         text = text.lower()
-        text = re.sub(r'[^a-z0-9\s]', '', text)        
+        text = NON_ALNUM.sub('', text)
+        if self.fast:
+            return self._tokenize_fast(text)
+
         tokens = nltk.word_tokenize(text)
         
         processed_tokens = [
@@ -38,6 +66,86 @@ class BM25Tokenizer:
         
         return processed_tokens
 
+    def tokenize_batch(self, texts: Iterable[str], batch_size: int = 1000, num_workers: int = 1) -> Iterator[List[str]]:
+        # texts를 batch_size개씩 묶어서 토큰화하고, 입력 순서대로 토큰 목록을 하나씩 내보냄
+        # texts는 generator여도 되고, 처리 중인 batch만 메모리에 올라감
+        # num_workers > 1이면 batch를 프로세스 풀에서 처리 (동시에 처리하는 batch는 num_workers * 2개까지)
+        return self._map_batches("_tokenize_list", texts, batch_size, num_workers)
+
+    def token_offsets_batch(self, texts: Iterable[str], batch_size: int = 1000, num_workers: int = 1) -> Iterator[List[int]]:
+        # texts마다 token_offsets 결과를 입력 순서대로 내보냄 (tokenize_batch와 같은 방식으로 나눠서 처리)
+        return self._map_batches("_token_offsets_list", texts, batch_size, num_workers)
+
+    def _map_batches(self, method: str, texts: Iterable[str], batch_size: int, num_workers: int) -> Iterator[list]:
+        texts = iter(texts)
+        batches = iter(lambda: list(islice(texts, batch_size)), [])
+
+        if num_workers <= 1:
+            for batch in batches:
+                yield from getattr(self, method)(batch)
+            return
+
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.submit(_run_in_worker, method, batch, self.fast))
+                if len(pending) >= num_workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def token_offsets(self, text: str) -> List[int]:
+        # tokenize(text)의 토큰마다 원문에서 해당 단어가 시작하는 문자 위치 (snippet 위치 계산용)
+        # fast 모드와 같은 규칙으로 계산 (정규화된 텍스트에서는 기본 모드와도 같은 토큰 수)
+        offsets = []
+        for match in WORD.finditer(text):
+            word = NON_ALNUM.sub('', match.group().lower())
+            for part in CONTRACTIONS.get(word, [word]) if word else []:
+                if part not in self.stop_words:
+                    offsets.append(match.start())
+        return offsets
+
+    def _tokenize_list(self, texts: List[str]) -> List[List[str]]:
+        return [self.tokenize(text) for text in texts]
+
+    def _token_offsets_list(self, texts: List[str]) -> List[List[int]]:
+        return [self.token_offsets(text) for text in texts]
+
+    def _tokenize_fast(self, text: str) -> List[str]:
+        stem = self._stem
+        stop_words = self.stop_words
+        processed_tokens = []
+        for word in text.split():
+            parts = CONTRACTIONS.get(word)
+            if parts is None:
+                if word not in stop_words:
+                    processed_tokens.append(stem(word))
+                continue
+            for part in parts:
+                if part not in stop_words:
+                    processed_tokens.append(stem(part))
+        return processed_tokens
+
+    def __getstate__(self):
+        # lru_cache로 감싼 함수는 pickle할 수 없으므로 (프로세스 풀로 보낼 때) cache는 빼고 보냄
+        state = self.__dict__.copy()
+        state["_stem"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stem = lru_cache(maxsize=self._stem_cache_size)(self.stemmer.stem)
+
+# 프로세스 풀 worker마다 한 번만 만들어서 재사용하는 tokenizer (stem cache도 유지됨)
+_worker_tokenizers: Dict[bool, BM25Tokenizer] = {}
+
+
+def _run_in_worker(method: str, texts: List[str], fast: bool) -> list:
+    tokenizer = _worker_tokenizers.get(fast)
+    if tokenizer is None:
+        tokenizer = _worker_tokenizers[fast] = BM25Tokenizer(fast=fast)
+    return getattr(tokenizer, method)(texts)
+
 # BERT based Tokenizer
 class SpladeTokenizer:
     def __init__(self, model_name: str = "naver/splade-cocondenser-ensembledistil"):
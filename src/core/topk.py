@@ -0,0 +1,41 @@
+import heapq
+import numpy as np
+from operator import itemgetter
+from typing import Dict, List, Sequence, Tuple, TypeVar
+
+K = TypeVar("K")
+
+# 상위 k개 선택 유틸리티
+# 전체 정렬(sorted(...)[:k]) 대신 필요한 k개만 골라서 정렬함
+# 결과 순서(동점 처리 포함)는 전체 정렬과 동일하게 유지
+
+
+def top_k_order(values: np.ndarray, k: int, tiebreak: Sequence[np.ndarray] = ()) -> np.ndarray:
+    # values 내림차순으로 상위 k개의 위치를 반환
+    # 동점이면 tiebreak 배열들을 앞에서부터 차례로 비교 (작은 값이 먼저)
+    # tiebreak이 없으면 위치가 앞선 값이 먼저 (stable sort와 동일)
+    n = len(values)
+    k = max(0, min(k, n))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    positions = np.arange(n)
+    if k < n:
+        # k번째로 큰 값(threshold)보다 큰 값은 모두 포함,
+        # threshold와 같은 값은 동점 순서대로 남은 자리만큼만 포함
+        threshold = values[np.argpartition(values, n - k)[n - k]]
+        above = np.flatnonzero(values > threshold)
+        tied = np.flatnonzero(values == threshold)
+        keys = tuple(key[tied] for key in reversed(tiebreak))
+        tied = tied[np.lexsort((tied,) + keys)][:k - len(above)]
+        positions = np.concatenate([above, tied])
+
+    keys = tuple(key[positions] for key in reversed(tiebreak))
+    order = np.lexsort((positions,) + keys + (-values[positions],))
+    return positions[order]
+
+
+def top_k_items(scores: Dict[K, float], k: int) -> List[Tuple[K, float]]:
+    # dict에서 점수 상위 k개 (sorted(..., reverse=True)[:k]와 같은 순서)
+    # heapq.nlargest는 동점일 때 먼저 들어온 항목을 앞에 둠
+    return heapq.nlargest(k, scores.items(), key=itemgetter(1))
@@ -0,0 +1,33 @@
+import os
+from typing import Dict, List, Tuple
+
+# TREC run 파일 읽기/쓰기 (한 줄에 "query_id Q0 doc_id rank score tag")
+# 검색 결과를 저장해두면 평가 지표를 바꿔도 다시 검색하지 않고 바로 계산할 수 있음
+Run = Dict[str, List[Tuple[str, float]]]
+
+
+def write_trec_run(path: str, run: Run, tag: str):
+    # run: {query_id: [(doc_id, score), ...]} (리스트 순서가 rank)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for query_id, results in run.items():
+            for rank, (doc_id, score) in enumerate(results, start=1):
+                f.write(f"{query_id} Q0 {doc_id} {rank} {score!r} {tag}\n")
+    os.replace(tmp_path, path)
+
+
+def read_trec_run(path: str) -> Dict[str, Dict[str, float]]:
+    # pytrec_eval에 바로 넘길 수 있는 {query_id: {doc_id: score}}
+    run = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            fields = line.split()
+            if len(fields) != 6:
+                raise ValueError(f"{path}:{line_no}: TREC run 형식이 아닙니다.")
+            query_id, _, doc_id, _, score, _ = fields
+            run.setdefault(query_id, {})[doc_id] = float(score)
+    return run
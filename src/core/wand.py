@@ -0,0 +1,237 @@
+import heapq
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from .compact_index import CompactPostings
+from .storage import save_array, load_array
+
+# WAND / Block-Max WAND (document-at-a-time) 검색
+# 각 term(그리고 term 안의 block)마다 BM25 점수의 상한을 구해서
+# 현재 top-k에 들어갈 수 없는 문서는 점수를 계산하지 않고 건너뜀
+#
+# BM25 가중치 tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))는
+# tf가 클수록, 문서 길이가 짧을수록 커지므로
+# (최대 tf, 최소 문서 길이)만 저장해두면 어떤 k1, b에 대해서도 상한을 계산할 수 있음
+
+# 경계값에서의 부동소수점 오차로 문서를 잘못 건너뛰지 않도록 상한에 여유를 줌
+UPPER_BOUND_SLACK = 1 + 1e-9
+
+
+# term별 posting을 block_size개씩 나눈 block의 메타데이터
+# term t의 block 구간: term_block_offsets[t] ~ term_block_offsets[t+1]
+# block i는 해당 term의 posting [i * block_size, (i + 1) * block_size) 구간
+class BlockMaxIndex:
+    def __init__(self, block_size: int, term_block_offsets: np.ndarray, block_last_doc: np.ndarray, block_max_tf: np.ndarray, block_min_len: np.ndarray):
+        self.block_size = block_size
+        self.term_block_offsets = term_block_offsets
+        self.block_last_doc = block_last_doc
+        self.block_max_tf = block_max_tf
+        self.block_min_len = block_min_len
+
+    @classmethod
+    def build(cls, postings: CompactPostings, doc_len_array: np.ndarray, block_size: int = 128) -> "BlockMaxIndex":
+        term_offsets = np.asarray(postings.term_offsets)
+        dfs = np.diff(term_offsets)
+        num_blocks = (dfs + block_size - 1) // block_size
+
+        term_block_offsets = np.zeros(len(dfs) + 1, dtype=np.int64)
+        np.cumsum(num_blocks, out=term_block_offsets[1:])
+        total_blocks = int(term_block_offsets[-1])
+
+        if total_blocks == 0:
+            empty = np.zeros(0, dtype=np.int32)
+            return cls(block_size, term_block_offsets, empty, empty, empty)
+
+        # block마다 시작 posting 위치 계산
+        block_term = np.repeat(np.arange(len(dfs)), num_blocks)
+        within = np.arange(total_blocks) - term_block_offsets[:-1][block_term]
+        starts = term_offsets[block_term] + within * block_size
+        ends = np.minimum(starts + block_size, term_offsets[block_term + 1])
+
+        # block들이 posting 배열을 빈틈없이 덮으므로 reduceat으로 한 번에 계산
+        block_max_tf = np.maximum.reduceat(postings.tfs, starts).astype(np.int32)
+        block_min_len = np.minimum.reduceat(doc_len_array[postings.docs], starts).astype(np.int32)
+        block_last_doc = np.asarray(postings.docs[ends - 1], dtype=np.int32)
+
+        return cls(block_size, term_block_offsets, block_last_doc, block_max_tf, block_min_len)
+
+    def save(self, path: str):
+        save_array(path, "block_offsets", self.term_block_offsets)
+        save_array(path, "block_last_doc", self.block_last_doc)
+        save_array(path, "block_max_tf", self.block_max_tf)
+        save_array(path, "block_min_len", self.block_min_len)
+
+    @classmethod
+    def load(cls, path: str, block_size: int) -> "BlockMaxIndex":
+        return cls(
+            block_size,
+            load_array(path, "block_offsets"),
+            load_array(path, "block_last_doc"),
+            load_array(path, "block_max_tf"),
+            load_array(path, "block_min_len"),
+        )
+
+
+class _TermCursor:
+    # 한 term의 posting 위에서 움직이는 커서
+    def __init__(self, term_id: int, postings: CompactPostings, block_max: BlockMaxIndex, idf: float, token_indices: List[int], block_bounds: np.ndarray):
+        self.start = int(postings.term_offsets[term_id])
+        self.end = int(postings.term_offsets[term_id + 1])
+        self.pos = self.start
+        self.docs = postings.docs
+        self.tfs = postings.tfs
+
+        self.block_start = int(block_max.term_block_offsets[term_id])
+        self.block_last_doc = block_max.block_last_doc[self.block_start:self.block_start + len(block_bounds)]
+        self.block_size = block_max.block_size
+
+        self.idf = idf
+        # 같은 term이 쿼리에 여러 번 나오면 그만큼 점수가 더해짐
+        self.token_indices = token_indices
+        self.block_bounds = block_bounds * len(token_indices) * UPPER_BOUND_SLACK
+        self.upper_bound = float(self.block_bounds.max())
+        self.doc = int(self.docs[self.pos])
+
+    def next(self):
+        self.pos += 1
+        self.doc = int(self.docs[self.pos]) if self.pos < self.end else None
+
+    def next_geq(self, target: int):
+        # target 이상인 첫 문서로 이동 (블록 단위로 먼저 건너뛴 뒤 block 안에서 탐색)
+        if self.doc is None or self.doc >= target:
+            return
+        block = int(np.searchsorted(self.block_last_doc, target))
+        if block >= len(self.block_last_doc):
+            self.pos = self.end
+            self.doc = None
+            return
+        lo = max(self.pos, self.start + block * self.block_size)
+        hi = min(self.end, self.start + (block + 1) * self.block_size)
+        self.pos = lo + int(np.searchsorted(self.docs[lo:hi], target))
+        self.doc = int(self.docs[self.pos])
+
+    def block_bound(self, target: int) -> Tuple[float, int]:
+        # target이 들어있을 수 있는 block의 상한과 그 block의 마지막 문서
+        block = int(np.searchsorted(self.block_last_doc, target))
+        if block >= len(self.block_last_doc):
+            return 0.0, None
+        return float(self.block_bounds[block]), int(self.block_last_doc[block])
+
+
+def wand_top_k(
+    postings: CompactPostings,
+    block_max: BlockMaxIndex,
+    query_tokens: List[str],
+    top_k: int,
+    idf: Callable[[int], float],
+    norm: np.ndarray,
+    k1: float,
+    b: float,
+    avg_doc_len: float,
+    use_block_max: bool = True,
+    stats: Optional[Dict[str, int]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # 전체 점수 계산과 같은 top-k(동점 순서 포함)를 반환
+    # norm: 문서별 k1 * (1 - b + b * (doc_len / avgdl))
+    token_indices: Dict[int, List[int]] = {}
+    for t, term in enumerate(query_tokens):
+        term_id = postings.term_id(term)
+        if term_id >= 0:
+            token_indices.setdefault(term_id, []).append(t)
+
+    cursors = []
+    for term_id, indices in token_indices.items():
+        term_idf = idf(int(postings.term_offsets[term_id + 1] - postings.term_offsets[term_id]))
+
+        # block별 상한: 최대 tf와 최소 문서 길이로 계산한 BM25 가중치
+        b0, b1 = block_max.term_block_offsets[term_id], block_max.term_block_offsets[term_id + 1]
+        max_tf = block_max.block_max_tf[b0:b1]
+        min_norm = k1 * (1 - b + b * (block_max.block_min_len[b0:b1] / avg_doc_len))
+        block_bounds = term_idf * ((max_tf * (k1 + 1)) / (max_tf + min_norm))
+        cursors.append(_TermCursor(term_id, postings, block_max, term_idf, indices, block_bounds))
+
+    # token 순서대로 점수를 더하기 위해 (token 번호 -> 커서) 목록을 만듦
+    token_cursors = sorted((t, cursor) for cursor in cursors for t in cursor.token_indices)
+    token_cursors = [cursor for _, cursor in token_cursors]
+
+    heap: List[Tuple[float, int, int]] = []  # (점수, -first_seen, -문서 번호): 가장 나쁜 결과가 맨 앞
+    evaluated = 0
+    scored = 0
+
+    active = [cursor for cursor in cursors if cursor.doc is not None]
+    while active and top_k > 0:
+        active.sort(key=lambda cursor: cursor.doc)
+        threshold = heap[0][0] if len(heap) >= top_k else -np.inf
+
+        # pivot: 앞에서부터 상한을 더했을 때 처음으로 threshold 이상이 되는 term
+        acc = 0.0
+        pivot = None
+        for i, cursor in enumerate(active):
+            acc += cursor.upper_bound
+            if acc >= threshold:
+                pivot = i
+                break
+        if pivot is None:
+            break
+
+        pivot_doc = active[pivot].doc
+        # pivot 문서를 가리키는 뒤쪽 term도 함께 고려
+        while pivot + 1 < len(active) and active[pivot + 1].doc == pivot_doc:
+            pivot += 1
+
+        if use_block_max:
+            # pivot 문서가 속한 block들의 상한으로 다시 확인
+            block_sum = 0.0
+            next_doc = active[pivot + 1].doc if pivot + 1 < len(active) else None
+            for cursor in active[:pivot + 1]:
+                bound, last_doc = cursor.block_bound(pivot_doc)
+                block_sum += bound
+                if last_doc is not None and (next_doc is None or last_doc + 1 < next_doc):
+                    next_doc = last_doc + 1
+            if block_sum < threshold:
+                # 현재 block들 안의 문서는 top-k에 들어갈 수 없으므로 block 끝까지 건너뜀
+                if next_doc is None:
+                    for cursor in active[:pivot + 1]:
+                        cursor.pos, cursor.doc = cursor.end, None
+                else:
+                    for cursor in active[:pivot + 1]:
+                        cursor.next_geq(next_doc)
+                active = [cursor for cursor in active if cursor.doc is not None]
+                continue
+
+        if active[0].doc == pivot_doc:
+            # 전체 점수 계산과 같은 순서(쿼리 token 순서)로 점수를 누적
+            score = 0.0
+            first_seen = None
+            for t, cursor in enumerate(token_cursors):
+                if cursor.doc != pivot_doc:
+                    continue
+                tf = int(cursor.tfs[cursor.pos])
+                score += cursor.idf * ((tf * (k1 + 1)) / (tf + norm[pivot_doc]))
+                evaluated += 1
+                if first_seen is None:
+                    first_seen = t
+            scored += 1
+
+            entry = (float(score), -first_seen, -pivot_doc)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+            for cursor in active[:pivot + 1]:
+                cursor.next()
+        else:
+            # pivot 앞의 term들은 pivot 문서 전까지 top-k에 들어갈 수 없음
+            for cursor in active[:pivot]:
+                cursor.next_geq(pivot_doc)
+
+        active = [cursor for cursor in active if cursor.doc is not None]
+
+    if stats is not None:
+        stats["postings_evaluated"] = evaluated
+        stats["docs_scored"] = scored
+
+    results = sorted(heap, reverse=True)
+    doc_ords = np.array([-doc for _, _, doc in results], dtype=np.int64)
+    scores = np.array([score for score, _, _ in results], dtype=np.float64)
+    return doc_ords, scores
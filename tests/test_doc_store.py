@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+
+from src.core.doc_store import DocStore, DocStoreWriter, build_doc_store, compact_doc_store, new_segment_path
+
+
+class TestDocStore:
+    # 저장한 문서를 doc_id로 다시 읽을 수 있는지 테스트
+    def test_build_and_get(self, tmp_path):
+        # Given
+        documents = [("doc2", "banana " * 50), ("doc1", "사과와 바나나"), ("doc3", "")]
+        build_doc_store(str(tmp_path / "store"), documents)
+
+        # When
+        store = DocStore()
+        assert store.load(str(tmp_path / "store"))
+
+        # Then
+        assert len(store) == 3
+        for doc_id, text in documents:
+            assert store[doc_id] == text
+        assert store.get("missing", "없음") == "없음"
+        assert "doc1" in store and "missing" not in store
+        assert isinstance(store._parts[0].texts.base, np.memmap)
+        assert store._parts[0].texts.nbytes < len("banana " * 50) # 압축되어 저장됨
+
+    # snippet에 필요한 preview/anchor가 함께 저장되는지 테스트
+    def test_snippet_fields(self, tmp_path):
+        # Given
+        text = "word " * 100
+        with DocStoreWriter(str(tmp_path / "store2")) as writer:
+            writer.add("doc1", text, token_offsets=list(range(0, 500, 5)), token_base=4)
+            writer.add("doc2", "no anchors")
+
+        # When
+        store = DocStore()
+        store.load(str(tmp_path / "store2"))
+        preview, anchors, token_base, num_tokens = store.snippet_fields("doc1")
+
+        # Then
+        assert preview == text[:299] + "..."
+        assert anchors.tolist() == list(range(0, 500, 40))
+        assert token_base == 4
+        assert num_tokens == 100
+        assert store.snippet_fields("doc2")[0] == "no anchors" and len(store.snippet_fields("doc2")[1]) == 0
+        assert store.snippet_fields("missing") is None
+
+    # 나중에 추가한 segment의 문서가 우선하는지 테스트
+    def test_segments(self, tmp_path):
+        # Given
+        path = str(tmp_path / "store")
+        build_doc_store(path, [("doc1", "old"), ("doc2", "two")])
+        with DocStoreWriter(new_segment_path(path)) as writer:
+            writer.add("doc1", "new")
+            writer.add("doc3", "three")
+
+        # When
+        store = DocStore()
+        store.load(path)
+
+        # Then
+        assert new_segment_path(path).endswith("0001")
+        assert dict(store) == {"doc1": "new", "doc2": "two", "doc3": "three"}
+        assert not DocStore().load(str(tmp_path / "missing"))
+
+    # segment를 합치면 최신 문서와 snippet 정보가 그대로 남고 저장소가 하나가 되는지 테스트
+    def test_compact(self, tmp_path):
+        # Given
+        path = str(tmp_path / "store")
+        build_doc_store(path, [("doc1", "old"), ("doc2", "two"), ("doc4", "deleted")])
+        for i in range(3):
+            with DocStoreWriter(new_segment_path(path)) as writer:
+                writer.add("doc1", f"new {i}", list(range(0, 200, 2)), token_base=i)
+                writer.add(f"doc{10 + i}", f"added {i}")
+        before = DocStore()
+        before.load(path)
+        expected = {doc_id: before[doc_id] for doc_id in before if doc_id != "doc4"}
+        expected_fields = before.snippet_fields("doc1")
+
+        # When
+        compact_doc_store(path, [doc_id for doc_id in before if doc_id != "doc4"])
+        store = DocStore()
+        store.load(path)
+
+        # Then
+        assert store.num_parts == 1
+        assert dict(store) == expected
+        fields = store.snippet_fields("doc1")
+        assert fields[0] == expected_fields[0] and fields[2:] == (2, 100)
+        assert fields[1].tolist() == expected_fields[1].tolist()
+        assert store.snippet_fields("doc2")[3] == 0
+        assert new_segment_path(path).endswith("0000")
+        assert sorted(os.listdir(tmp_path)) == ["store"]
@@ -0,0 +1,61 @@
+import json
+import pytest
+from src.core.document_source import iter_documents, iter_json_documents, iter_jsonl_documents
+
+class TestDocumentSource:
+    @pytest.fixture
+    def items(self):
+        return [
+            {"doc_id": "1", "original_text": "first", "text": "first expanded", "title": "One"},
+            {"doc_id": "2", "original_text": "second"},
+            {"id": "3", "text": "third", "title": None},
+        ]
+
+    # expand_docs.py 출력 형식(JSON 배열)을 하나씩 읽는지 테스트
+    def test_json_array(self, items, tmp_path):
+        # Given
+        path = tmp_path / "docs.json"
+        path.write_text(json.dumps(items, indent=2), encoding="utf-8")
+
+        # When
+        documents = iter_json_documents(str(path))
+
+        # Then
+        assert list(documents) == [("1", "first expanded", "One"), ("2", "second", ""), ("3", "third", "")]
+
+    # {doc_id: text} 형식의 JSON 객체를 읽는지 테스트
+    def test_json_object(self, tmp_path):
+        # Given
+        path = tmp_path / "docs.json"
+        path.write_text('  {"a": "alpha", "b": "beta"}', encoding="utf-8")
+
+        # When / Then
+        assert list(iter_documents(str(path))) == [("a", "alpha", ""), ("b", "beta", "")]
+
+    def test_jsonl(self, items, tmp_path):
+        # Given
+        path = tmp_path / "docs.jsonl"
+        path.write_text("\n".join(json.dumps(item) for item in items) + "\n\n", encoding="utf-8")
+
+        # When
+        documents = iter_documents(str(path))
+
+        # Then
+        assert list(documents) == list(iter_jsonl_documents(str(path)))
+        assert [doc_id for doc_id, _, _ in iter_jsonl_documents(str(path))] == ["1", "2", "3"]
+
+    # include_original=True이면 확장 전 원문을 함께 반환하는지 테스트
+    def test_include_original(self, items, tmp_path):
+        # Given
+        path = tmp_path / "docs.json"
+        path.write_text(json.dumps(items), encoding="utf-8")
+
+        # When
+        documents = iter_documents(str(path), include_original=True)
+
+        # Then
+        assert list(documents) == [("1", "first expanded", "One", "first"), ("2", "second", "", "second"), ("3", "third", "", "third")]
+
+    def test_missing_file_without_dataset(self, tmp_path):
+        with pytest.raises(ValueError):
+            iter_documents(str(tmp_path / "missing.json"))
@@ -1,5 +1,6 @@
 import pytest
 import os
+import numpy as np
 from src.core.inverted_index import InvertedIndex
 
 class TestInvertedIndex:
@@ -46,7 +47,7 @@ class TestInvertedIndex:
         # Given
         index_engine.add_document("test_doc", "search engine test")
         index_engine.finalize()
-        save_file = tmp_path / "test_index.pkl"
+        save_file = tmp_path / "test_index"
         
         # When
         index_engine.save(str(save_file))
@@ -61,3 +62,93 @@ class TestInvertedIndex:
         
         term = index_engine.tokenizer.tokenize("engine")[0]
         assert term in new_index.index
+
+    def test_finalize_builds_compact_postings(self, index_engine):
+        # finalize() 이후 배열 기반 postings 검증
+        # Given
+        index_engine.add_document("doc1", "apple banana apple")
+        index_engine.add_document("doc2", "banana cherry")
+
+        # When
+        index_engine.finalize()
+
+        # Then
+        apple = index_engine.tokenizer.tokenize("apple")[0]
+        banana = index_engine.tokenizer.tokenize("banana")[0]
+        postings = index_engine.index
+
+        docs, tfs = postings.postings(banana)
+        assert docs.tolist() == [0, 1]
+        assert tfs.tolist() == [1, 1]
+        assert postings.df(apple) == 1
+        assert postings.positions_of(apple, 0).tolist() == [0, 2]
+        assert postings[apple] == {"doc1": [0, 2]}
+        assert index_engine.doc_ids == ["doc1", "doc2"]
+        assert index_engine.doc_len_array.tolist() == [3, 2]
+
+        with pytest.raises(ValueError):
+            index_engine.add_document("doc3", "late document")
+
+    def test_load_opens_memory_mapped_arrays(self, index_engine, tmp_path):
+        # 저장된 인덱스가 mmap으로 열리고 같은 내용을 갖는지 검증
+        # Given
+        index_engine.add_document("doc1", "apple banana apple")
+        index_engine.add_document("doc2", "banana cherry")
+        index_engine.save(str(tmp_path / "index"))
+
+        # When
+        new_index = InvertedIndex()
+        new_index.load(str(tmp_path / "index"))
+
+        # Then
+        banana = index_engine.tokenizer.tokenize("banana")[0]
+        assert isinstance(new_index.index.docs.base, np.memmap)
+        assert new_index.index.postings(banana)[0].tolist() == [0, 1]
+        assert new_index.doc_ids == ["doc1", "doc2"]
+        assert new_index.doc_lengths["doc2"] == 2
+        assert new_index.avg_doc_len == index_engine.avg_doc_len
+
+    def test_parallel_build_matches_serial_build(self, tmp_path):
+        # 여러 프로세스로 나눠 만든 인덱스가 순서대로 만든 인덱스와 byte 단위로 같은지 검증
+        # Given
+        words = ["apple", "banana", "cherry", "grape", "lemon", "mango", "melon", "peach", "plum", "kiwi"]
+        documents = [(f"doc{i}", " ".join(words[(i * 7 + j * 3) % len(words)] for j in range(i % 9 + 1))) for i in range(250)]
+
+        serial = InvertedIndex()
+        for doc_id, text in documents:
+            serial.add_document(doc_id, text)
+        serial.save(str(tmp_path / "serial"))
+
+        # When
+        parallel = InvertedIndex()
+        parallel.build_parallel(documents, num_workers=2, shard_size=37)
+        parallel.save(str(tmp_path / "parallel"))
+
+        # Then
+        assert parallel.doc_count == serial.doc_count
+        assert parallel.avg_doc_len == serial.avg_doc_len
+        serial_files = sorted(os.listdir(tmp_path / "serial"))
+        assert sorted(os.listdir(tmp_path / "parallel")) == serial_files
+        for name in serial_files:
+            assert (tmp_path / "parallel" / name).read_bytes() == (tmp_path / "serial" / name).read_bytes(), name
+
+    def test_add_documents_from_generator(self):
+        # generator로 넘긴 문서를 묶어서 추가해도 add_document를 반복한 것과 같은지 검증
+        # Given
+        documents = [(f"doc{i}", f"apple banana {'cherry ' * (i % 4)}doc{i % 7}") for i in range(50)]
+        expected = InvertedIndex()
+        for doc_id, text in documents:
+            expected.add_document(doc_id, text)
+        expected.finalize()
+
+        # When
+        index = InvertedIndex()
+        index.add_documents(((doc_id, text) for doc_id, text in documents), batch_size=8, num_workers=2)
+        index.finalize()
+
+        # Then
+        assert index.doc_ids == expected.doc_ids
+        assert index.doc_len_array.tolist() == expected.doc_len_array.tolist()
+        assert list(index.index) == list(expected.index)
+        assert index.index.docs.tolist() == expected.index.docs.tolist()
+        assert index.index.positions.tolist() == expected.index.positions.tolist()
@@ -0,0 +1,63 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.core.query_batcher import QueryBatcher
+
+
+class StubModel:
+    # batch 크기를 기록하는 가짜 인코더
+    def __init__(self):
+        self.batch_sizes = []
+
+    def encode_batch(self, texts, batch_size=64):
+        self.batch_sizes.append(len(texts))
+        if "error" in texts:
+            raise RuntimeError("encode failed")
+        return {
+            "indices": [np.array([len(text), len(text) + 1]) for text in texts],
+            "values": [np.array([1.0, 0.5], dtype=np.float32) for _ in texts],
+        }
+
+
+class TestQueryBatcher:
+    # 동시에 들어온 요청이 하나의 batch로 처리되고 각자 자신의 벡터를 받는지 테스트
+    def test_concurrent_requests_are_batched(self):
+        # Given
+        model = StubModel()
+        batcher = QueryBatcher(model, max_batch_size=8, max_wait=0.5)
+        queries = ["a", "bb", "ccc", "bb", "dddd", "eeeee"]
+        results = [None] * len(queries)
+        barrier = threading.Barrier(len(queries))
+
+        def request(i):
+            barrier.wait()
+            results[i] = batcher.encode(queries[i])
+
+        # When
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(queries))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+
+        # Then
+        assert results == [{len(q): np.float32(1.0), len(q) + 1: np.float32(0.5)} for q in queries]
+        assert len(model.batch_sizes) < len(queries)
+        assert sum(model.batch_sizes) <= len(set(queries)) + len(model.batch_sizes) - 1
+        assert batcher.num_queries == len(queries)
+
+    # max_batch_size를 넘지 않는지와 인코딩 실패가 호출한 쪽으로 전달되는지 테스트
+    def test_batch_limit_and_errors(self):
+        # Given
+        model = StubModel()
+        batcher = QueryBatcher(model, max_batch_size=1, max_wait=0.5)
+
+        # When / Then
+        assert batcher.encode("abc") == {3: 1.0, 4: 0.5}
+        with pytest.raises(RuntimeError):
+            batcher.encode("error")
+        batcher.close()
+        assert model.batch_sizes == [1, 1]
@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.core.query_cache import QueryVectorCache
+
+
+class CountingModel:
+    # encode 호출 횟수를 세는 가짜 인코더 (실제 모델처럼 numpy 값을 반환)
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return {np.int64(sum(map(ord, word)) % 50): np.float32(len(word) / 3) for word in text.split()}
+
+
+class TestQueryVectorCache:
+    # 같은 쿼리는 한 번만 인코딩하는지 테스트
+    def test_encode_uses_cache(self):
+        # Given
+        model = CountingModel()
+        cache = QueryVectorCache(max_entries=8)
+
+        # When
+        first = cache.encode("apple banana", model)
+        second = cache.encode("apple banana", model)
+
+        # Then
+        assert first is second
+        assert model.calls == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    # 쿼리 로그로 미리 채운 뒤 저장/로드해도 같은 벡터와 LRU 순서가 유지되는지 테스트
+    def test_warm_up_and_save_load(self, tmp_path):
+        # Given
+        model = CountingModel()
+        cache = QueryVectorCache(max_entries=8)
+        assert cache.warm_up(["apple", "kiwi melon", "apple", "plum"], model) == 3
+        cache.encode("apple", model)
+
+        # When
+        cache.save(str(tmp_path / "cache"))
+        loaded = QueryVectorCache(max_entries=2)
+        assert loaded.load(str(tmp_path / "cache"))
+
+        # Then
+        assert model.calls == 3
+        assert len(loaded) == 2 # 가장 최근에 사용한 plum, apple만 남음
+        for query in ("plum", "apple"):
+            vec = loaded.get(query)
+            assert vec == model.encode(query)
+            assert np.array(list(vec.values())).dtype == np.float32
+        assert loaded.get("kiwi melon") is None
+        assert not QueryVectorCache().load(str(tmp_path / "missing"))
@@ -0,0 +1,40 @@
+import pytest
+
+from src.core.result_cache import ResultCache
+
+
+class TestResultCache:
+    # 가장 오래 사용하지 않은 항목부터 제거되는지 테스트
+    def test_lru_eviction(self):
+        # Given
+        cache = ResultCache(max_entries=2, ttl=None)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        # When
+        assert cache.get("a") == 1 # a를 최근에 사용한 항목으로 만듦
+        cache.put("c", 3)
+
+        # Then
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats() == {"entries": 2, "hits": 3, "misses": 1, "evictions": 1, "hit_rate": 0.75}
+
+    # ttl이 지난 항목은 조회되지 않는지 테스트
+    def test_ttl_expiry(self, monkeypatch):
+        # Given
+        now = [100.0]
+        monkeypatch.setattr("src.core.result_cache.time.monotonic", lambda: now[0])
+        cache = ResultCache(max_entries=4, ttl=10.0)
+        cache.put("a", 1)
+
+        # When / Then
+        now[0] = 109.0
+        assert cache.get("a") == 1
+        now[0] = 111.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            ResultCache(max_entries=0)
@@ -0,0 +1,557 @@
+import os
+import pytest
+import random
+import numpy as np
+from collections import defaultdict
+from src.core.search_engine import SearchEngine
+
+def make_corpus(num_docs=300, seed=0):
+    # 동점이 자주 생기도록 작은 어휘로 문서를 생성
+    rng = random.Random(seed)
+    words = ["apple", "banana", "cherry", "grape", "lemon", "mango", "melon", "peach", "plum", "kiwi"]
+    documents = []
+    for i in range(num_docs):
+        length = rng.randint(1, 12)
+        documents.append((f"doc{i}", " ".join(rng.choice(words) for _ in range(length))))
+    return documents
+
+QUERIES = ["apple", "banana cherry", "apple apple grape", "kiwi melon peach plum", "unknownword", "mango unknownword"]
+
+
+@pytest.fixture(scope="module")
+def engines():
+    documents = make_corpus()
+    numpy_engine = SearchEngine(bm25_kernel="numpy")
+    numpy_engine.build_index_from_data(documents)
+
+    python_engine = SearchEngine(bm25_kernel="python")
+    python_engine.inverted_index = numpy_engine.inverted_index
+    return numpy_engine, python_engine
+
+
+class TestBM25Kernels:
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_numpy_kernel_matches_python_loop(self, engines, query):
+        # 점수와 순서(동점 처리 포함)가 완전히 같아야 함
+        numpy_engine, python_engine = engines
+
+        assert numpy_engine.search_bm25(query, top_k=1000) == python_engine.search_bm25(query, top_k=1000)
+        assert numpy_engine.search_bm25(query, top_k=7) == python_engine.search_bm25(query, top_k=7)
+
+    def test_norm_cache_follows_parameters(self, engines):
+        numpy_engine, python_engine = engines
+        numpy_engine.k1, python_engine.k1 = 0.9, 0.9
+        try:
+            assert numpy_engine.search_bm25("apple grape", top_k=20) == python_engine.search_bm25("apple grape", top_k=20)
+        finally:
+            numpy_engine.k1, python_engine.k1 = 1.5, 1.5
+
+    def test_unknown_kernel(self):
+        with pytest.raises(ValueError):
+            SearchEngine(bm25_kernel="cuda")
+
+
+class TestImpactIndex:
+    @pytest.fixture
+    def engine(self):
+        engine = SearchEngine(k1=1.2, b=0.75, bm25_kernel="impact")
+        engine.build_index_from_data(make_corpus(seed=1))
+        engine.inverted_index.build_impacts(k1=1.2, b=0.75, bits=16)
+        return engine
+
+    def test_impact_scores_close_to_exact(self, engine):
+        exact = SearchEngine(k1=1.2, b=0.75)
+        exact.inverted_index = engine.inverted_index
+
+        for query in QUERIES:
+            expected = dict(exact.search_bm25(query, top_k=1000))
+            actual = dict(engine.search_bm25(query, top_k=1000))
+
+            # 양자화 오차 이외에는 같은 점수
+            assert actual.keys() == expected.keys()
+            for doc_id, score in expected.items():
+                assert actual[doc_id] == pytest.approx(score, abs=1e-3)
+
+    def test_refuses_mismatched_parameters(self, engine):
+        engine.b = 0.9
+        with pytest.raises(ValueError):
+            engine.search_bm25("apple")
+
+    def test_impacts_survive_save_and_load(self, engine, tmp_path):
+        engine.inverted_index.save(str(tmp_path / "index"))
+
+        loaded = SearchEngine(k1=1.2, b=0.75, bm25_kernel="impact")
+        loaded.inverted_index.load(str(tmp_path / "index"))
+
+        assert loaded.inverted_index.impact_params["bits"] == 16
+        assert loaded.search_bm25("banana cherry", top_k=10) == engine.search_bm25("banana cherry", top_k=10)
+
+    # batch 검색도 impact로 계산하고 같은 검사를 하는지 테스트
+    def test_batch_uses_impacts(self, engine):
+        # When
+        results = engine.search_bm25_batch(QUERIES, top_k=20)
+
+        # Then
+        assert results == [engine.search_bm25(query, top_k=20) for query in QUERIES]
+        engine.k1 = 1.5
+        with pytest.raises(ValueError):
+            engine.search_bm25_batch(QUERIES)
+
+    # segment나 삭제된 문서가 있으면 exact로 몰래 바꾸지 않고 거부하며, 합친 뒤에는 impact로 검색하는지 테스트
+    def test_segmented_index(self):
+        # Given
+        documents = make_corpus(seed=1)
+        engine = build_engine(documents[:250], k1=1.2, b=0.75, bm25_kernel="impact")
+        engine.inverted_index.build_impacts(k1=1.2, b=0.75, bits=16)
+        engine.add_documents(documents[250:])
+        engine.delete_documents(["doc3"])
+
+        # When / Then
+        with pytest.raises(ValueError):
+            engine.search_bm25("apple")
+        with pytest.raises(ValueError):
+            engine.search_bm25_batch(QUERIES)
+        with pytest.raises(ValueError):
+            engine.hybrid_search("apple")
+
+        engine.merge_segments()
+        expected = SearchEngine(k1=1.2, b=0.75, bm25_kernel="impact")
+        expected.build_index_from_data([doc for doc in documents if doc[0] != "doc3"])
+        expected.inverted_index.build_impacts(k1=1.2, b=0.75, bits=16)
+        assert engine.inverted_index.impact_params["bits"] == 16
+        assert engine.search_bm25_batch(QUERIES, top_k=20) == expected.search_bm25_batch(QUERIES, top_k=20)
+
+
+class FakeSpladeModel:
+    # 쿼리 단어마다 고정된 vocab id를 주는 가짜 인코더
+    def encode(self, text):
+        return {sum(map(ord, word)) % 50: 1.0 for word in text.split()}
+
+    def encode_batch(self, texts, batch_size=64):
+        vecs = [self.encode(text) for text in texts]
+        return {
+            "indices": [np.array(list(vec.keys())) for vec in vecs],
+            "values": [np.array(list(vec.values())) for vec in vecs],
+        }
+
+
+def build_engine(documents, **kwargs):
+    # BM25 + (가짜 인코더로 만든) SPLADE 인덱스를 가진 엔진
+    from src.core.splade_index import SpladeIndex
+
+    engine = SearchEngine(**kwargs)
+    engine.build_index_from_data(documents)
+
+    engine.splade_model = FakeSpladeModel()
+    engine.splade_index = SpladeIndex(vocab_size=50)
+    encoded = engine.splade_model.encode_batch([text for _, text in documents])
+    engine.splade_index.add_batch([doc_id for doc_id, _ in documents], encoded["indices"], encoded["values"])
+    engine.splade_index.build()
+    return engine
+
+
+class TestRankingRegression:
+    @pytest.fixture
+    def engine(self):
+        return build_engine(make_corpus(seed=2))
+
+    def reference_splade(self, engine, query):
+        # 기존 구현: 0이 아닌 모든 문서의 {doc_id: 점수} dict
+        query_vec = engine.splade_model.encode(query)
+        scores = engine.splade_index.matrix[:, list(query_vec.keys())].dot(np.array(list(query_vec.values())))
+        return {engine.splade_index.doc_ids[i]: float(scores[i] / 100.0) for i in scores.nonzero()[0]}
+
+    def reference_hybrid(self, engine, query, top_k, offset, rrf_k=60, candidates_k=1000):
+        # 기존 구현: 전체 정렬 후 slicing
+        bm25 = engine.search_bm25(query, top_k=candidates_k)
+        splade = sorted(self.reference_splade(engine, query).items(), key=lambda item: item[1], reverse=True)[:candidates_k]
+        rrf_scores = defaultdict(float)
+        for rank, (doc_id, _) in enumerate(bm25):
+            rrf_scores[doc_id] += 1 / (rrf_k + rank + 1)
+        for rank, (doc_id, _) in enumerate(splade):
+            rrf_scores[doc_id] += 1 / (rrf_k + rank + 1)
+        return sorted(rrf_scores.items(), key=lambda item: item[1], reverse=True)[offset:offset + top_k]
+
+    @pytest.mark.parametrize("query", ["apple", "banana cherry", "kiwi melon peach plum"])
+    def test_splade_and_hybrid_order_unchanged(self, engine, query):
+        expected_splade = sorted(self.reference_splade(engine, query).items(), key=lambda item: item[1], reverse=True)[:25]
+        assert engine.search_splade(query, top_k=25) == expected_splade
+
+        for offset in (0, 10, 20):
+            assert engine.hybrid_search(query, top_k=10, offset=offset, candidates_k=40) == self.reference_hybrid(engine, query, 10, offset, candidates_k=40)
+
+    def test_hybrid_with_differently_ordered_splade_index(self, engine):
+        # SPLADE 인덱스의 문서 순서가 BM25와 달라도 doc_id 기준으로 합쳐져야 함
+        from src.core.splade_index import SpladeIndex
+
+        query = "banana cherry"
+
+        original = engine.splade_index
+        matrix = original.matrix.tocsr()
+        reordered = SpladeIndex(vocab_size=50)
+        order = list(range(len(original.doc_ids)))[::-1]
+        reordered.add_batch(
+            [original.doc_ids[i] for i in order],
+            [matrix[i].indices for i in order],
+            [matrix[i].data / 100.0 for i in order],
+        )
+        reordered.build()
+        engine.splade_index = reordered
+
+        expected = self.reference_hybrid(engine, query, 10, 0, candidates_k=40)
+        assert engine.hybrid_search(query, top_k=10, candidates_k=40) == expected
+
+
+@pytest.fixture(scope="module")
+def documents():
+    # 긴 posting이 생기도록 문서 수를 늘림
+    return make_corpus(num_docs=2000, seed=3)
+
+
+class TestDynamicPruning:
+    @pytest.mark.parametrize("kernel", ["wand", "bmw"])
+    @pytest.mark.parametrize("top_k", [1, 10, 100])
+    def test_same_top_k_as_exhaustive(self, documents, kernel, top_k):
+        exhaustive = SearchEngine()
+        exhaustive.build_index_from_data(documents)
+        exhaustive.inverted_index.finalize()
+
+        pruned = SearchEngine(bm25_kernel=kernel)
+        pruned.inverted_index = exhaustive.inverted_index
+
+        for query in QUERIES + ["apple banana cherry grape lemon mango", "plum plum kiwi"]:
+            assert pruned.search_bm25(query, top_k=top_k) == exhaustive.search_bm25(query, top_k=top_k)
+
+    def test_evaluates_fewer_postings(self, documents):
+        engine = SearchEngine()
+        engine.build_index_from_data(documents)
+
+        exhaustive_stats, pruned_stats = {}, {}
+        query = "apple banana cherry grape lemon mango"
+        engine.search_bm25(query, top_k=10, stats=exhaustive_stats)
+        engine.bm25_kernel = "bmw"
+        engine.search_bm25(query, top_k=10, stats=pruned_stats)
+
+        assert pruned_stats["postings_evaluated"] < exhaustive_stats["postings_evaluated"]
+
+
+class TestIncrementalIndexing:
+    @pytest.fixture
+    def corpus(self):
+        documents = make_corpus(num_docs=400, seed=4)
+        base, added = documents[:300], documents[300:]
+        updated = [("doc5", "apple apple kiwi"), ("doc350", "melon")]
+        deleted = ["doc0", "doc17", "doc120", "doc310"]
+        return base, added, updated, deleted
+
+    def live_documents(self, base, added, updated, deleted):
+        # 같은 변경을 처음부터 빌드했을 때의 문서 순서 (수정된 문서는 맨 뒤로 감)
+        removed = set(deleted) | {doc_id for doc_id, _ in updated}
+        return [doc for doc in base + added if doc[0] not in removed] + updated
+
+    def make_segmented(self, corpus):
+        base, added, updated, deleted = corpus
+        engine = build_engine(base)
+        engine.add_documents(added)
+        engine.delete_documents(deleted)
+        engine.add_documents(updated)
+        return engine
+
+    # segment + tombstone 상태의 검색 결과가 남은 문서로 다시 빌드한 인덱스와 같은지 테스트
+    def test_search_matches_rebuild(self, corpus):
+        # Given
+        engine = self.make_segmented(corpus)
+        rebuilt = build_engine(self.live_documents(*corpus))
+
+        # When / Then
+        assert len(engine.bm25_segments) == 2
+        for query in QUERIES:
+            assert engine.search_bm25(query, top_k=50) == rebuilt.search_bm25(query, top_k=50)
+            assert engine.search_splade(query, top_k=50) == rebuilt.search_splade(query, top_k=50)
+            assert engine.hybrid_search(query, top_k=10, candidates_k=40) == rebuilt.hybrid_search(query, top_k=10, candidates_k=40)
+
+    # merge 결과가 다시 빌드한 인덱스와 byte 단위로 같은지 테스트
+    def test_merge_matches_rebuild(self, corpus, tmp_path):
+        # Given
+        engine = self.make_segmented(corpus)
+        rebuilt = build_engine(self.live_documents(*corpus))
+
+        # When
+        engine.merge_segments(background=True).join()
+
+        # Then
+        assert engine.bm25_segments == [] and engine.splade_segments == []
+        engine.inverted_index.save(str(tmp_path / "merged"))
+        rebuilt.inverted_index.save(str(tmp_path / "rebuilt"))
+        assert sorted(os.listdir(tmp_path / "merged")) == sorted(os.listdir(tmp_path / "rebuilt"))
+        for name in sorted(os.listdir(tmp_path / "rebuilt")):
+            assert (tmp_path / "merged" / name).read_bytes() == (tmp_path / "rebuilt" / name).read_bytes(), name
+        assert np.array_equal(engine.splade_index.docs, rebuilt.splade_index.docs)
+        assert np.array_equal(engine.splade_index.impacts, rebuilt.splade_index.impacts)
+        assert engine.hybrid_search("banana cherry") == rebuilt.hybrid_search("banana cherry")
+
+    # 같은 batch에 같은 doc_id가 여러 번 있으면 마지막 문서만 남는지 테스트
+    def test_duplicate_ids_in_one_batch(self, corpus):
+        # Given
+        base, _, _, _ = corpus
+        engine = build_engine(base)
+        batch = [("doc5", "zebra zebra"), ("new1", "apple melon"), ("doc5", "apple apple kiwi")]
+        rebuilt = build_engine([doc for doc in base if doc[0] != "doc5"] + batch[1:])
+
+        # When
+        engine.add_documents(batch)
+
+        # Then
+        assert engine.search_bm25("zebra") == []
+        for query in QUERIES + ["kiwi"]:
+            assert engine.search_bm25(query, top_k=50) == rebuilt.search_bm25(query, top_k=50)
+            assert engine.search_splade(query, top_k=50) == rebuilt.search_splade(query, top_k=50)
+
+    # 동시에 실행한 merge가 서로의 segment나 tombstone을 잃어버리지 않는지 테스트
+    def test_concurrent_merges(self, corpus):
+        # Given
+        base, added, updated, deleted = corpus
+        engine = build_engine(base)
+        for i in range(0, len(added), 10):
+            engine.add_documents(added[i:i + 10])
+        rebuilt = build_engine(self.live_documents(*corpus))
+
+        # When
+        threads = [engine.merge_segments(background=True) for _ in range(3)]
+        engine.delete_documents(deleted)
+        engine.add_documents(updated)
+        threads.append(engine.merge_segments(background=True))
+        for thread in threads:
+            thread.join()
+
+        # Then
+        for query in QUERIES:
+            assert engine.search_bm25(query, top_k=50) == rebuilt.search_bm25(query, top_k=50)
+            assert engine.search_splade(query, top_k=50) == rebuilt.search_splade(query, top_k=50)
+
+    # update_index.py를 여러 번 실행해도 인덱스를 합칠 때 문서 저장소의 segment도 함께 합쳐지는지 테스트
+    def test_update_script_compacts_doc_store(self, corpus, tmp_path, monkeypatch):
+        import importlib.util
+        import json
+        from src.core.doc_store import DocStore, build_doc_store
+
+        # Given: run_indexing.py가 만든 것과 같은 data/ 디렉토리
+        base, added, _, _ = corpus
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(SearchEngine, "load_splade_model", lambda self: setattr(self, "splade_model", FakeSpladeModel()))
+        engine = build_engine(base)
+        engine.save()
+        build_doc_store("data/doc_store", base)
+        spec = importlib.util.spec_from_file_location("update_index", os.path.join(os.path.dirname(__file__), "..", "scripts", "update_index.py"))
+        update_index = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(update_index)
+
+        # When: 실행마다 문서 10개를 추가하고 한 개를 삭제 (9번째 실행에서 segment가 8개를 넘어 합쳐짐)
+        deleted = []
+        for run in range(10):
+            with open("data/added_docs.jsonl", "w", encoding="utf-8") as f:
+                for doc_id, text in added[run * 10:(run + 1) * 10]:
+                    f.write(json.dumps({"doc_id": doc_id, "text": text}) + "\n")
+            deleted.append(base[run][0])
+            with open("data/deleted_ids.txt", "w", encoding="utf-8") as f:
+                f.write(deleted[-1] + "\n")
+            update_index.main()
+
+        # Then
+        store = DocStore()
+        store.load("data/doc_store")
+        # 합친 뒤에 삭제된 문서는 다음에 합칠 때까지 문서 저장소에 남음
+        kept = [doc for doc in base + added[:100] if doc[0] not in deleted[:-1]]
+        assert store.num_parts == 2
+        assert dict(store) == dict(kept)
+        assert sorted(os.listdir(tmp_path / "data")) == ["added_docs.jsonl", "deleted_ids.txt", "doc_store", "index", "splade_index", "titles"]
+
+    # segment와 tombstone이 저장/로드 후에도 유지되는지 테스트
+    def test_segments_survive_save_and_load(self, corpus, tmp_path):
+        # Given
+        engine = self.make_segmented(corpus)
+        engine.index_path = str(tmp_path / "index")
+        engine.splade_index_path = str(tmp_path / "splade_index")
+        engine.titles_path = str(tmp_path / "titles")
+
+        # When
+        engine.save()
+        loaded = SearchEngine(index_path=engine.index_path, splade_index_path=engine.splade_index_path, titles_path=engine.titles_path)
+        loaded.load()
+        loaded.splade_model = FakeSpladeModel()
+
+        # Then
+        assert len(loaded.bm25_segments) == 2 and len(loaded.splade_segments) == 2
+        assert loaded.inverted_index.num_deleted == engine.inverted_index.num_deleted
+        for query in QUERIES:
+            assert loaded.hybrid_search(query, top_k=10) == engine.hybrid_search(query, top_k=10)
+
+        # merge 후 저장하면 segment 디렉토리가 정리됨
+        loaded.merge_segments()
+        loaded.save()
+        assert os.listdir(os.path.join(engine.index_path, "segments")) == []
+
+
+class TestResultCache:
+    # cache에서 잘라낸 페이지가 cache 없이 검색한 결과와 같은지 테스트
+    def test_cached_pages_match_uncached(self):
+        # Given
+        documents = make_corpus(seed=5)
+        cached = build_engine(documents, result_cache_size=16)
+        uncached = build_engine(documents)
+
+        # When / Then
+        for offset in (0, 10, 20):
+            assert cached.hybrid_search("banana cherry", top_k=10, offset=offset, candidates_k=40) == \
+                uncached.hybrid_search("banana cherry", top_k=10, offset=offset, candidates_k=40)
+        assert cached.hybrid_search("  Banana   CHERRY ", top_k=10, candidates_k=40) == \
+            uncached.hybrid_search("banana cherry", top_k=10, candidates_k=40)
+        assert cached.result_cache.stats()["misses"] == 1
+        assert cached.result_cache.stats()["hits"] == 3
+
+    # cache에 doc_id tuple 목록 대신 순위 배열이 저장되고 batch 검색도 같은 결과를 주는지 테스트
+    def test_caches_compact_ranking(self):
+        # Given
+        documents = make_corpus(seed=5)
+        cached = build_engine(documents, result_cache_size=16)
+        uncached = build_engine(documents)
+        queries = ["banana cherry", "apple"]
+
+        # When
+        first = cached.hybrid_search_batch(queries, top_k=10, offset=5, candidates_k=40)
+        second = cached.hybrid_search_batch(queries, top_k=10, offset=5, candidates_k=40)
+
+        # Then
+        assert first == second == uncached.hybrid_search_batch(queries, top_k=10, offset=5, candidates_k=40)
+        for _, (keys, scores, _, _) in cached.result_cache.items():
+            assert isinstance(keys, np.ndarray) and keys.dtype == np.int32
+            assert isinstance(scores, np.ndarray) and len(scores) == len(keys)
+        assert cached.result_cache.stats()["hits"] == 2
+
+    # 인덱스가 바뀌면 예전 결과를 사용하지 않는지 테스트
+    def test_invalidated_when_index_changes(self, tmp_path):
+        # Given
+        documents = make_corpus(seed=5)
+        engine = build_engine(documents, index_path=str(tmp_path / "index"), splade_index_path=str(tmp_path / "splade"), titles_path=str(tmp_path / "titles"), result_cache_size=16)
+        before = engine.hybrid_search("apple", top_k=10)
+
+        # When
+        engine.delete_documents([before[0][0]])
+        after_delete = engine.hybrid_search("apple", top_k=10)
+        engine.save()
+        engine.load()
+
+        # Then
+        assert before[0][0] not in [doc_id for doc_id, _ in after_delete]
+        assert len(engine.result_cache) == 0
+        assert engine.hybrid_search("apple", top_k=10) == after_delete
+        assert engine.result_cache.stats()["hits"] == 0
+
+    # 쿼리 벡터 cache를 사용해도 SPLADE 결과가 같은지 테스트
+    def test_query_vector_cache(self):
+        # Given
+        documents = make_corpus(seed=5)
+        cached = build_engine(documents, query_cache_size=16)
+        uncached = build_engine(documents)
+
+        # When / Then
+        for _ in range(2):
+            assert cached.search_splade("banana cherry", top_k=20) == uncached.search_splade("banana cherry", top_k=20)
+        assert cached.query_cache.stats()["hits"] == 1
+
+    # 쿼리 인코딩을 batch로 모아도 SPLADE 결과가 같은지 테스트
+    def test_query_batching(self):
+        # Given
+        documents = make_corpus(seed=5)
+        batched = build_engine(documents, query_batch_size=4, query_batch_wait=0.001)
+        unbatched = build_engine(documents)
+
+        # When / Then
+        for query in QUERIES:
+            assert batched.search_splade(query, top_k=20) == unbatched.search_splade(query, top_k=20)
+        assert batched._query_batcher.num_queries == len(QUERIES)
+
+
+class TestParallelRetrieval:
+    # BM25와 SPLADE를 동시에 실행해도 결과가 같고 단계별 시간이 기록되는지 테스트
+    def test_matches_sequential(self):
+        # Given
+        documents = make_corpus(seed=6)
+        parallel = build_engine(documents, parallel_retrieval=True)
+        sequential = build_engine(documents)
+
+        # When / Then
+        for query in QUERIES:
+            stats = {}
+            assert parallel.hybrid_search(query, top_k=10, candidates_k=40, stats=stats) == sequential.hybrid_search(query, top_k=10, candidates_k=40)
+            assert set(stats) == {"bm25_time", "splade_time", "fusion_time", "total_time"}
+            assert stats["total_time"] >= max(stats["bm25_time"], stats["splade_time"])
+
+
+class TestBatchSearch:
+    # 여러 쿼리를 한 번에 검색해도 쿼리마다 검색한 결과와 같은지 테스트
+    @pytest.mark.parametrize("kwargs", [{}, {"result_cache_size": 8, "query_cache_size": 8}, {"bm25_kernel": "wand"}])
+    def test_matches_single_queries(self, kwargs):
+        # Given
+        engine = build_engine(make_corpus(seed=7), **kwargs)
+        queries = QUERIES + ["", "zzz unknown", QUERIES[0]]
+
+        # When
+        bm25_batch = engine._bm25_candidates_batch(queries, 50, engine._bm25_indexes(), chunk_size=2)
+        results = engine.hybrid_search_batch(queries, top_k=10, offset=5, candidates_k=40)
+
+        # Then
+        for query, (doc_ords, scores), result in zip(queries, bm25_batch, results):
+            expected_ords, expected_scores = engine._bm25_candidates(query, 50)
+            assert doc_ords.tolist() == expected_ords.tolist()
+            assert scores.tolist() == expected_scores.tolist()
+            assert result == engine.hybrid_search(query, top_k=10, offset=5, candidates_k=40)
+
+    def test_bm25_and_splade_batch(self, tmp_path):
+        # Given
+        engine = build_engine(make_corpus(seed=8), fast_tokenizer=True)
+        engine.index_path = str(tmp_path / "index")
+        engine.splade_index_path = str(tmp_path / "splade_index")
+        engine.titles_path = str(tmp_path / "titles")
+        engine.save()
+        queries = QUERIES * 30 + ["", "zzz unknown"]
+
+        # When
+        bm25_parallel = engine.search_bm25_batch(queries, top_k=20, num_workers=2)
+        bm25_serial = engine.search_bm25_batch(queries, top_k=20)
+        splade_results = engine.search_splade_batch(queries, top_k=20, encode_batch_size=16)
+
+        # Then (process pool의 worker는 저장된 인덱스를 열어서 같은 점수를 계산)
+        assert bm25_parallel == bm25_serial
+        for query, bm25_result, splade_result in zip(queries, bm25_parallel, splade_results):
+            assert bm25_result == engine.search_bm25(query, top_k=20)
+            assert splade_result == engine.search_splade(query, top_k=20)
+        engine.close()
+
+    def test_parallel_bm25_after_unsaved_changes(self, tmp_path):
+        # Given: 저장한 뒤 문서를 삭제/추가 (디스크의 인덱스와 달라짐)
+        documents = make_corpus(seed=9)
+        engine = build_engine(documents[:250], fast_tokenizer=True)
+        engine.index_path = str(tmp_path / "index")
+        engine.splade_index_path = str(tmp_path / "splade_index")
+        engine.titles_path = str(tmp_path / "titles")
+        engine.save()
+        queries = QUERIES * 30
+        engine.search_bm25_batch(queries, top_k=20, num_workers=2)
+
+        deleted = [doc_id for doc_id, _ in documents[:100]]
+        engine.delete_documents(deleted)
+        engine.add_documents(documents[250:] + [("doc1", "apple banana")])
+
+        # When
+        unsaved = engine.search_bm25_batch(queries, top_k=20, num_workers=2)
+        engine.save()
+        saved = engine.search_bm25_batch(queries, top_k=20, num_workers=2)
+
+        # Then (저장 전에는 현재 프로세스에서, 저장 후에는 새로 저장된 인덱스를 연 worker에서 같은 결과를 계산)
+        for query, unsaved_result, saved_result in zip(queries, unsaved, saved):
+            expected = engine.search_bm25(query, top_k=20)
+            assert unsaved_result == expected
+            assert saved_result == expected
+            assert not set(deleted[2:]) & {doc_id for doc_id, _ in unsaved_result}
+        engine.close()
@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.application import app as app_module
+from src.application.search_pool import OverloadedError, SearchPool
+
+SEARCH_TIME = 0.2
+
+
+class SlowEngine:
+    # 검색 한 번에 SEARCH_TIME초가 걸리는 가짜 엔진
+    titles = {}
+
+    def hybrid_search(self, query, top_k=10, offset=0):
+        time.sleep(SEARCH_TIME)
+        return [(f"doc{i}", 1.0 / (i + 1)) for i in range(offset, offset + top_k)]
+
+
+class TestSearchPool:
+    # worker 수만큼 동시에 실행되고, 자리가 없으면 OverloadedError가 나는지 테스트
+    def test_admission_control(self):
+        # Given
+        pool = SearchPool(max_workers=2, max_queue=1)
+        release = threading.Event()
+
+        async def scenario():
+            tasks = [asyncio.create_task(pool.run(release.wait)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            with pytest.raises(OverloadedError):
+                await pool.run(release.wait)
+            stats = pool.stats()
+            release.set()
+            await asyncio.gather(*tasks)
+            return stats
+
+        # When
+        stats = asyncio.run(scenario())
+
+        # Then
+        assert stats["running"] == 2 and stats["queued"] == 1 and stats["rejected"] == 1
+        assert pool.stats()["completed"] == 3
+        assert pool.stats()["queue_wait_max_ms"] > 0
+        pool.shutdown()
+
+
+class TestSearchEndpoint:
+    @pytest.fixture
+    def client_factory(self, monkeypatch):
+        monkeypatch.setattr(app_module, "engine", SlowEngine())
+        monkeypatch.setattr(app_module, "search_pool", SearchPool(max_workers=8, max_queue=0))
+        return lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://test")
+
+    # 동시에 들어온 검색 요청이 순서대로 처리되지 않고 정적 파일 요청도 기다리지 않는지 테스트 (부하 테스트)
+    def test_concurrent_requests_do_not_serialize(self, client_factory):
+        async def scenario():
+            async with client_factory() as client:
+                start = time.perf_counter()
+                searches = [asyncio.create_task(client.get("/search", params={"q": f"query {i}"})) for i in range(8)]
+                await asyncio.sleep(0.02)
+                static_start = time.perf_counter()
+                static = await client.get("/")
+                static_time = time.perf_counter() - static_start
+                responses = await asyncio.gather(*searches)
+                return responses, static, static_time, time.perf_counter() - start
+
+        # When
+        responses, static, static_time, elapsed = asyncio.run(scenario())
+
+        # Then
+        assert all(response.status_code == 200 for response in responses)
+        assert static.status_code == 200 and static_time < SEARCH_TIME
+        assert elapsed < SEARCH_TIME * 3 # 순서대로 처리하면 SEARCH_TIME * 8
+
+    # 자리가 없으면 503으로 응답하는지 테스트
+    def test_overload_returns_503(self, client_factory):
+        async def scenario():
+            async with client_factory() as client:
+                return await asyncio.gather(*[client.get("/search", params={"q": "apple"}) for _ in range(10)])
+
+        # When
+        responses = asyncio.run(scenario())
+
+        # Then
+        codes = sorted(response.status_code for response in responses)
+        assert codes == [200] * 8 + [503] * 2
+        assert all(response.headers["retry-after"] == "1" for response in responses if response.status_code == 503)
+
+
+class TestSearchApi:
+    @pytest.fixture
+    def client_factory(self, monkeypatch):
+        from tests.test_search_engine import build_engine, make_corpus
+
+        engine = build_engine(make_corpus(seed=8))
+        engine.titles = {"doc1": "First"}
+        monkeypatch.setattr(app_module, "engine", engine)
+        monkeypatch.setattr(app_module, "search_pool", SearchPool(max_workers=2, max_queue=4))
+        return engine, lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://test")
+
+    def request(self, client_factory, method, url, **kwargs):
+        async def scenario():
+            async with client_factory[1]() as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(scenario())
+
+    # JSON 검색 결과가 엔진 결과와 같고 선택한 필드만 포함하는지 테스트
+    def test_search_with_field_selection(self, client_factory):
+        engine = client_factory[0]
+
+        response = self.request(client_factory, "GET", "/api/search", params={"q": "banana cherry", "limit": 5, "fields": "doc_id,score"})
+
+        assert response.status_code == 200
+        expected = engine.hybrid_search("banana cherry", top_k=5)
+        assert response.json() == {"query": "banana cherry", "results": [{"doc_id": d, "score": s} for d, s in expected]}
+        assert self.request(client_factory, "GET", "/api/search", params={"q": "apple", "fields": "doc_id,text"}).status_code == 400
+
+    # batch 검색이 쿼리마다 검색한 결과와 같은지 테스트
+    def test_batch_search(self, client_factory):
+        engine = client_factory[0]
+        queries = ["apple", "banana cherry", "kiwi melon peach plum"]
+
+        response = self.request(client_factory, "POST", "/api/search/batch", json={"queries": queries, "limit": 3, "fields": "doc_id,title"})
+
+        assert response.status_code == 200
+        assert response.json()["results"] == [
+            {"query": q, "results": [{"doc_id": d, "title": engine.titles.get(d, "")} for d, _ in engine.hybrid_search(q, top_k=3)]}
+            for q in queries
+        ]
+        too_many = {"queries": ["apple"] * (app_module.MAX_BATCH_QUERIES + 1)}
+        assert self.request(client_factory, "POST", "/api/search/batch", json=too_many).status_code == 400
+
+    # 인덱스나 문서 저장소 로드에 실패했으면 500 대신 503으로 응답하는지 테스트
+    def test_not_loaded(self, client_factory, monkeypatch):
+        monkeypatch.setattr(app_module, "engine", None)
+        monkeypatch.setattr(app_module, "doc_store", None)
+
+        assert self.request(client_factory, "GET", "/api/search", params={"q": "apple"}).status_code == 503
+        assert self.request(client_factory, "POST", "/api/search/batch", json={"queries": ["apple"]}).status_code == 503
+        assert self.request(client_factory, "GET", "/doc/doc1").status_code == 503
+        assert self.request(client_factory, "GET", "/search", params={"q": "apple"}).status_code == 200
+
+    # 앱이 종료될 때 검색 worker thread도 정리되는지 테스트
+    def test_lifespan_shuts_down_pool(self, monkeypatch):
+        # Given: 인덱스와 문서 저장소 로드에 실패하는 상태
+        pool = SearchPool(max_workers=2, max_queue=0)
+        monkeypatch.setattr(app_module, "search_pool", pool)
+        monkeypatch.setattr(app_module, "engine", None)
+        monkeypatch.setattr(app_module, "doc_store", app_module.DocStore())
+        monkeypatch.setattr(app_module.SearchEngine, "load", lambda self: False)
+        monkeypatch.setattr(app_module.doc_store, "load", lambda path: False)
+
+        async def scenario():
+            async with app_module.lifespan(app_module.app):
+                assert await pool.run(lambda: 1) == 1
+
+        # When
+        asyncio.run(scenario())
+
+        # Then
+        with pytest.raises(RuntimeError):
+            pool._executor.submit(lambda: None)
+
+
+class TestExpandedDocuments:
+    # doc2query로 확장한 문서는 확장 전 원문만 /doc과 snippet에 보여주는지 테스트
+    def test_doc_and_snippet_use_original_text(self, tmp_path, monkeypatch):
+        import json
+        from src.core.doc_store import DocStore, DocStoreWriter
+        from src.core.document_source import iter_documents
+        from tests.test_search_engine import build_engine, make_corpus
+
+        # Given: expand_docs.py 출력 형식의 문서를 run_indexing.py와 같은 방식으로 인덱싱
+        original = " ".join(["plain filler words"] * 30) + " the zebra crossed the river"
+        item = {"doc_id": "exp1", "title": "Animals", "original_text": original,
+                "generated_queries": ["where do zebras live", "quokka habitat"],
+                "text": f"{original} where do zebras live quokka habitat"}
+        path = tmp_path / "expanded_docs.json"
+        path.write_text(json.dumps([item]), encoding="utf-8")
+
+        documents = make_corpus(seed=3)
+        expanded = list(iter_documents(str(path), include_original=True))
+        engine = build_engine(documents + [(doc_id, f"{title} {title} {text}") for doc_id, text, title, _ in expanded], fast_tokenizer=True)
+        tokenizer = engine.inverted_index.tokenizer
+        with DocStoreWriter(str(tmp_path / "doc_store")) as writer:
+            for doc_id, _, title, original_text in expanded:
+                token_base = 2 * len(tokenizer.token_offsets(title))
+                writer.add(doc_id, original_text, tokenizer.token_offsets(original_text), token_base)
+        doc_store = DocStore()
+        doc_store.load(str(tmp_path / "doc_store"))
+        monkeypatch.setattr(app_module, "engine", engine)
+        monkeypatch.setattr(app_module, "doc_store", doc_store)
+        monkeypatch.setattr(app_module, "search_pool", SearchPool(max_workers=2, max_queue=4))
+
+        async def scenario():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app_module.app), base_url="http://test") as client:
+                doc = await client.get("/doc/exp1")
+                generated = await client.get("/api/search", params={"q": "quokka", "fields": "doc_id,snippet"})
+                body = await client.get("/api/search", params={"q": "zebra river", "fields": "doc_id,snippet"})
+                return doc, generated, body
+
+        # When
+        doc, generated, body = asyncio.run(scenario())
+
+        # Then
+        assert doc.json()["text"] == original
+        # 생성된 쿼리에만 있는 단어로 찾으면 preview를 보여줌
+        assert generated.json()["results"][0] == {"doc_id": "exp1", "snippet": doc_store.snippet_fields("exp1")[0]}
+        snippet = next(r["snippet"] for r in body.json()["results"] if r["doc_id"] == "exp1")
+        assert "zebra crossed the river" in snippet and "quokka" not in snippet
@@ -0,0 +1,51 @@
+import numpy as np
+
+from src.core.inverted_index import InvertedIndex
+from src.core.snippets import best_window, highlight_pattern, highlight_text, make_preview, make_snippet
+
+
+class TestSnippets:
+    def test_make_preview(self):
+        assert make_preview("short text") == "short text"
+        assert make_preview("alpha beta gamma delta", length=12) == "alpha beta..."
+
+    # 서로 다른 쿼리 term이 가장 많이 모인 구간을 고르는지 테스트
+    def test_best_window(self):
+        # Given: term 0은 앞쪽에 많이, term 0/1이 함께 나오는 곳은 뒤쪽
+        positions = [np.array([1, 2, 3, 100]), np.array([110])]
+
+        # When / Then
+        assert best_window(positions, window=40) == 100
+        assert best_window([np.array([], dtype=np.int32)]) is None
+
+    # 인덱스의 토큰 위치로 쿼리 단어가 있는 본문 구간을 snippet으로 만드는지 테스트
+    def test_snippet_from_index_positions(self):
+        # Given: 제목을 두 번 붙여서 인덱싱한 문서 (run_indexing.py와 같은 방식)
+        title = "Fruit"
+        text = " ".join(["filler words here"] * 60) + " the zebra ate a mango near the river. " + " ".join(["more filler"] * 60)
+        index = InvertedIndex(fast_tokenizer=True)
+        index.add_document("doc1", f"{title} {title} {text}")
+        index.finalize()
+
+        offsets = index.tokenizer.token_offsets(text)
+        anchors = np.array(offsets[::8], dtype=np.uint32)
+        token_base = 2 * len(index.tokenizer.token_offsets(title))
+        positions = [index.index.positions_of(term, 0) for term in index.tokenizer.tokenize("zebra mango")]
+
+        # When
+        snippet = make_snippet(text, positions, anchors, token_base, length=120)
+
+        # Then
+        assert snippet.startswith("...") and snippet.endswith("...")
+        assert "zebra ate a mango" in snippet
+        assert len(snippet) <= 120 + 6
+
+    # 하나의 정규식으로 모든 단어를 하이라이트하고 HTML을 escape하는지 테스트
+    def test_highlight_text(self):
+        # When
+        highlighted = highlight_text("Mark <b>marked</b> the mark & the marker", "mark the marker")
+
+        # Then
+        assert highlighted == "<mark>Mark</mark> &lt;b&gt;marked&lt;/b&gt; the <mark>mark</mark> &amp; the <mark>marker</mark>"
+        assert highlight_pattern("mark the marker") is highlight_pattern("mark the marker")
+        assert highlight_text("a < b", "the") == "a &lt; b"
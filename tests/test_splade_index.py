@@ -39,13 +39,13 @@ class TestSpladeIndex:
         query_vec = {10: 1.0}
 
         # When
-        results = splade_idx.search(query_vec)
+        doc_ords, scores = splade_idx.search(query_vec)
 
-        # Then
-        assert "doc1" in results
-        assert "doc2" in results
-        assert results["doc1"] == pytest.approx(0.5)
-        assert results["doc2"] == pytest.approx(0.6)
+        # Then: 점수 내림차순의 (문서 번호, 점수) 배열
+        assert doc_ords.tolist() == [1, 0]
+        assert [splade_idx.doc_ids[i] for i in doc_ords] == ["doc2", "doc1"]
+        assert scores[0] == pytest.approx(0.6)
+        assert scores[1] == pytest.approx(0.5)
 
     # 인덱스 저장과 로드가 제대로 작동하는지 테스트
     def test_save_and_load(self, splade_idx, tmp_path):
@@ -70,3 +70,170 @@ class TestSpladeIndex:
         assert new_idx.doc_ids == ["doc_test"]
         assert new_idx.matrix[0, 1] == 10
         assert new_idx.matrix[0, 2] == 20
+
+
+class TestPrunedSearch:
+    @pytest.fixture
+    def splade_idx(self):
+        # 긴 열과 짧은 열이 섞인 인덱스
+        rng = np.random.default_rng(0)
+        index = SpladeIndex(vocab_size=200)
+        doc_ids, indices_list, values_list = [], [], []
+        for i in range(3000):
+            indices = np.unique(np.minimum(rng.zipf(1.3, size=30), 200) - 1)
+            doc_ids.append(f"doc{i}")
+            indices_list.append(indices)
+            values_list.append(rng.uniform(0.01, 3.0, size=len(indices)))
+        index.add_batch(doc_ids, indices_list, values_list)
+        index.build()
+        return index
+
+    def make_query(self, seed):
+        rng = np.random.default_rng(seed)
+        cols = rng.choice(200, size=25, replace=False)
+        return {int(c): float(v) for c, v in zip(cols, rng.uniform(0.05, 2.0, size=25))}
+
+    # safe 모드가 exact와 순서뿐 아니라 점수(dtype 포함)까지 같은지 테스트
+    @pytest.mark.parametrize("top_k", [1, 10, 100])
+    @pytest.mark.parametrize("value_type", [float, np.float32])
+    def test_safe_mode_matches_exact_top_k(self, splade_idx, top_k, value_type):
+        splade_idx.delete_document("doc3")
+        for seed in range(5):
+            query_vec = {col: value_type(value) for col, value in self.make_query(seed).items()}
+            expected_ords, expected_scores = splade_idx.search(query_vec, top_k=top_k)
+
+            doc_ords, scores = splade_idx.search(query_vec, top_k=top_k, mode="safe")
+
+            assert doc_ords.tolist() == expected_ords.tolist()
+            assert scores.dtype == expected_scores.dtype
+            assert scores.tolist() == expected_scores.tolist()
+
+    def test_approx_mode_returns_top_k(self, splade_idx):
+        query_vec = self.make_query(0)
+        expected_ords, _ = splade_idx.search(query_vec, top_k=10)
+
+        doc_ords, _ = splade_idx.search(query_vec, top_k=10, mode="approx", term_ratio=0.1)
+
+        assert len(doc_ords) == 10
+        assert len(set(doc_ords.tolist()) & set(expected_ords.tolist())) >= 5
+
+    def test_exact_search_limits_to_top_k(self, splade_idx):
+        query_vec = self.make_query(1)
+        all_ords, all_scores = splade_idx.search(query_vec, top_k=len(splade_idx.doc_ids))
+
+        doc_ords, scores = splade_idx.search(query_vec, top_k=10)
+
+        assert np.all(np.diff(all_scores) <= 0)
+        assert doc_ords.tolist() == all_ords[:10].tolist()
+        assert scores.tolist() == all_scores[:10].tolist()
+
+    # thread별로 재사용하는 점수 버퍼가 검색 사이에 섞이지 않고, sparse 행렬 곱과 같은 결과인지 테스트
+    def test_exact_search_reuses_buffer(self, splade_idx):
+        from concurrent.futures import ThreadPoolExecutor
+        from src.core.topk import top_k_order
+
+        # Given
+        splade_idx.delete_document("doc7")
+        queries = [self.make_query(seed) for seed in range(20)]
+        queries += [{col: np.float32(value) for col, value in query.items()} for query in queries[:5]]
+
+        def expected(query_vec):
+            scores = splade_idx.matrix[:, list(query_vec.keys())].dot(np.array(list(query_vec.values())))
+            scores[7] = 0
+            non_zero = np.flatnonzero(scores)
+            order = top_k_order(scores[non_zero] / 100.0, 50)
+            return non_zero[order].tolist(), (scores[non_zero] / 100.0)[order].tolist()
+
+        # When
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda query_vec: splade_idx.search(query_vec, top_k=50), queries * 3))
+
+        # Then
+        for query_vec, (doc_ords, scores) in zip(queries * 3, results):
+            assert (doc_ords.tolist(), scores.tolist()) == expected(query_vec)
+
+
+class TestStreamingBuild:
+    def make_batches(self, num_batches=20, batch_size=50, vocab_size=300):
+        rng = np.random.default_rng(0)
+        batches = []
+        for b in range(num_batches):
+            doc_ids, indices_list, values_list = [], [], []
+            for i in range(batch_size):
+                indices = np.sort(rng.choice(vocab_size, size=rng.integers(1, 40), replace=False))
+                doc_ids.append(f"doc{b}_{i}")
+                indices_list.append(indices)
+                values_list.append(rng.uniform(0.0, 3.0, size=len(indices)).astype(np.float32))
+            batches.append((doc_ids, indices_list, values_list))
+        return batches
+
+    def build(self, batches, **kwargs):
+        index = SpladeIndex(vocab_size=300, **kwargs)
+        for batch in batches:
+            index.add_batch(*batch)
+        return index
+
+    # memory_budget을 넘으면 segment로 나눠 기록해도 메모리 빌드와 같은 배열이 만들어지는지 테스트
+    def test_spilled_build_matches_in_memory_build(self, tmp_path):
+        # Given
+        batches = self.make_batches()
+        expected = self.build(batches)
+        expected.build()
+
+        spill_dir = tmp_path / "segments"
+        index = self.build(batches, memory_budget=10_000, spill_dir=str(spill_dir))
+
+        # When
+        assert len(index._segments) > 1
+        index.build()
+
+        # Then
+        assert np.array_equal(index.offsets, expected.offsets)
+        assert np.array_equal(index.docs, expected.docs)
+        assert np.array_equal(index.impacts, expected.impacts)
+        assert np.array_equal(index.col_max, expected.col_max)
+        assert list(spill_dir.iterdir()) == []
+
+    # 빌드 결과가 scipy CSC 행렬과 같은지 테스트
+    def test_build_matches_scipy_csc(self):
+        import scipy.sparse as sp
+
+        # Given
+        batches = self.make_batches(num_batches=3)
+        rows, cols, data = [], [], []
+        for b, (_, indices_list, values_list) in enumerate(batches):
+            for i, (indices, values) in enumerate(zip(indices_list, values_list)):
+                rows.extend([b * 50 + i] * len(indices))
+                cols.extend(indices)
+                data.extend((values * 100).astype(np.int16))
+        expected = sp.csc_matrix((data, (rows, cols)), shape=(150, 300), dtype=np.int16)
+        expected.sort_indices()
+
+        # When
+        index = self.build(batches, memory_budget=5_000)
+        index.build()
+
+        # Then
+        assert np.array_equal(index.offsets, expected.indptr)
+        assert np.array_equal(index.docs, expected.indices)
+        assert np.array_equal(index.impacts, expected.data)
+
+    # build(path)가 배열을 바로 디스크에 기록해서 로드할 수 있는 인덱스를 만드는지 테스트
+    def test_build_writes_index_to_path(self, tmp_path):
+        # Given
+        batches = self.make_batches(num_batches=5)
+        expected = self.build(batches)
+        expected.build()
+        index = self.build(batches, memory_budget=10_000)
+
+        # When
+        index.build(str(tmp_path / "index"))
+        loaded = SpladeIndex()
+        loaded.load(str(tmp_path / "index"))
+
+        # Then
+        assert loaded.doc_ids == expected.doc_ids
+        assert np.array_equal(loaded.docs, expected.docs)
+        assert np.array_equal(loaded.impacts, expected.impacts)
+        query_vec = {3: 1.0, 42: 0.5, 299: 2.0}
+        assert loaded.search(query_vec)[0].tolist() == expected.search(query_vec)[0].tolist()
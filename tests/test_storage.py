@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+from src.core.storage import StringTable, StringMap, write_header, read_header
+
+class TestStringTable:
+    def test_lookup_unsorted_strings(self):
+        # Given
+        table = StringTable.from_strings(["doc_b", "doc_a", "문서_c", "doc_10"])
+
+        # Then
+        assert len(table) == 4
+        assert table[2] == "문서_c"
+        assert table.index_of("doc_a") == 1
+        assert table.index_of("doc_10") == 3
+        assert table.index_of("missing") == -1
+        assert table == ["doc_b", "doc_a", "문서_c", "doc_10"]
+
+    def test_save_and_load_as_memmap(self, tmp_path):
+        # Given
+        table = StringTable.from_strings(["apple", "banana", "cherry"])
+
+        # When
+        table.save(str(tmp_path), "terms")
+        loaded = StringTable.load(str(tmp_path), "terms")
+
+        # Then
+        assert loaded.order is None  # 이미 정렬된 목록
+        assert isinstance(loaded.blob.base, np.memmap)
+        assert list(loaded) == ["apple", "banana", "cherry"]
+        assert loaded.index_of("banana") == 1
+
+    def test_resave_sorted_over_unsorted(self, tmp_path):
+        # Given: 정렬되지 않은 목록을 저장했던 디렉토리
+        StringTable.from_strings(["b", "a"]).save(str(tmp_path), "doc_ids")
+
+        # When: 같은 이름으로 정렬된 목록을 다시 저장
+        StringTable.from_strings(["a", "b", "c"]).save(str(tmp_path), "doc_ids")
+        loaded = StringTable.load(str(tmp_path), "doc_ids")
+
+        # Then
+        assert loaded.order is None
+        assert [loaded.index_of(s) for s in ["a", "b", "c"]] == [0, 1, 2]
+
+
+class TestStringMap:
+    def test_save_and_load(self, tmp_path):
+        # Given
+        titles = StringMap.from_dict({"doc2": "Second", "doc1": "First"})
+
+        # When
+        titles.save(str(tmp_path / "titles"))
+        loaded = StringMap.load(str(tmp_path / "titles"))
+
+        # Then
+        assert loaded["doc1"] == "First"
+        assert loaded.get("doc3", "없음") == "없음"
+        assert dict(loaded) == {"doc2": "Second", "doc1": "First"}
+
+
+def test_header_kind_and_version_check(tmp_path):
+    write_header(str(tmp_path), "bm25", doc_count=3)
+
+    assert read_header(str(tmp_path), "bm25")["doc_count"] == 3
+    with pytest.raises(ValueError):
+        read_header(str(tmp_path), "splade")
@@ -1,4 +1,5 @@
 import pytest
+import random
 from src.core.tokenizers import BM25Tokenizer, SpladeTokenizer
 
 class TestBM25Tokenizer:
@@ -38,6 +39,54 @@ class TestBM25Tokenizer:
         assert tokenizer.tokenize("") == []
         assert tokenizer.tokenize(None) == []
 
+    def test_fast_mode_matches_default(self, tokenizer):
+        # fast 모드가 nltk.word_tokenize를 사용하는 기본 모드와 같은 토큰을 반환하는지 검증
+        # Given: 축약어 규칙, 구두점, 유니코드 공백, 불용어가 섞인 텍스트
+        rng = random.Random(0)
+        words = ["Cannot", "gonna", "WANNA", "gimme", "lemme", "gotta", "can", "not", "don't", "d'ye", "more'n",
+                 "'tis", "U.S.", "3.14", "e-mail", "running", "foxes", "The", "is", "naïve", "(test)", "\"quoted\"", "it's"]
+        separators = [" ", "  ", "\n", "\t", "\u00a0", "\u2003", ", ", ". ", "! ", "--"]
+        texts = ["".join(rng.choice(words) + rng.choice(separators) for _ in range(rng.randint(1, 30))) for _ in range(300)]
+        fast_tokenizer = BM25Tokenizer(fast=True)
+
+        # When / Then
+        for text in texts:
+            assert fast_tokenizer.tokenize(text) == tokenizer.tokenize(text), text
+
+    def test_token_offsets(self, tokenizer):
+        # 토큰마다 원문에서 해당 단어가 시작하는 위치를 반환하는지 검증
+        # Given
+        text = "The quick-brown  foxes\ngonna (run)! ... e-mail"
+
+        # When
+        offsets = tokenizer.token_offsets(text)
+
+        # Then
+        assert len(offsets) == len(tokenizer.tokenize(text))
+        assert [text[o:].split()[0] for o in offsets] == ["quick-brown", "foxes", "gonna", "gonna", "(run)!", "e-mail"]
+
+    @pytest.mark.parametrize("num_workers", [1, 2])
+    def test_tokenize_batch_keeps_order(self, tokenizer, num_workers):
+        # Given
+        texts = [f"document {i} running foxes" if i % 3 else "" for i in range(25)]
+
+        # When
+        tokens = tokenizer.tokenize_batch(iter(texts), batch_size=4, num_workers=num_workers)
+
+        # Then
+        assert list(tokens) == [tokenizer.tokenize(text) for text in texts]
+
+    @pytest.mark.parametrize("num_workers", [1, 2])
+    def test_token_offsets_batch_keeps_order(self, tokenizer, num_workers):
+        # Given
+        texts = [f"The document {i} isn't running" if i % 3 else "" for i in range(25)]
+
+        # When
+        offsets = tokenizer.token_offsets_batch(iter(texts), batch_size=4, num_workers=num_workers)
+
+        # Then
+        assert list(offsets) == [tokenizer.token_offsets(text) for text in texts]
+
 
 class TestSpladeTokenizer:
     @pytest.fixture
@@ -0,0 +1,46 @@
+import pytest
+import random
+import numpy as np
+from src.core.topk import top_k_order, top_k_items
+
+def reference_order(values, tiebreak=()):
+    # 기존 방식: 전체를 stable sort
+    keys = [tuple(-values[i] if j == 0 else tiebreak[j - 1][i] for j in range(len(tiebreak) + 1)) for i in range(len(values))]
+    return sorted(range(len(values)), key=lambda i: keys[i])
+
+
+class TestTopKOrder:
+    @pytest.mark.parametrize("k", [0, 1, 5, 37, 200, 500])
+    def test_matches_full_sort_with_ties(self, k):
+        # Given: 동점이 많은 점수 배열
+        rng = np.random.default_rng(k)
+        values = rng.integers(0, 20, size=200).astype(np.float64) / 4
+
+        # When
+        result = top_k_order(values, k)
+
+        # Then
+        assert result.tolist() == reference_order(values)[:k]
+
+    def test_tiebreak_keys(self):
+        # Given
+        values = np.array([1.0, 2.0, 2.0, 2.0, 0.5, 2.0])
+        first_seen = np.array([0, 1, 0, 1, 0, 0])
+
+        # When
+        result = top_k_order(values, 3, tiebreak=(first_seen,))
+
+        # Then: 동점(2.0)은 first_seen이 작은 것, 그 다음 위치 순서
+        assert result.tolist() == [2, 5, 1]
+        assert result.tolist() == reference_order(values, (first_seen,))[:3]
+
+
+class TestTopKItems:
+    def test_matches_sorted_slice(self):
+        # Given
+        rng = random.Random(0)
+        scores = {f"doc{i}": rng.choice([0.1, 0.2, 0.3, 0.4]) for i in range(100)}
+
+        for k in (0, 1, 10, 100, 150):
+            expected = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            assert top_k_items(scores, k) == expected
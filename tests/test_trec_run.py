@@ -0,0 +1,27 @@
+import pytest
+
+from src.core.trec_run import read_trec_run, write_trec_run
+
+
+class TestTrecRun:
+    def test_round_trip(self, tmp_path):
+        # Given
+        path = str(tmp_path / "runs" / "bm25.trec")
+        run = {"q1": [("d3", 2.5), ("d1", 0.1 + 0.2)], "q2": []}
+
+        # When
+        write_trec_run(path, run, tag="bm25")
+
+        # Then (점수는 그대로 복원되고 결과가 없는 쿼리는 기록되지 않음)
+        with open(path, encoding="utf-8") as f:
+            assert f.readline().split() == ["q1", "Q0", "d3", "1", "2.5", "bm25"]
+        assert read_trec_run(path) == {"q1": {"d3": 2.5, "d1": 0.1 + 0.2}}
+
+    def test_malformed_line(self, tmp_path):
+        # Given
+        path = tmp_path / "broken.trec"
+        path.write_text("q1 Q0 d1 1\n")
+
+        # When / Then
+        with pytest.raises(ValueError):
+            read_trec_run(str(path))